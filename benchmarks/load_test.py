@@ -0,0 +1,78 @@
+"""
+Load test of a running tailor instance, keeping many requests in flight at once.
+
+Opens one keep-alive connection per concurrent client and reports the throughput and latency percentiles. With a
+concurrency above the 40 threads of the default threadpool, synchronous handlers queue while asynchronous ones keep
+serving every request concurrently.
+
+Usage:
+    python -m benchmarks.load_test --api-key KEY [--url http://localhost:8080/filters] [--concurrency 200]
+"""
+
+import argparse
+import asyncio
+import statistics
+from http import HTTPStatus
+from time import perf_counter
+from urllib.parse import urlsplit
+
+
+async def client(url: str, api_key: str, requests: int, latencies: list[float], errors: list[int]) -> None:
+    """Send the requests sequentially through a single keep-alive connection."""
+    parts = urlsplit(url)
+    reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+    request = (
+        f"GET {parts.path or '/'} HTTP/1.1\r\nHost: {parts.netloc}\r\nX-API-KEY: {api_key}\r\n"
+        "Connection: keep-alive\r\n\r\n"
+    ).encode()
+
+    try:
+        for _ in range(requests):
+            start = perf_counter()
+            writer.write(request)
+            await writer.drain()
+
+            status = int((await reader.readline()).split()[1])
+            length = 0
+            while (line := await reader.readline()) not in {b"\r\n", b""}:
+                name, _, value = line.decode().partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+
+            await reader.readexactly(length)
+            latencies.append(perf_counter() - start)
+            if status >= HTTPStatus.BAD_REQUEST:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def run(url: str, api_key: str, concurrency: int, requests: int) -> None:
+    """Run the concurrent clients and print the results."""
+    latencies: list[float] = []
+    errors: list[int] = []
+
+    start = perf_counter()
+    await asyncio.gather(*(client(url, api_key, requests, latencies, errors) for _ in range(concurrency)))
+    elapsed = perf_counter() - start
+
+    percentiles = statistics.quantiles(latencies, n=100)
+    print(f"requests:   {len(latencies)} ({len(errors)} errors)")  # noqa: T201
+    print(f"throughput: {len(latencies) / elapsed:.1f} requests/s")  # noqa: T201
+    print(f"latency:    p50 {percentiles[49] * 1e3:.1f} ms, p99 {percentiles[98] * 1e3:.1f} ms")  # noqa: T201
+
+
+def main() -> None:
+    """Parse the arguments and run the load test."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:8080/filters")
+    parser.add_argument("--api-key", required=True)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=50, help="Requests sent by each concurrent client")
+    args = parser.parse_args()
+
+    asyncio.run(run(args.url, args.api_key, args.concurrency, args.requests))
+
+
+if __name__ == "__main__":
+    main()
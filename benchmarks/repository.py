@@ -0,0 +1,101 @@
+"""
+Throughput benchmark of the user hot paths against the embedded SQLite backend, without Firestore.
+
+Seeds the users, then measures authenticating by API key, mutating a filter and reading pages of users. Pass
+`--profile` to print the functions where the time is spent.
+
+Usage:
+    python -m benchmarks.repository [--users 1000] [--filters 10] [--operations 5000] [--profile]
+"""
+
+import argparse
+import asyncio
+import cProfile
+import os
+import pstats
+from collections.abc import Awaitable, Callable
+from time import perf_counter
+
+os.environ.setdefault("DATABASE_BACKEND", "sqlite")
+
+import ulid
+from cumplo_common.models.user import User
+
+from cumplo_tailor.controllers import UsersController
+from cumplo_tailor.database import UserChanges, repository
+
+
+async def seed(users: int, filters: int) -> list[User]:
+    """Create the users, each one with the given amount of filters."""
+    created = []
+    for index in range(users):
+        user = User.model_validate({
+            "id": ulid.new(),
+            "api_key": f"key-{index}",
+            "name": f"User {index}",
+            "email": f"user{index}@example.com",
+            "filters": {
+                str(id_filter): {"id": id_filter, "minimum_irr": "1.5", "minimum_duration": 30 + position}
+                for position, id_filter in enumerate(ulid.new() for _ in range(filters))
+            },
+        })
+        await repository.client.users.create(user)
+        created.append(user)
+    return created
+
+
+async def measure(name: str, operation: Callable[[int], Awaitable[object]], operations: int) -> None:
+    """Run the operation the given amount of times and print its throughput."""
+    start = perf_counter()
+    for index in range(operations):
+        await operation(index)
+    elapsed = perf_counter() - start
+    latency = elapsed / operations * 1e6
+    print(f"{name:>10}: {operations / elapsed:,.0f} operations/s ({latency:.1f} us each)")  # noqa: T201
+
+
+async def run(users: int, filters: int, operations: int) -> None:
+    """Seed the database and measure each hot path."""
+    seeded = await seed(users, filters)
+
+    async def lookup(index: int) -> object:
+        return await UsersController.lookup(api_key=seeded[index % users].api_key)
+
+    async def mutate(index: int) -> object:
+        def mutation(user: User) -> UserChanges:
+            filter_ = next(iter(user.filters.values()))
+            filter_.name = f"Filter {index}"
+            return UserChanges(filters={str(filter_.id)})
+
+        return await UsersController.mutate(seeded[index % users], mutation)
+
+    async def page(index: int) -> object:
+        return await repository.client.users.page(100, start_after=str(seeded[index % users].id))
+
+    await measure("lookup", lookup, operations)
+    if filters:
+        await measure("mutate", mutate, operations)
+    await measure("page", page, operations)
+
+
+def main() -> None:
+    """Parse the arguments and run the benchmark, optionally under the profiler."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--filters", type=int, default=10)
+    parser.add_argument("--operations", type=int, default=5000)
+    parser.add_argument("--profile", action="store_true")
+    args = parser.parse_args()
+
+    if not args.profile:
+        return asyncio.run(run(args.users, args.filters, args.operations))
+
+    with cProfile.Profile() as profile:
+        asyncio.run(run(args.users, args.filters, args.operations))
+
+    pstats.Stats(profile).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(25)
+    return None
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Micro-benchmark of the subscription message parsing across many senders.
+
+Compares the previous per-message `re.search` over the raw patterns with the precompiled `SenderMatcher`.
+
+Usage:
+    python -m benchmarks.sender_matcher [--senders 1000] [--messages 100000]
+"""
+
+import argparse
+import re
+import timeit
+
+from cumplo_tailor.utils.senders import SenderMatcher
+
+PATTERN = r"(?P<name>[\w ]+) \((?P<email>[\w.+-]+@[\w-]+\.[\w.]+)\) se ha suscrito"
+
+
+def main() -> None:
+    """Run the benchmark and print the per-message parse cost of both approaches."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--senders", type=int, default=1000)
+    parser.add_argument("--messages", type=int, default=100_000)
+    args = parser.parse_args()
+
+    patterns = {
+        f"news{index}@sender{index}.com": PATTERN.replace("suscrito", f"suscrito {index}")
+        for index in range(args.senders)
+    }
+    messages = [
+        (f"News <news{index}@sender{index}.com>", f"Jane Doe (jane+{index}@example.com) se ha suscrito {index}")
+        for index in range(args.senders)
+    ]
+    matcher = SenderMatcher(patterns)
+
+    def legacy() -> None:
+        for sender, snippet in messages:
+            if pattern := patterns.get(sender.split("<")[-1].rstrip(">")):
+                re.search(pattern, snippet)
+
+    def compiled() -> None:
+        for sender, snippet in messages:
+            matcher.match(sender, snippet)
+
+    rounds = max(args.messages // len(messages), 1)
+    for name, function in (("re.search", legacy), ("SenderMatcher", compiled)):
+        seconds = timeit.timeit(function, number=rounds)
+        print(f"{name:>14}: {seconds / (rounds * len(messages)) * 1e6:.2f} us/message")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
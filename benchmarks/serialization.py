@@ -0,0 +1,70 @@
+"""
+Micro-benchmark of the serialization of the filter and channel list responses.
+
+Compares the previous path, where each model is turned into a dictionary with `json()` and FastAPI then encodes the
+list with `jsonable_encoder` and `JSONResponse`, with the direct JSON bytes of the `Serializer`.
+
+Usage:
+    python -m benchmarks.serialization [--items 100] [--rounds 1000]
+"""
+
+import argparse
+import json
+import timeit
+from typing import TYPE_CHECKING
+
+import ulid
+from cumplo_common.models.channel import WebhookConfiguration
+from cumplo_common.models.filter_configuration import FilterConfiguration
+from fastapi.encoders import jsonable_encoder
+
+from cumplo_tailor.utils.serialization import Serializer, channel_serializer, filter_serializer
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+
+def legacy(models: list) -> bytes:
+    """Serialize the models the way FastAPI does with the dictionaries returned by the routers."""
+    content = jsonable_encoder([model.json() for model in models])
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+
+def main() -> None:
+    """Run the benchmark and print the per-response cost of both paths."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=1000)
+    args = parser.parse_args()
+
+    filters = [
+        FilterConfiguration.model_validate({
+            "id": ulid.new(),
+            "name": f"Filter {index}",
+            "minimum_score": "0.8",
+            "minimum_duration": 30 + index,
+            "minimum_irr": "1.5",
+        })
+        for index in range(args.items)
+    ]
+    channels = [
+        WebhookConfiguration.model_validate({"id": ulid.new(), "url": f"https://example.com/hooks/{index}"})
+        for index in range(args.items)
+    ]
+
+    cases: list[tuple[str, list, Serializer]] = [
+        ("filters", filters, filter_serializer),
+        ("channels", channels, channel_serializer),
+    ]
+    for resource, models, serializer in cases:
+        paths: tuple[tuple[str, Callable[[], bytes]], ...] = (
+            ("legacy", lambda models=models: legacy(models)),
+            ("serializer", lambda models=models, serializer=serializer: serializer.many(models)),
+        )
+        for name, function in paths:
+            seconds = timeit.timeit(function, number=args.rounds)
+            print(f"{resource:>8} {name:>10}: {seconds / args.rounds * 1e6:.1f} us/response")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Startup time report of the service, from the `-X importtime` breakdown of importing the app.
+
+Imports `cumplo_tailor.main` in a fresh interpreter and reports the total import time, the packages that take the
+longest and the slowest modules. Pass `--budget` to fail when the total exceeds it, so regressions are caught.
+
+Usage:
+    python -m benchmarks.startup [--lazy] [--top 15] [--budget MILLISECONDS]
+"""
+
+import argparse
+import os
+import subprocess  # noqa: S404
+import sys
+from collections import Counter
+from typing import NamedTuple
+
+# NOTE: Namespace packages are grouped one level deeper, so each Google library is reported on its own
+NAMESPACES = {"google": 2, "google.cloud": 3}
+
+
+class ImportTime(NamedTuple):
+    """Import time of a single module, in microseconds."""
+
+    module: str
+    own: int
+    cumulative: int
+    depth: int
+
+
+def measure(module: str, *, lazy: bool) -> list[ImportTime]:
+    """Import the module in a fresh interpreter and parse its import times."""
+    environment = {**os.environ, "LAZY_STARTUP": "1" if lazy else ""}
+    process = subprocess.run(  # noqa: S603
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=environment,
+        check=False,
+    )
+    if process.returncode:
+        sys.exit(process.stderr)
+
+    times = []
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+
+        own, cumulative, name = line.removeprefix("import time:").split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        times.append(ImportTime(name.strip(), int(own), int(cumulative), depth))
+    return times
+
+
+def package(module: str) -> str:
+    """Get the package a module is reported under."""
+    parts = module.split(".")
+    return ".".join(parts[: NAMESPACES.get(".".join(parts[:2]), NAMESPACES.get(parts[0], 1))])
+
+
+def main() -> None:
+    """Parse the arguments and print the report."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="cumplo_tailor.main")
+    parser.add_argument("--lazy", action="store_true", help="Import with LAZY_STARTUP set")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget", type=float, help="Maximum total import time, in milliseconds")
+    args = parser.parse_args()
+
+    times = measure(args.module, lazy=args.lazy)
+    total = sum(time.own for time in times) / 1e3
+
+    packages: Counter[str] = Counter()
+    for time in times:
+        packages[package(time.module)] += time.own
+
+    print(f"Total import time of {args.module}: {total:.1f} ms ({len(times)} modules)\n")  # noqa: T201
+    print("Slowest packages:")  # noqa: T201
+    for name, own in packages.most_common(args.top):
+        print(f"  {own / 1e3:>8.1f} ms  {name}")  # noqa: T201
+
+    print("\nSlowest modules:")  # noqa: T201
+    for time in sorted(times, key=lambda time: time.own, reverse=True)[: args.top]:
+        print(f"  {time.own / 1e3:>8.1f} ms  {time.module}")  # noqa: T201
+
+    if args.budget and total > args.budget:
+        sys.exit(f"\nThe import time exceeds the budget of {args.budget:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,17 @@
 from .channels import ChannelsController
+from .limits import LimitsController
+from .onboarding import OnboardingController
+from .outbox import OutboxController
+from .routes import RoutesController
+from .subscriptions import SubscriptionsController
 from .users import UsersController
 
-__all__ = ["ChannelsController", "UsersController"]
+__all__ = [
+    "ChannelsController",
+    "LimitsController",
+    "OnboardingController",
+    "OutboxController",
+    "RoutesController",
+    "SubscriptionsController",
+    "UsersController",
+]
@@ -1,59 +1,56 @@
+from collections import defaultdict
 from collections.abc import Iterable
 from http import HTTPStatus
 from typing import cast
 
 from cumplo_common.models.channel import (
+    ALL_EVENTS,
     ChannelConfiguration,
     ChannelType,
     IFTTTConfiguration,
+    PublicEvent,
     WebhookConfiguration,
     WhatsappConfiguration,
 )
 from cumplo_common.models.user import User
 from fastapi.exceptions import HTTPException
 
-from cumplo_tailor.utils.constants import MAX_WEBHOOKS
+from cumplo_tailor.controllers.limits import EVENTS, LimitsController
+from cumplo_tailor.utils.fingerprints import UserIndex
 
 
 class ChannelsController:
     """Controller for the channels."""
 
     @staticmethod
-    def _filter(user: User, exclude: ChannelConfiguration, channel_type: ChannelType) -> Iterable[ChannelConfiguration]:
+    def _others(lookup: set[str], exclude: ChannelConfiguration) -> set[str]:
         """
-        Filter the user's channels by type excluding the specified channel.
+        Get the IDs of an index lookup excluding the specified channel.
 
         Args:
-            user (User): The user to filter the channels from.
+            lookup (set[str]): The channel IDs of the lookup.
             exclude (ChannelConfiguration): The channel to exclude from the results.
-            channel_type (ChannelType): The type of channel to filter.
 
         Returns:
-            Iterable[ChannelConfiguration]: The user's channels of the specified type.
+            set[str]: The IDs of the other channels in the lookup.
 
         """
-        return filter(lambda c: c.type_ == channel_type and c.id != exclude.id, user.channels.values())
+        return lookup - {str(exclude.id)}
 
     @classmethod
-    def _validate_webhook_channels(cls, user: User, channel: WebhookConfiguration) -> None:
+    def _validate_webhook_channels(cls, index: UserIndex, channel: WebhookConfiguration) -> None:
         """
         Validate the user can add the channel based on the user's existing channels.
 
         Raises:
-            HTTPException: When the max amount of webhooks is reached (409)
             HTTPException: When the webhook URL already exists (409)
 
         """
-        webhook_channels = cls._filter(user, exclude=channel, channel_type=ChannelType.WEBHOOK)
-        if len(list(webhook_channels)) >= MAX_WEBHOOKS:
-            raise HTTPException(HTTPStatus.CONFLICT, detail="Max amount of webhooks reached")
-
-        for webhook_channel in webhook_channels:
-            if cast(WebhookConfiguration, webhook_channel).url == channel.url:
-                raise HTTPException(HTTPStatus.CONFLICT, detail="This webhook URL already exists")
+        if cls._others(index.webhook_urls[channel.url], exclude=channel):
+            raise HTTPException(HTTPStatus.CONFLICT, detail="This webhook URL already exists")
 
     @classmethod
-    def _validate_whatsapp_channels(cls, user: User, channel: WhatsappConfiguration) -> None:
+    def _validate_whatsapp_channels(cls, index: UserIndex, channel: WhatsappConfiguration) -> None:
         """
         Validate the user can add the channel based on the user's existing channels.
 
@@ -61,12 +58,11 @@ class ChannelsController:
             HTTPException: When the user already has a WhatsApp channel (400)
 
         """
-        whatsapp_channels = cls._filter(user, exclude=channel, channel_type=ChannelType.WHATSAPP)
-        if any(whatsapp_channels):
+        if cls._others(index.by_type[ChannelType.WHATSAPP], exclude=channel):
             raise HTTPException(HTTPStatus.BAD_REQUEST, detail="Only one WhatsApp channel is allowed")
 
     @classmethod
-    def _validate_ifttt_channels(cls, user: User, channel: IFTTTConfiguration) -> None:
+    def _validate_ifttt_channels(cls, index: UserIndex, channel: IFTTTConfiguration) -> None:
         """
         Validate the user can add the channel based on the user's existing channels.
 
@@ -75,25 +71,110 @@ class ChannelsController:
             HTTPException: When the user already has an IFTTT channel with the same event (409)
 
         """
-        for ifttt_channel in cls._filter(user, exclude=channel, channel_type=ChannelType.IFTTT):
-            ifttt_channel = cast(IFTTTConfiguration, ifttt_channel)
-            if ifttt_channel.key != channel.key:
-                raise HTTPException(HTTPStatus.BAD_REQUEST, detail="Only one IFTTT key is allowed per user")
-            if ifttt_channel.event == channel.event:
-                raise HTTPException(HTTPStatus.CONFLICT, detail="This IFTTT event already exists")
+        ifttt_channels = cls._others(index.by_type[ChannelType.IFTTT], exclude=channel)
+        if ifttt_channels - index.ifttt_keys[channel.key]:
+            raise HTTPException(HTTPStatus.BAD_REQUEST, detail="Only one IFTTT key is allowed per user")
+
+        if cls._others(index.ifttt_events[channel.event], exclude=channel):
+            raise HTTPException(HTTPStatus.CONFLICT, detail="This IFTTT event already exists")
+
+    @staticmethod
+    def usage(index: UserIndex, channels: Iterable[ChannelConfiguration]) -> dict[str, int]:
+        """
+        Count the resources the user uses once the channels are added or updated, to check them at once.
+
+        Args:
+            index (UserIndex): The index of the user's channels, with or without the given ones.
+            channels (Iterable[ChannelConfiguration]): The channels being added or updated.
+
+        Returns:
+            dict[str, int]: The amount of channels of each of their types, and the most events enabled on any of them.
+
+        """
+        ids_by_type: defaultdict[str, set[str]] = defaultdict(set)
+        events = 0
+        for channel in channels:
+            ids_by_type[channel.type_].add(str(channel.id))
+            events = max(events, LimitsController.enabled_events(channel))
+
+        usage = {channel_type: len(index.by_type[channel_type] | ids) for channel_type, ids in ids_by_type.items()}
+        return {**usage, EVENTS: events}
 
     @classmethod
-    def validate(cls, user: User, channel: ChannelConfiguration) -> None:
-        """Validate the user can add the channel based on the user's existing channels."""
+    def validate(cls, user: User, channel: ChannelConfiguration, index: UserIndex | None = None) -> None:
+        """
+        Validate the user can add the channel based on the user's existing channels.
+
+        Fails when the channel conflicts with the existing ones. Limits are checked separately, with `usage`.
+
+        Args:
+            user (User): The user owning the channels.
+            channel (ChannelConfiguration): The channel to validate.
+            index (UserIndex | None): The index of the user's current state. Built from the user when missing.
+
+        """
+        index = index or UserIndex(user)
         match channel.type_:
             case ChannelType.WHATSAPP:
                 channel = cast(WhatsappConfiguration, channel)
-                cls._validate_whatsapp_channels(user, channel)
+                cls._validate_whatsapp_channels(index, channel)
 
             case ChannelType.IFTTT:
                 channel = cast(IFTTTConfiguration, channel)
-                cls._validate_ifttt_channels(user, channel)
+                cls._validate_ifttt_channels(index, channel)
 
             case ChannelType.WEBHOOK:
                 channel = cast(WebhookConfiguration, channel)
-                cls._validate_webhook_channels(user, channel)
+                cls._validate_webhook_channels(index, channel)
+
+    @staticmethod
+    def enable_event(channel: ChannelConfiguration, event: PublicEvent) -> bool:
+        """
+        Enable an event for the channel.
+
+        Returns:
+            bool: Whether the event was enabled, i.e. it was not already enabled.
+
+        """
+        if channel.enabled_events == ALL_EVENTS:
+            # NOTE: If all events are enabled, remove from disabled_events
+            if event not in channel.disabled_events:
+                return False
+            channel.disabled_events.discard(event)
+            return True
+
+        if event in channel.enabled_events:
+            return False
+
+        channel.enabled_events.add(event)
+        return True
+
+    @staticmethod
+    def disable_event(channel: ChannelConfiguration, event: PublicEvent) -> bool:
+        """
+        Disable an event for the channel.
+
+        Returns:
+            bool: Whether the event was disabled, i.e. it was not already disabled.
+
+        """
+        if channel.enabled_events != ALL_EVENTS:
+            if event not in channel.enabled_events:
+                return False
+
+            # NOTE: Remove from enabled_events
+            channel.enabled_events.discard(event)
+            return True
+
+        # NOTE: If all events are enabled, add to disabled_events
+        if event in channel.disabled_events:
+            return False
+        channel.disabled_events.add(event)
+
+        # NOTE: If both enabled_events and disabled_events are empty, disable the channel
+        if len(channel.disabled_events) == len(PublicEvent):
+            channel.disabled_events = set()
+            channel.enabled_events = set()
+            channel.enabled = False
+
+        return True
@@ -0,0 +1,192 @@
+import json
+from collections import OrderedDict
+from http import HTTPStatus
+from logging import getLogger
+from pathlib import Path
+from threading import Lock
+from time import monotonic
+from typing import ClassVar, Self
+
+from cumplo_common.models.channel import ALL_EVENTS, ChannelConfiguration, ChannelType, PublicEvent
+from fastapi.exceptions import HTTPException
+from pydantic import BaseModel, Field, NonNegativeInt, ValidationError, model_validator
+
+from cumplo_tailor.utils.constants import (
+    LIMITS,
+    LIMITS_CACHE_SIZE,
+    LIMITS_FILE,
+    LIMITS_RELOAD_INTERVAL,
+    MAX_FILTERS,
+    MAX_WEBHOOKS,
+)
+
+logger = getLogger(__name__)
+
+FILTERS = "filters"
+EVENTS = "events"
+RESOURCES = {FILTERS, EVENTS, *ChannelType}
+
+type Limits = dict[str, NonNegativeInt]
+
+
+class LimitsConfiguration(BaseModel):
+    """
+    Limits by resource for the default tier, for each plan and for specific users.
+
+    Resources are `filters`, `events` (enabled per channel) and each channel type. Users are assigned either a
+    plan name or their own limits, which are layered over the plan and default ones.
+    """
+
+    default: Limits = Field(default_factory=dict)
+    plans: dict[str, Limits] = Field(default_factory=dict)
+    users: dict[str, str | Limits] = Field(default_factory=dict)
+
+    @model_validator(mode="after")
+    def _validate_references(self) -> Self:
+        """
+        Validate every resource and referenced plan exists.
+
+        Raises:
+            ValueError: When a tier limits an unknown resource or a user is assigned an unknown plan.
+
+        """
+        tiers = [self.default, *self.plans.values(), *(tier for tier in self.users.values() if isinstance(tier, dict))]
+        if unknown := {resource for tier in tiers for resource in tier} - RESOURCES:
+            message = f"Unknown resources: {', '.join(sorted(unknown))}"
+            raise ValueError(message)
+
+        if unknown := {plan for plan in self.users.values() if isinstance(plan, str)} - self.plans.keys():
+            message = f"Unknown plans: {', '.join(sorted(unknown))}"
+            raise ValueError(message)
+
+        return self
+
+
+class LimitsController:
+    """
+    Controller for the per-user limits.
+
+    The configuration is read from the `LIMITS_FILE` (or the `LIMITS` variable) on first use, and the file is
+    reloaded whenever it changes, checking it at most once every `LIMITS_RELOAD_INTERVAL` seconds. A configuration
+    that fails to load is logged and the previous one is kept. The resolved limits of the last `LIMITS_CACHE_SIZE`
+    users are kept until the configuration changes.
+    """
+
+    _lock = Lock()
+    _configuration = LimitsConfiguration(default={FILTERS: MAX_FILTERS, ChannelType.WEBHOOK: MAX_WEBHOOKS})
+    _limits_by_user: ClassVar[OrderedDict[str, Limits]] = OrderedDict()
+    _modified_at: float | None = None
+    _checked_at: float | None = None
+
+    @classmethod
+    def configuration(cls) -> LimitsConfiguration:
+        """Get the current limits configuration, loading it on first use and reloading the file if it changed."""
+        if cls._checked_at is None or (LIMITS_FILE and monotonic() - cls._checked_at >= LIMITS_RELOAD_INTERVAL):
+            cls.reload()
+
+        return cls._configuration
+
+    @classmethod
+    def reload(cls, *, force: bool = False) -> LimitsConfiguration:
+        """
+        Reload the limits configuration from its source.
+
+        Args:
+            force (bool): Whether to reload the file even if it hasn't changed.
+
+        Returns:
+            LimitsConfiguration: The configuration in use after reloading.
+
+        """
+        with cls._lock:
+            cls._checked_at = monotonic()
+            try:
+                if LIMITS_FILE:
+                    modified_at = Path(LIMITS_FILE).stat().st_mtime
+                    if not force and modified_at == cls._modified_at:
+                        return cls._configuration
+
+                    # NOTE: Track the version even if it fails to load so it is only reported once
+                    cls._modified_at = modified_at
+                    content = Path(LIMITS_FILE).read_text(encoding="utf-8")
+
+                elif LIMITS:
+                    content = LIMITS
+
+                else:
+                    return cls._configuration
+
+                cls._load(json.loads(content))
+
+            except (OSError, ValueError, ValidationError):
+                logger.exception("Couldn't load the limits configuration, keeping the previous one")
+
+        return cls._configuration
+
+    @classmethod
+    def _load(cls, data: dict) -> None:
+        """Replace the configuration, keeping the environment defaults for the resources it leaves out."""
+        configuration = LimitsConfiguration.model_validate(data)
+        configuration.default = {FILTERS: MAX_FILTERS, ChannelType.WEBHOOK: MAX_WEBHOOKS, **configuration.default}
+        cls._configuration = configuration
+        cls._limits_by_user = OrderedDict()
+        logger.info("Loaded the limits configuration")
+
+    @classmethod
+    def resolve(cls, id_user: str) -> Limits:
+        """
+        Resolve the limits of a user, layering their own limits over their plan and the default ones.
+
+        Args:
+            id_user (str): The ID of the user.
+
+        Returns:
+            Limits: The limit of every limited resource.
+
+        """
+        cls.configuration()
+        with cls._lock:
+            # NOTE: Read under the lock, so the limits are never cached after a reload replaced their configuration
+            configuration = cls._configuration
+            if (limits := cls._limits_by_user.get(id_user)) is not None:
+                cls._limits_by_user.move_to_end(id_user)
+                return limits
+
+            match tier := configuration.users.get(id_user):
+                case str():
+                    limits = {**configuration.default, **configuration.plans[tier]}
+                case dict():
+                    limits = {**configuration.default, **tier}
+                case _:
+                    limits = configuration.default
+
+            cls._limits_by_user[id_user] = limits
+            if len(cls._limits_by_user) > LIMITS_CACHE_SIZE:
+                cls._limits_by_user.popitem(last=False)
+            return limits
+
+    @classmethod
+    def check(cls, id_user: str, usage: dict[str, int]) -> None:
+        """
+        Check the usage of a user after a change is within their limits, in a single pass over the precomputed usage.
+
+        Args:
+            id_user (str): The ID of the user.
+            usage (dict[str, int]): The resulting amount of each resource being added, counted once for the change.
+
+        Raises:
+            HTTPException: When a limit is exceeded (409)
+
+        """
+        limits = cls.resolve(id_user)
+        for resource, amount in usage.items():
+            if (limit := limits.get(resource)) is not None and amount > limit:
+                name = resource if resource in {FILTERS, EVENTS} else f"{resource.lower()} channels"
+                raise HTTPException(HTTPStatus.CONFLICT, detail=f"Max amount of {name} reached")
+
+    @staticmethod
+    def enabled_events(channel: ChannelConfiguration) -> int:
+        """Count the events enabled for a channel."""
+        if channel.enabled_events == ALL_EVENTS:
+            return len(PublicEvent) - len(channel.disabled_events)
+        return len(channel.enabled_events)
@@ -0,0 +1,110 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from logging import getLogger
+
+import ulid
+from cumplo_common.models.user import User
+from fastapi import BackgroundTasks
+
+from cumplo_tailor.controllers.users import UsersController
+from cumplo_tailor.database import ApiKeyPool, JobStatus, OnboardingJob, OnboardingJobs
+from cumplo_tailor.integrations import CloudCredentials
+from cumplo_tailor.utils.constants import API_KEY_POOL_WATERMARK
+from cumplo_tailor.utils.metrics import metrics
+
+logger = getLogger(__name__)
+
+
+class OnboardingController:
+    """Controller for the user onboarding pipeline."""
+
+    _refilling = asyncio.Lock()
+
+    @classmethod
+    async def onboard(
+        cls, payload: dict, background_tasks: BackgroundTasks, on_failure: Callable[[], Awaitable[None]] | None = None
+    ) -> User | OnboardingJob:
+        """
+        Create a user claiming a pre-provisioned API key from the pool.
+
+        The payload is validated before claiming the key, and the key is returned to the pool if the user can't be
+        created, so no key is lost.
+
+        When the pool is disabled the user is created synchronously. When it is empty, a job that provisions the key
+        live is scheduled in the background instead and returned so its status can be followed, calling `on_failure`
+        if it fails.
+
+        """
+        if not API_KEY_POOL_WATERMARK:
+            return await UsersController.create(payload)
+
+        UsersController.validate(payload)
+        background_tasks.add_task(cls.refill)
+        if pooled := await ApiKeyPool.claim():
+            metrics.increment("api_key_pool_hits")
+            try:
+                return await UsersController.create(payload, api_key=pooled.key)
+            except Exception:
+                logger.warning(f"Returning API key {pooled.name} to the pool after failing to create the user")
+                await ApiKeyPool.add(pooled.key, pooled.name)
+                raise
+
+        metrics.increment("api_key_pool_misses")
+        job = OnboardingJob(id=str(ulid.new()))
+        await OnboardingJobs.put(job)
+
+        background_tasks.add_task(cls.run, job, payload, on_failure)
+        return job
+
+    @staticmethod
+    async def run(job: OnboardingJob, payload: dict, on_failure: Callable[[], Awaitable[None]] | None = None) -> None:
+        """Run an onboarding job provisioning the user's API key live, calling `on_failure` if it fails."""
+        job.status = JobStatus.RUNNING
+        await OnboardingJobs.put(job)
+
+        try:
+            user = await UsersController.create(payload)
+        except Exception:
+            # NOTE: The job is public, so the details of the failure are only logged
+            logger.exception(f"Onboarding job {job.id} failed")
+            job.status, job.error = JobStatus.FAILED, "The user could not be created"
+            if on_failure:
+                await on_failure()
+        else:
+            logger.info(f"Onboarding job {job.id} created user {user.id}")
+            job.status, job.id_user = JobStatus.DONE, str(user.id)
+
+        await OnboardingJobs.put(job)
+
+    @classmethod
+    async def refill(cls) -> int:
+        """
+        Provision new API keys until the pool reaches its watermark.
+
+        Returns:
+            int: The amount of keys added to the pool.
+
+        """
+        if cls._refilling.locked():
+            return 0
+
+        async with cls._refilling:
+            if (missing := API_KEY_POOL_WATERMARK - await ApiKeyPool.count()) <= 0:
+                return 0
+
+            logger.info(f"Refilling the API key pool with {missing} keys")
+            names = [f"pool-{ulid.new()}" for _ in range(missing)]
+            provisions = (CloudCredentials.create_api_key(name) for name in names)
+            keys = await asyncio.gather(*provisions, return_exceptions=True)
+
+            added = 0
+            for name, key in zip(names, keys, strict=True):
+                if isinstance(key, BaseException):
+                    logger.error(f"Failed to provision API key {name}: {key}")
+                    continue
+
+                await ApiKeyPool.add(key, name)
+                added += 1
+
+            metrics.increment("api_key_pool_refills", added)
+            return added
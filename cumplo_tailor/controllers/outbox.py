@@ -0,0 +1,80 @@
+import asyncio
+from contextlib import suppress
+from logging import getLogger
+
+import ulid
+
+from cumplo_tailor.database import repository
+from cumplo_tailor.integrations import build_publisher
+from cumplo_tailor.utils.constants import OUTBOX_BATCH_SIZE, OUTBOX_LEASE_DURATION, OUTBOX_POLL_INTERVAL
+from cumplo_tailor.utils.metrics import Timer, metrics
+
+logger = getLogger(__name__)
+
+
+class OutboxController:
+    """
+    Controller relaying the change events of the outbox to the publisher.
+
+    Events are only removed from the outbox once delivered, so they are published at least once. The relay is woken up
+    after each write of this instance, and polls the outbox periodically for the events written by the others.
+
+    Only the instance holding the relay lease publishes, so the events of each user are published in order. The lease
+    is renewed on every relay and taken over by another instance once it expires after `OUTBOX_LEASE_DURATION`
+    seconds, which must be longer than the poll interval. A holder stalled past its lease may still publish a batch
+    again or out of order, which is why consumers must deduplicate the events by their `version`.
+    """
+
+    owner = str(ulid.new())
+    publisher = build_publisher()
+    _written = asyncio.Event()
+    _relaying = asyncio.Lock()
+
+    @classmethod
+    def notify(cls) -> None:
+        """Wake up the relay after appending events to the outbox."""
+        cls._written.set()
+
+    @classmethod
+    async def relay(cls, limit: int = OUTBOX_BATCH_SIZE) -> int:
+        """
+        Publish the oldest pending events and remove the delivered ones from the outbox, if holding the relay lease.
+
+        Returns:
+            int: The amount of delivered events.
+
+        """
+        async with cls._relaying:
+            if not await repository.client.outbox.lease(cls.owner, OUTBOX_LEASE_DURATION):
+                logger.debug("The outbox is relayed by another instance")
+                return 0
+
+            if not (events := await repository.client.outbox.pending(limit)):
+                return 0
+
+            with Timer("outbox_publish"):
+                delivered = await cls.publisher.publish(events)
+
+            await repository.client.outbox.ack(delivered)
+
+        metrics.increment("outbox_events_delivered", len(delivered))
+        if failed := len(events) - len(delivered):
+            metrics.increment("outbox_events_failed", failed)
+            logger.warning(f"Failed to deliver {failed} of {len(events)} change events, they will be retried")
+
+        return len(delivered)
+
+    @classmethod
+    async def run(cls) -> None:
+        """Relay the events until cancelled, waiting for new writes or the poll interval once the outbox is drained."""
+        while True:
+            cls._written.clear()
+            try:
+                delivered = await cls.relay()
+            except Exception:
+                logger.exception("Failed to relay the outbox")
+                delivered = 0
+
+            if delivered < OUTBOX_BATCH_SIZE:
+                with suppress(TimeoutError):
+                    await asyncio.wait_for(cls._written.wait(), OUTBOX_POLL_INTERVAL)
@@ -0,0 +1,105 @@
+from collections.abc import Iterable
+from logging import getLogger
+
+from cumplo_common.models.channel import ALL_EVENTS, ChannelConfiguration, PublicEvent
+from cumplo_common.models.user import User
+
+from cumplo_tailor.database import EventRoute, repository
+from cumplo_tailor.utils.constants import USERS_PAGE_SIZE
+from cumplo_tailor.utils.metrics import metrics
+
+logger = getLogger(__name__)
+
+
+class RoutesController:
+    """
+    Controller for the event routes, the inverted index of the channels subscribed to each event.
+
+    The routes are synced after the user is written, so a failure to sync them never fails the request. Failures are
+    logged and counted instead, and fixed by rebuilding the index. The user is read back before syncing, so a sync
+    racing with a later write of the same user never leaves routes older than that write's own sync.
+    """
+
+    @staticmethod
+    def events(channel: ChannelConfiguration) -> set[PublicEvent]:
+        """Get the events the channel is subscribed to."""
+        if not channel.enabled:
+            return set()
+
+        if channel.enabled_events == ALL_EVENTS:
+            return set(PublicEvent) - channel.disabled_events
+        return set(channel.enabled_events)
+
+    @classmethod
+    def routes(cls, user: User, id_channels: Iterable[str] | None = None) -> list[EventRoute]:
+        """Get the routes of the given channels of the user, or of all of them."""
+        id_channels = user.channels.keys() if id_channels is None else id_channels
+        return [
+            EventRoute(event=event, id_user=str(user.id), id_channel=id_channel, channel_type=channel.type_)
+            for id_channel in id_channels
+            if (channel := user.channels.get(id_channel))
+            for event in cls.events(channel)
+        ]
+
+    @classmethod
+    async def sync(cls, id_user: str, id_channels: Iterable[str] | None = None) -> None:
+        """
+        Update the routes of the given channels of the stored user, which may have been deleted.
+
+        Args:
+            id_user (str): The ID of the user owning the channels.
+            id_channels (Iterable[str] | None): The touched channels. Defaults to every channel of the user, also
+                removing the routes of the channels it no longer has.
+
+        """
+        id_channels = None if id_channels is None else set(id_channels)
+        if id_channels is not None and not id_channels:
+            return
+
+        try:
+            try:
+                routes = cls.routes(await repository.client.users.get(id_user), id_channels)
+            except KeyError:
+                # NOTE: The user was deleted or disabled meanwhile, so none of its channels are routed anymore
+                routes = []
+            await repository.client.routes.sync(id_user, routes, id_channels)
+        except Exception:
+            metrics.increment("event_route_sync_failures")
+            logger.exception(f"Failed to sync the event routes of user {id_user}")
+
+    @staticmethod
+    async def remove(id_user: str) -> None:
+        """Remove every route of the user, such as when it is disabled or deleted."""
+        try:
+            await repository.client.routes.sync(id_user, [])
+        except Exception:
+            metrics.increment("event_route_sync_failures")
+            logger.exception(f"Failed to remove the event routes of user {id_user}")
+
+    @classmethod
+    async def rebuild(cls) -> int:
+        """
+        Rebuild the whole index from the active users.
+
+        The routes of each user are synced in place, so the index keeps serving while it is rebuilt, and the routes
+        of the users that no longer exist are removed last.
+
+        Returns:
+            int: The amount of routes of the active users.
+
+        """
+        logger.info("Rebuilding the event routes")
+        stale = await repository.client.routes.users()
+
+        count = 0
+        async for user in repository.client.users.stream(USERS_PAGE_SIZE):
+            routes = cls.routes(user)
+            await repository.client.routes.sync(str(user.id), routes)
+            stale.discard(str(user.id))
+            count += len(routes)
+
+        for id_user in stale:
+            await repository.client.routes.sync(id_user, [])
+
+        logger.info(f"Rebuilt {count} event routes, removing the ones of {len(stale)} missing users")
+        return count
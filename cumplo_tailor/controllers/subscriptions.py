@@ -0,0 +1,212 @@
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from enum import StrEnum
+from http import HTTPStatus
+from itertools import starmap
+from logging import getLogger
+
+from fastapi import BackgroundTasks
+from fastapi.exceptions import HTTPException
+
+from cumplo_tailor.controllers.onboarding import OnboardingController
+from cumplo_tailor.database import GmailHistoryState, OnboardingJob, SubscriptionMarkers, repository
+from cumplo_tailor.integrations import GmailHistory
+from cumplo_tailor.utils.constants import (
+    PATTERN_BY_SENDER,
+    SUBSCRIPTION_DEDUP_SIZE,
+    SUBSCRIPTION_DEDUP_TTL,
+    SUBSCRIPTION_MARKERS,
+    SUBSCRIPTION_SYNC_CONCURRENCY,
+)
+from cumplo_tailor.utils.deduplication import DeduplicationWindow
+from cumplo_tailor.utils.metrics import metrics
+from cumplo_tailor.utils.senders import SenderMatcher
+
+logger = getLogger(__name__)
+
+
+class SyncMode(StrEnum):
+    """How subscription notifications are processed."""
+
+    MESSAGE = "message"
+    HISTORY = "history"
+
+
+class SubscriptionsController:
+    """Controller for the Gmail subscriptions."""
+
+    window = DeduplicationWindow(size=SUBSCRIPTION_DEDUP_SIZE, ttl=SUBSCRIPTION_DEDUP_TTL)
+    matcher = SenderMatcher(PATTERN_BY_SENDER)
+
+    @classmethod
+    async def claim(cls, key: str) -> bool:
+        """
+        Claim the processing of a key, first in memory and then, if enabled, with a persistent marker.
+
+        When the persistent marker can't be claimed, such as on a transient Firestore error, the key is removed from
+        memory again so a redelivery isn't dropped as a duplicate.
+
+        Returns:
+            bool: Whether the key was claimed, i.e. it is not a duplicate.
+
+        """
+        if not cls.window.add(key):
+            metrics.increment("subscription_duplicates")
+            return False
+
+        if not SUBSCRIPTION_MARKERS:
+            return True
+
+        try:
+            claimed = await SubscriptionMarkers.claim(key)
+        except Exception:
+            cls.window.discard(key)
+            raise
+
+        if not claimed:
+            metrics.increment("subscription_duplicates")
+        return claimed
+
+    @classmethod
+    async def release(cls, key: str) -> None:
+        """Release a claimed key so a redelivery can process it again."""
+        cls.window.discard(key)
+        if SUBSCRIPTION_MARKERS:
+            await SubscriptionMarkers.release(key)
+
+    @classmethod
+    @asynccontextmanager
+    async def claiming(cls, key: str) -> AsyncIterator[bool]:
+        """
+        Claim a key for the duration of the block, releasing it if the processing fails.
+
+        Yields:
+            bool: Whether the key was claimed, i.e. it is not a duplicate.
+
+        Raises:
+            HTTPException: Re-raised from the block, releasing the key on server errors.
+
+        """
+        claimed = False
+        try:
+            claimed = await cls.claim(key)
+            yield claimed
+        except HTTPException as error:
+            if claimed and error.status_code >= HTTPStatus.INTERNAL_SERVER_ERROR:
+                await cls.release(key)
+            raise
+        except BaseException:
+            if claimed:
+                await cls.release(key)
+            raise
+
+    @classmethod
+    def parse(cls, message: dict) -> tuple[str, str] | None:
+        """
+        Extract the name and email of the subscriber from a subscription message.
+
+        Returns:
+            tuple[str, str] | None: The name and email of the subscriber or None if the message doesn't match.
+
+        """
+        if not (sender := message.get("sender")):
+            logger.warning(f"Sender not found for message {message.get('id')}")
+            return None
+
+        if not (pattern := cls.matcher.find(sender)):
+            logger.warning(f"Unknown sender for sender {sender}")
+            return None
+
+        if not (subscriber := pattern.extract(message.get("snippet", ""))):
+            logger.warning(f"Pattern not found for sender {sender}")
+            return None
+
+        name, email = subscriber
+        logger.info(f"Extracted {name=} and {email=} from subscription notification")
+        return name, email
+
+    @classmethod
+    async def subscribe(cls, name: str, email: str, background_tasks: BackgroundTasks) -> None:
+        """
+        Onboard the subscriber unless it is already subscribed or being onboarded.
+
+        The claim of the email is kept while an onboarding job is pending, and released if the job fails so the
+        subscriber can be onboarded again.
+
+        """
+        key = f"email:{email.casefold()}"
+        async with cls.claiming(key) as claimed:
+            if not claimed:
+                return logger.info(f"Skipping duplicate onboarding for {email=}")
+
+            try:
+                user = await repository.client.users.get(email=email)
+            except KeyError:
+                pass
+            else:
+                return logger.info(f"User {user.id} already subscribed with {email=}")
+
+            payload = {"email": email, "name": name}
+            result = await OnboardingController.onboard(payload, background_tasks, on_failure=lambda: cls.release(key))
+            if isinstance(result, OnboardingJob):
+                return logger.info(f"Scheduled onboarding job {result.id} for {email=}")
+
+            return logger.info(f"Created user {result.id} with {email=}")
+
+    @classmethod
+    async def process_latest(cls, background_tasks: BackgroundTasks) -> None:
+        """Onboard the subscriber of the latest message of the label, reading it off the event loop."""
+        from cumplo_common.integrations.gmail import Gmail  # noqa: PLC0415
+
+        if not (message := await asyncio.to_thread(Gmail.get_message)):
+            return logger.warning("Message not found")
+
+        if not (subscriber := cls.parse(message)):
+            return None
+
+        name, email = subscriber
+        return await cls.subscribe(name, email, background_tasks)
+
+    @classmethod
+    async def sync(cls, history_id: int, background_tasks: BackgroundTasks) -> None:
+        """
+        Process every message added since the last processed history ID, onboarding their subscribers concurrently.
+
+        When no history was processed yet, or the processed one has expired in Gmail, the latest message is processed
+        instead before the notified history ID becomes the starting point, so the notification isn't lost.
+
+        Raises:
+            HTTPException: If some subscribers could not be onboarded (502)
+
+        """
+        start_history_id = await GmailHistoryState.get()
+        if start_history_id is None or (listed := await GmailHistory.list_messages(start_history_id)) is None:
+            logger.warning(f"No Gmail history to sync from {start_history_id}, processing the latest message")
+            await cls.process_latest(background_tasks)
+            return await GmailHistoryState.advance(history_id)
+
+        ids, latest = listed
+        messages = await GmailHistory.get_messages(ids)
+        metrics.increment("subscription_sync_messages", len(messages))
+
+        subscribers: dict[str, tuple[str, str]] = {}
+        for message in messages:
+            if parsed := cls.parse(message):
+                subscribers.setdefault(parsed[1].casefold(), parsed)
+
+        semaphore = asyncio.Semaphore(SUBSCRIPTION_SYNC_CONCURRENCY)
+
+        async def subscribe(name: str, email: str) -> None:
+            async with semaphore:
+                await cls.subscribe(name, email, background_tasks)
+
+        subscriptions = starmap(subscribe, subscribers.values())
+        results = await asyncio.gather(*subscriptions, return_exceptions=True)
+        if errors := [result for result in results if isinstance(result, BaseException)]:
+            # NOTE: Keep the history where it was so the redelivery retries the failed subscribers
+            logger.error(f"Failed to onboard {len(errors)} subscribers: {errors}")
+            raise HTTPException(HTTPStatus.BAD_GATEWAY, detail="Failed to onboard some subscribers")
+
+        await GmailHistoryState.advance(max(latest, history_id))
+        return None
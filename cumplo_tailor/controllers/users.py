@@ -1,19 +1,275 @@
+import asyncio
+import random
+from collections.abc import Awaitable, Callable, Iterable
+from http import HTTPStatus
+from logging import getLogger
+
 import ulid
-from cumplo_common.database import firestore
 from cumplo_common.models.user import User
+from fastapi.exceptions import HTTPException
+from google.api_core.exceptions import FailedPrecondition, NotFound
 
+from cumplo_tailor.controllers.outbox import OutboxController
+from cumplo_tailor.controllers.routes import RoutesController
+from cumplo_tailor.database import ChangeEvent, Operation, UserChanges, repository
+from cumplo_tailor.database.cache import cache
 from cumplo_tailor.integrations import CloudCredentials
+from cumplo_tailor.utils.constants import MAX_MUTATION_RETRIES, MUTATION_RETRY_DELAY, OPTIMISTIC_CONCURRENCY
+from cumplo_tailor.utils.metrics import metrics
+
+logger = getLogger(__name__)
+
+type Mutation = Callable[[User], UserChanges]
 
 
 class UsersController:
-    """Controller for the users."""
+    """
+    Controller for the users.
+
+    Every write of an active user appends its change event to the outbox, from which it is relayed to the consumers.
+    """
+
+    @classmethod
+    async def get(cls, id_user: str | None = None, api_key: str | None = None) -> User:
+        """
+        Get a user by its ID or API key, serving it from the cache when possible.
+
+        Like the repository, it raises `KeyError` if the user does not exist and `ValueError` if its data is empty.
+        """
+        user, _ = await cls.lookup(id_user=id_user, api_key=api_key)
+        return user
+
+    @staticmethod
+    async def lookup(id_user: str | None = None, api_key: str | None = None) -> tuple[User, int | None]:
+        """
+        Get a user by its ID or API key along with its cache version, serving it from the cache when possible.
+
+        Like the repository, it raises `KeyError` if the user does not exist and `ValueError` if its data is empty.
+
+        Returns:
+            tuple[User, int | None]: The user and its version, which is None when the cache is disabled.
+
+        """
+        if entry := cache.lookup(id_user=id_user, api_key=api_key):
+            return entry.user, entry.version
+
+        if api_key:
+            user = await repository.client.users.get(api_key=api_key)
+        else:
+            user = await repository.client.users.get(id_user)
+
+        return user, cache.put(user)
 
     @staticmethod
-    async def create(payload: dict) -> User:
-        """Create a new user."""
+    def validate(payload: dict) -> None:
+        """Validate the payload of a new user before an API key is spent on it, raising `ValidationError` if invalid."""
+        # NOTE: The ID and the API key are assigned on creation, so placeholders are validated instead
+        User.model_validate({**payload, "id": ulid.new(), "api_key": ""})
+
+    @classmethod
+    async def create(cls, payload: dict, api_key: str | None = None) -> User:
+        """Create a new user, provisioning a new API key unless one is given."""
+        cls.validate(payload)
         id_user = ulid.new()
-        api_key = await CloudCredentials.create_api_key(str(id_user))
+        api_key = api_key or await CloudCredentials.create_api_key(str(id_user))
         user = User.model_validate({**payload, "id": id_user, "api_key": api_key})
 
-        firestore.client.users.create(user)
+        await repository.client.users.create(user, ChangeEvent.build(str(user.id), Operation.CREATED))
+        OutboxController.notify()
+        cache.put(user)
+        await RoutesController.sync(str(user.id))
         return user
+
+    @classmethod
+    async def delete(cls, user: User) -> None:
+        """Delete a user, as stored when it is deleted rather than as it was read."""
+        id_user = str(user.id)
+        await cls._write(id_user, lambda: repository.client.users.delete_many([id_user], operation=Operation.DELETED))
+        OutboxController.notify()
+        cache.delete(user)
+        await RoutesController.remove(id_user)
+
+    @classmethod
+    async def disable(cls, user: User) -> None:
+        """Disable a user by moving it atomically to the disabled collection."""
+        id_user, users, disabled = str(user.id), repository.client.users, repository.client.disabled
+        await cls._write(id_user, lambda: users.move_many([id_user], target=disabled, operation=Operation.DISABLED))
+        OutboxController.notify()
+        cache.delete(user)
+        await RoutesController.remove(id_user)
+
+    @classmethod
+    async def enable(cls, user: User) -> None:
+        """Enable a user by moving it atomically back from the disabled collection."""
+        id_user, users, disabled = str(user.id), repository.client.users, repository.client.disabled
+        await cls._write(id_user, lambda: disabled.move_many([id_user], target=users, operation=Operation.ENABLED))
+        OutboxController.notify()
+        cache.discard(id_user)
+        await RoutesController.sync(id_user)
+
+    @staticmethod
+    async def disable_many(ids: Iterable[str]) -> dict[str, HTTPStatus]:
+        """Disable many users, moving each one atomically to the disabled collection."""
+        disabled = repository.client.disabled
+        results = await repository.client.users.move_many(ids, target=disabled, operation=Operation.DISABLED)
+        OutboxController.notify()
+        for id_user, status in results.items():
+            cache.discard(id_user)
+            if status == HTTPStatus.OK:
+                await RoutesController.remove(id_user)
+        return results
+
+    @classmethod
+    async def enable_many(cls, ids: Iterable[str]) -> dict[str, HTTPStatus]:
+        """Enable many users, moving each one atomically back from the disabled collection."""
+        users = repository.client.users
+        results = await repository.client.disabled.move_many(ids, target=users, operation=Operation.ENABLED)
+        OutboxController.notify()
+        for id_user, status in results.items():
+            cache.discard(id_user)
+            if status == HTTPStatus.OK:
+                await RoutesController.sync(id_user)
+        return results
+
+    @staticmethod
+    async def delete_many(ids: Iterable[str]) -> dict[str, HTTPStatus]:
+        """Delete many users."""
+        results = await repository.client.users.delete_many(ids, operation=Operation.DELETED)
+        OutboxController.notify()
+        for id_user, status in results.items():
+            cache.discard(id_user)
+            if status == HTTPStatus.OK:
+                await RoutesController.remove(id_user)
+        return results
+
+    @classmethod
+    async def update_many(cls, payloads: dict[str, dict]) -> dict[str, HTTPStatus]:
+        """Patch many users, each one with its own payload."""
+        results = await repository.client.users.patch_many(payloads, operation=Operation.UPDATED)
+        OutboxController.notify()
+        for id_user, status in results.items():
+            cache.discard(id_user)
+            if status == HTTPStatus.OK and "channels" in payloads[id_user]:
+                await RoutesController.sync(id_user)
+        return results
+
+    @staticmethod
+    async def update(user: User, changes: UserChanges | None = None) -> None:
+        """
+        Persist the user, writing only the touched paths when they are known.
+
+        Args:
+            user (User): The user to persist.
+            changes (UserChanges | None): The paths touched during the request. Falls back to a full write when missing.
+
+        Raises:
+            HTTPException: If the paths are known but the user no longer exists, so it isn't recreated (404)
+
+        """
+        event = ChangeEvent.build(str(user.id), Operation.UPDATED, changes)
+        if not changes:
+            await repository.client.users.put(user, event)
+            OutboxController.notify()
+            cache.put(user)
+            await RoutesController.sync(str(user.id))
+            return
+
+        try:
+            await repository.client.users.update(user, changes, event=event)
+        except NotFound:
+            logger.warning(f"User {user.id} document not found, it was deleted or disabled meanwhile")
+            cache.discard(str(user.id))
+            raise HTTPException(HTTPStatus.NOT_FOUND)  # noqa: B904
+
+        OutboxController.notify()
+        cache.put(user)
+        await RoutesController.sync(str(user.id), changes.channels)
+
+    @classmethod
+    async def mutate(cls, user: User, mutation: Mutation) -> User:
+        """
+        Apply the mutation to the user and persist the paths it touched.
+
+        When optimistic concurrency is enabled, the mutation is applied to a freshly read copy of the user and the
+        write is conditioned on its version. On conflicts the mutation is re-applied to a new copy, after a jittered
+        exponential delay so concurrent writers of the same user spread out instead of colliding again.
+
+        Args:
+            user (User): The user to mutate.
+            mutation (Mutation): Applies the changes in place and returns the touched paths. May raise HTTPExceptions.
+
+        Raises:
+            HTTPException: If the user no longer exists (404)
+            HTTPException: If the retries are exhausted due to concurrent modifications (409)
+
+        Returns:
+            User: The mutated user.
+
+        """
+        if not OPTIMISTIC_CONCURRENCY:
+            if changes := mutation(user):
+                await cls.update(user, changes)
+            return user
+
+        for attempt in range(MAX_MUTATION_RETRIES + 1):
+            try:
+                user, version = await repository.client.users.get_versioned(str(user.id))
+            except KeyError:
+                raise HTTPException(HTTPStatus.NOT_FOUND)  # noqa: B904
+
+            if not (changes := mutation(user)):
+                return user
+
+            event = ChangeEvent.build(str(user.id), Operation.UPDATED, changes)
+            try:
+                await repository.client.users.update(user, changes, version=version, event=event)
+            except FailedPrecondition:
+                await cls._back_off(str(user.id), attempt)
+                continue
+
+            if attempt:
+                metrics.increment("user_mutation_retries", attempt)
+
+            OutboxController.notify()
+            cache.put(user)
+            await RoutesController.sync(str(user.id), changes.channels)
+            return user
+
+        metrics.increment("user_mutation_exhausted")
+        raise HTTPException(HTTPStatus.CONFLICT, detail="The user was modified concurrently, please retry")
+
+    @classmethod
+    async def _write(cls, id_user: str, write: Callable[[], Awaitable[dict[str, HTTPStatus]]]) -> None:
+        """
+        Run a batched write of a single user, retrying it while it conflicts with concurrent modifications.
+
+        Batched writes read the document and condition the write on its version, so every attempt acts on the latest
+        stored user.
+
+        Raises:
+            HTTPException: If the user does not exist (404)
+            HTTPException: If the retries are exhausted due to concurrent modifications (409)
+
+        """
+        for attempt in range(MAX_MUTATION_RETRIES + 1):
+            match (await write()).get(id_user):
+                case HTTPStatus.NOT_FOUND:
+                    raise HTTPException(HTTPStatus.NOT_FOUND)
+                case HTTPStatus.CONFLICT:
+                    await cls._back_off(id_user, attempt)
+                    continue
+
+            if attempt:
+                metrics.increment("user_mutation_retries", attempt)
+            return
+
+        metrics.increment("user_mutation_exhausted")
+        raise HTTPException(HTTPStatus.CONFLICT, detail="The user was modified concurrently, please retry")
+
+    @staticmethod
+    async def _back_off(id_user: str, attempt: int) -> None:
+        """Record a conflicting write of the user and wait a jittered exponential delay if it will be retried."""
+        metrics.increment("user_mutation_conflicts")
+        logger.warning(f"Concurrent modification of user {id_user} (attempt {attempt + 1})")
+        if attempt < MAX_MUTATION_RETRIES:
+            await asyncio.sleep(random.uniform(0, MUTATION_RETRY_DELAY * 2**attempt))  # noqa: S311
@@ -0,0 +1,27 @@
+from . import repository
+from .changes import UserChanges
+from .history import GmailHistoryState
+from .jobs import JobStatus, OnboardingJob, OnboardingJobs
+from .keys import ApiKeyPool
+from .markers import SubscriptionMarkers
+from .outbox import ChangeEvent, Operation, Resource
+from .repository import EventRoute, OutboxRepository, RouteRepository, UserRepository, VersionedUser
+
+__all__ = [
+    "ApiKeyPool",
+    "ChangeEvent",
+    "EventRoute",
+    "GmailHistoryState",
+    "JobStatus",
+    "OnboardingJob",
+    "OnboardingJobs",
+    "Operation",
+    "OutboxRepository",
+    "Resource",
+    "RouteRepository",
+    "SubscriptionMarkers",
+    "UserChanges",
+    "UserRepository",
+    "VersionedUser",
+    "repository",
+]
@@ -0,0 +1,156 @@
+from collections.abc import Callable, Iterable
+from http import HTTPStatus
+from itertools import batched
+from logging import getLogger
+
+from cumplo_common.models.user import User
+from google.api_core.exceptions import FailedPrecondition
+from google.cloud.firestore import AsyncClient
+from google.cloud.firestore_v1 import SERVER_TIMESTAMP, AsyncCollectionReference, AsyncWriteBatch, DocumentSnapshot
+from google.cloud.firestore_v1 import Client as FirestoreClient
+from pydantic import ValidationError
+
+from cumplo_tailor.database.changes import UserChanges
+from cumplo_tailor.database.outbox import ChangeEvent, Operation
+from cumplo_tailor.utils.constants import FIRESTORE_BATCH_LIMIT
+from cumplo_tailor.utils.patch import merge_patch
+
+logger = getLogger(__name__)
+
+type Write = Callable[[AsyncWriteBatch], None]
+type Prepare = Callable[[DocumentSnapshot], Write]
+
+
+class UserBatches:
+    """
+    Bulk operations over user documents using chunked batched writes.
+
+    Every write is conditioned on the update time of the document read for it, so a document modified in the meantime
+    makes its batch fail. Failed batches are then retried one document at a time to isolate the conflicting ones.
+
+    When an operation is given, the change event of each document is appended to the outbox in the same batch.
+    """
+
+    def __init__(self, client: AsyncClient, outbox: AsyncCollectionReference) -> None:
+        self.client = client
+        self.outbox = outbox
+
+    def append(self, batch: AsyncWriteBatch, event: ChangeEvent | None) -> None:
+        """Append the change event to the outbox within the batch, versioned with the commit time of the batch."""
+        if event:
+            document = {**event.model_dump(exclude={"id", "version"}), "version": SERVER_TIMESTAMP}
+            batch.set(self.outbox.document(event.id), document)
+
+    async def move(
+        self,
+        ids: Iterable[str],
+        source: AsyncCollectionReference,
+        target: AsyncCollectionReference,
+        operation: Operation | None = None,
+    ) -> dict[str, HTTPStatus]:
+        """Atomically move each document from the source collection to the target collection."""
+
+        def prepare(snapshot: DocumentSnapshot) -> Write:
+            event = ChangeEvent.build(snapshot.id, operation) if operation else None
+
+            def write(batch: AsyncWriteBatch) -> None:
+                batch.set(target.document(snapshot.id), snapshot.to_dict() or {})
+                batch.delete(snapshot.reference, option=_precondition(snapshot))
+                self.append(batch, event)
+
+            return write
+
+        return await self._apply(source, ids, prepare, size=FIRESTORE_BATCH_LIMIT // 3)
+
+    async def delete(
+        self, ids: Iterable[str], collection: AsyncCollectionReference, operation: Operation | None = None
+    ) -> dict[str, HTTPStatus]:
+        """Delete each document of the collection."""
+
+        def prepare(snapshot: DocumentSnapshot) -> Write:
+            event = ChangeEvent.build(snapshot.id, operation) if operation else None
+
+            def write(batch: AsyncWriteBatch) -> None:
+                batch.delete(snapshot.reference, option=_precondition(snapshot))
+                self.append(batch, event)
+
+            return write
+
+        return await self._apply(collection, ids, prepare, size=FIRESTORE_BATCH_LIMIT // 2)
+
+    async def patch(
+        self, payloads: dict[str, dict], collection: AsyncCollectionReference, operation: Operation | None = None
+    ) -> dict[str, HTTPStatus]:
+        """Merge patch each user with its payload, validating and writing only the changed fields."""
+
+        def prepare(snapshot: DocumentSnapshot) -> Write:
+            user = User.model_validate({**(snapshot.to_dict() or {}), "id": snapshot.id})
+            new_user, paths = merge_patch(user, payloads[snapshot.id], exclude={"id", "api_key"})
+            if not paths:
+                return lambda _batch: None
+
+            changes = UserChanges.from_paths(paths)
+            fields = changes.fields(new_user)
+            event = ChangeEvent.build(snapshot.id, operation, changes) if operation else None
+
+            def write(batch: AsyncWriteBatch) -> None:
+                batch.update(snapshot.reference, fields, option=_precondition(snapshot))
+                self.append(batch, event)
+
+            return write
+
+        return await self._apply(collection, payloads, prepare, size=FIRESTORE_BATCH_LIMIT // 2)
+
+    async def _apply(
+        self, collection: AsyncCollectionReference, ids: Iterable[str], prepare: Prepare, size: int
+    ) -> dict[str, HTTPStatus]:
+        """
+        Read the documents in chunks and commit the writes prepared for the existing ones.
+
+        Returns:
+            dict[str, HTTPStatus]: The result of each document ID.
+
+        """
+        results: dict[str, HTTPStatus] = {}
+        for chunk in batched(dict.fromkeys(ids), size):
+            writes: dict[str, Write] = {}
+            async for snapshot in self.client.get_all([collection.document(id_document) for id_document in chunk]):
+                if not snapshot.exists:
+                    results[snapshot.id] = HTTPStatus.NOT_FOUND
+                    continue
+
+                try:
+                    writes[snapshot.id] = prepare(snapshot)
+                except ValidationError:
+                    results[snapshot.id] = HTTPStatus.UNPROCESSABLE_ENTITY
+
+            results.update(await self._commit(writes))
+        return results
+
+    async def _commit(self, writes: dict[str, Write]) -> dict[str, HTTPStatus]:
+        """Commit the writes in a single batch, isolating the conflicting documents when it fails."""
+        if not writes:
+            return {}
+
+        batch = self.client.batch()
+        for write in writes.values():
+            write(batch)
+
+        try:
+            await batch.commit()
+        except FailedPrecondition:
+            if len(writes) == 1:
+                return dict.fromkeys(writes, HTTPStatus.CONFLICT)
+
+            logger.warning(f"Batch of {len(writes)} user documents conflicted, retrying them one by one")
+            results: dict[str, HTTPStatus] = {}
+            for key, write in writes.items():
+                results.update(await self._commit({key: write}))
+            return results
+
+        return dict.fromkeys(writes, HTTPStatus.OK)
+
+
+def _precondition(snapshot: DocumentSnapshot) -> object:
+    """Build a write option conditioning the write on the document not being updated since it was read."""
+    return FirestoreClient.write_option(last_update_time=snapshot.update_time)
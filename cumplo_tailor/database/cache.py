@@ -0,0 +1,123 @@
+from collections import OrderedDict
+from itertools import count
+from threading import Lock
+from time import monotonic
+from typing import NamedTuple
+
+from cumplo_common.models.user import User
+
+from cumplo_tailor.utils.constants import USER_CACHE_SIZE, USER_CACHE_TTL
+from cumplo_tailor.utils.metrics import metrics
+
+
+class CacheEntry(NamedTuple):
+    """A cached user along with its expiration time and version."""
+
+    expires_at: float
+    user: User
+    version: int
+
+
+class UserCache:
+    """
+    Size-bounded LRU cache of users with a time-to-live, keyed by user ID and by API key.
+
+    The cache is local to the process, so writes made by other workers are only seen once the entries expire.
+    Users are copied on the way in and out so requests never share mutable state. Every stored user gets a new
+    version, unique within the process, so anything derived from a cached user can be cached along with it.
+    """
+
+    def __init__(self, size: int, ttl: float) -> None:
+        self.size = size
+        self.ttl = ttl
+        self._lock = Lock()
+        self._users: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._ids_by_api_key: dict[str, str] = {}
+        self._versions = count(1)
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the cache is enabled."""
+        return self.size > 0
+
+    def get(self, id_user: str | None = None, api_key: str | None = None) -> User | None:
+        """
+        Get a cached user by its ID or API key.
+
+        Returns:
+            User | None: A copy of the cached user or None if it is missing or expired.
+
+        """
+        entry = self.lookup(id_user=id_user, api_key=api_key)
+        return entry.user if entry else None
+
+    def lookup(self, id_user: str | None = None, api_key: str | None = None) -> CacheEntry | None:
+        """
+        Get a cached user along with its version by its ID or API key.
+
+        Returns:
+            CacheEntry | None: The entry holding a copy of the cached user or None if it is missing or expired.
+
+        """
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            if api_key is not None:
+                id_user = self._ids_by_api_key.get(api_key)
+
+            if not (id_user and (entry := self._users.get(id_user))):
+                metrics.increment("user_cache_misses")
+                return None
+
+            if entry.expires_at <= monotonic():
+                self._remove(id_user)
+                metrics.increment("user_cache_misses")
+                return None
+
+            self._users.move_to_end(id_user)
+
+        metrics.increment("user_cache_hits")
+        return entry._replace(user=entry.user.model_copy(deep=True))
+
+    def put(self, user: User) -> int | None:
+        """
+        Store a copy of the user, evicting the least recently used users when full.
+
+        Returns:
+            int | None: The version assigned to the stored user or None if the cache is disabled.
+
+        """
+        if not self.enabled:
+            return None
+
+        id_user, copy = str(user.id), user.model_copy(deep=True)
+        with self._lock:
+            self._remove(id_user)
+            version = next(self._versions)
+            self._users[id_user] = CacheEntry(monotonic() + self.ttl, copy, version)
+            self._ids_by_api_key[copy.api_key] = id_user
+
+            while len(self._users) > self.size:
+                _, evicted = self._users.popitem(last=False)
+                self._ids_by_api_key.pop(evicted.user.api_key, None)
+                metrics.increment("user_cache_evictions")
+
+        return version
+
+    def delete(self, user: User) -> None:
+        """Remove the user from the cache."""
+        self.discard(str(user.id))
+
+    def discard(self, id_user: str) -> None:
+        """Remove the user with the given ID from the cache."""
+        with self._lock:
+            self._remove(id_user)
+
+    def _remove(self, id_user: str) -> None:
+        """Remove the user entry and its API key index. Must be called holding the lock."""
+        if entry := self._users.pop(id_user, None):
+            self._ids_by_api_key.pop(entry.user.api_key, None)
+
+
+cache = UserCache(size=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
@@ -0,0 +1,67 @@
+from collections.abc import Iterable
+from typing import Any, Self
+
+from cumplo_common.models.user import User
+from pydantic import BaseModel, Field
+
+from cumplo_tailor.utils.patch import Path
+
+
+class UserChanges(BaseModel):
+    """Paths of a user document touched during a request."""
+
+    filters: set[str] = Field(default_factory=set)
+    channels: set[str] = Field(default_factory=set)
+    credentials: bool = Field(default=False)
+    attributes: set[str] = Field(default_factory=set)
+
+    def __bool__(self) -> bool:
+        return bool(self.filters or self.channels or self.credentials or self.attributes)
+
+    @classmethod
+    def from_paths(cls, paths: Iterable[Path]) -> Self:
+        """Build the changes from the paths changed on a user, such as the ones of a merge patch."""
+        changes = cls()
+        for field, *rest in paths:
+            match field:
+                case "filters" if rest:
+                    changes.filters.add(rest[0])
+                case "channels" if rest:
+                    changes.channels.add(rest[0])
+                case "credentials":
+                    changes.credentials = True
+                case _:
+                    changes.attributes.add(field)
+        return changes
+
+    def fields(self, user: User) -> dict[str, Any]:
+        """
+        Build the field-path update for the touched paths of the user.
+
+        Args:
+            user (User): The user holding the new values of the touched paths.
+
+        Returns:
+            dict[str, Any]: The touched field paths mapped to their new values (or to a delete sentinel).
+
+        """
+        from google.cloud.firestore_v1 import DELETE_FIELD  # noqa: PLC0415
+        from google.cloud.firestore_v1.field_path import FieldPath  # noqa: PLC0415
+
+        fields: dict[str, Any] = {}
+        for id_filter in self.filters:
+            filter_ = user.filters.get(id_filter)
+            fields[FieldPath("filters", id_filter).to_api_repr()] = filter_.json() if filter_ else DELETE_FIELD
+
+        for id_channel in self.channels:
+            channel = user.channels.get(id_channel)
+            fields[FieldPath("channels", id_channel).to_api_repr()] = channel.json() if channel else DELETE_FIELD
+
+        if self.credentials:
+            fields["credentials"] = user.credentials.json() if user.credentials else DELETE_FIELD
+
+        if self.attributes:
+            document = user.model_dump(mode="json", include=self.attributes, exclude_none=True)
+            fields.update({attribute: document.get(attribute, DELETE_FIELD) for attribute in self.attributes})
+
+        return fields
@@ -0,0 +1,38 @@
+from typing import TYPE_CHECKING
+
+from cumplo_tailor.utils.constants import DATABASE_BACKEND
+
+if TYPE_CHECKING:
+    from google.cloud.firestore import AsyncClient
+    from google.cloud.firestore_v1 import Client as FirestoreClient
+
+
+def firestore_client() -> "FirestoreClient":
+    """
+    Get the synchronous Firestore client shared with `cumplo_common`.
+
+    Importing its module initializes the Firebase app and builds the client, so it is only imported on first use.
+    """
+    from cumplo_common.database import firestore  # noqa: PLC0415
+
+    return firestore.client.client
+
+
+def async_firestore_client() -> "AsyncClient":
+    """
+    Get the asynchronous Firestore client shared with the user repository.
+
+    It is created on first use, so it is bound to the event loop serving the requests. The stores using it have no
+    other backend, so it refuses to be used when another database backend is selected.
+
+    Raises:
+        RuntimeError: When the database backend is not Firestore.
+
+    """
+    if DATABASE_BACKEND != "firestore":
+        message = f"This store is only available in Firestore, not in the {DATABASE_BACKEND} backend"
+        raise RuntimeError(message)
+
+    from cumplo_tailor.database import firestore  # noqa: PLC0415
+
+    return firestore.client.client
@@ -0,0 +1,307 @@
+import builtins
+from collections.abc import AsyncIterator, Iterable
+from datetime import datetime, timedelta
+from functools import cached_property
+from http import HTTPStatus
+from itertools import batched
+from logging import getLogger
+from typing import Self, override
+
+import arrow
+from cumplo_common.database import firestore
+from cumplo_common.models.channel import PublicEvent
+from cumplo_common.models.user import User
+from google.cloud.firestore import AsyncClient, async_transactional
+from google.cloud.firestore_v1 import (
+    AsyncCollectionReference,
+    AsyncDocumentReference,
+    AsyncTransaction,
+    DocumentSnapshot,
+)
+from google.cloud.firestore_v1 import Client as FirestoreClient
+from google.cloud.firestore_v1.base_query import FieldFilter
+from google.cloud.firestore_v1.field_path import FieldPath
+
+from cumplo_tailor.database.batches import UserBatches
+from cumplo_tailor.database.changes import UserChanges
+from cumplo_tailor.database.outbox import ChangeEvent, Operation
+from cumplo_tailor.database.repository import (
+    EventRoute,
+    OutboxRepository,
+    RouteRepository,
+    UserRepository,
+    VersionedUser,
+)
+from cumplo_tailor.utils.constants import (
+    EVENT_ROUTES_COLLECTION,
+    FIRESTORE_BATCH_LIMIT,
+    OUTBOX_COLLECTION,
+    OUTBOX_LEASES_COLLECTION,
+    PROJECT_ID,
+)
+from cumplo_tailor.utils.metrics import timed
+
+logger = getLogger(__name__)
+
+
+def to_user(snapshot: DocumentSnapshot) -> User:
+    """Build a user from its document snapshot."""
+    return User.model_validate({**(snapshot.to_dict() or {}), "id": snapshot.id})
+
+
+@async_transactional
+async def _lease(transaction: AsyncTransaction, document: AsyncDocumentReference, owner: str, duration: float) -> bool:
+    """Take the lease within the transaction unless another owner holds an unexpired one."""
+    now = arrow.utcnow().datetime
+    snapshot = await document.get(transaction=transaction)
+    if snapshot.exists and snapshot.get("owner") != owner and snapshot.get("expires_at") > now:
+        return False
+
+    transaction.set(document, {"owner": owner, "expires_at": now + timedelta(seconds=duration)})
+    return True
+
+
+class AsyncUserCollection(UserRepository):
+    """Asynchronous access to a collection of user documents, with the same shape as the `cumplo_common` one."""
+
+    def __init__(self, client: AsyncClient, name: str) -> None:
+        self.client = client
+        self.collection: AsyncCollectionReference = client.collection(name)
+        self.batches = UserBatches(client, client.collection(OUTBOX_COLLECTION))
+
+    @override
+    @timed("firestore_operation", operation="users.get")
+    async def get(self, id_user: str | None = None, api_key: str | None = None, email: str | None = None) -> User:
+        if id_user:
+            logger.info(f"Getting user with ID {id_user} from Firestore")
+            snapshot = await self.collection.document(id_user).get()
+
+        elif api_key or email:
+            field, value = ("api_key", api_key) if api_key else ("email", email)
+            logger.info(f"Getting user by {field} from Firestore")
+            query = self.collection.where(filter=FieldFilter(field, "==", value)).limit(1)
+            snapshot = next(iter(await query.get()), None)
+
+        else:
+            message = "Either ID, API key or email must be provided"
+            raise ValueError(message)
+
+        if not (snapshot and snapshot.exists):
+            message = f"User with ID {id_user} does not exist" if id_user else "User does not exist"
+            raise KeyError(message)
+
+        if not snapshot.to_dict():
+            message = "User data is empty"
+            raise ValueError(message)
+
+        return to_user(snapshot)
+
+    @override
+    async def list(self) -> AsyncIterator[User]:
+        logger.info("Getting all users from Firestore")
+        async for snapshot in self.collection.stream():
+            if snapshot.to_dict():
+                yield to_user(snapshot)
+
+    @override
+    @timed("firestore_operation", operation="users.put")
+    async def put(self, user: User, event: ChangeEvent | None = None) -> None:
+        logger.info(f"Upserting user {user.id} into Firestore")
+        batch = self.client.batch()
+        batch.set(self.collection.document(str(user.id)), user.json(exclude={"id"}))
+        self.batches.append(batch, event)
+        await batch.commit()
+
+    @override
+    @timed("firestore_operation", operation="users.create")
+    async def create(self, user: User, event: ChangeEvent | None = None) -> None:
+        logger.info(f"Creating user {user.id} in Firestore")
+        batch = self.client.batch()
+        batch.create(self.collection.document(str(user.id)), user.json(exclude={"id"}))
+        self.batches.append(batch, event)
+        await batch.commit()
+
+    @override
+    @timed("firestore_operation", operation="users.delete")
+    async def delete(self, user: User, event: ChangeEvent | None = None) -> None:
+        logger.info(f"Deleting user {user.id} from Firestore")
+        batch = self.client.batch()
+        batch.delete(self.collection.document(str(user.id)))
+        self.batches.append(batch, event)
+        await batch.commit()
+
+    @override
+    @timed("firestore_operation", operation="users.get_versioned")
+    async def get_versioned(self, id_user: str) -> VersionedUser:
+        logger.info(f"Getting versioned user {id_user} from Firestore")
+        snapshot = await self.collection.document(id_user).get()
+        if not snapshot.exists:
+            message = f"User with ID {id_user} does not exist"
+            raise KeyError(message)
+
+        return VersionedUser(to_user(snapshot), snapshot.update_time)
+
+    @override
+    @timed("firestore_operation", operation="users.update")
+    async def update(
+        self, user: User, changes: UserChanges, version: datetime | None = None, event: ChangeEvent | None = None
+    ) -> datetime:
+        fields = changes.fields(user)
+        option = FirestoreClient.write_option(last_update_time=version) if version else None
+
+        logger.info(f"Updating fields {sorted(fields)} of user {user.id} in Firestore")
+        batch = self.client.batch()
+        batch.update(self.collection.document(str(user.id)), fields, option=option)
+        self.batches.append(batch, event)
+        result, *_ = await batch.commit()
+        return result.update_time
+
+    @override
+    @timed("firestore_operation", operation="users.page")
+    async def page(self, limit: int, start_after: str | None = None) -> builtins.list[User]:
+        # NOTE: The builtin is qualified since the `list` method shadows it within the class
+        query = self.collection.order_by(FieldPath.document_id()).limit(limit)
+        if start_after:
+            query = query.start_after({FieldPath.document_id(): self.collection.document(start_after)})
+
+        logger.info(f"Getting a page of {limit} users after {start_after} from Firestore")
+        return [to_user(snapshot) async for snapshot in query.stream() if snapshot.exists]
+
+    @override
+    @timed("firestore_operation", operation="users.move_many")
+    async def move_many(
+        self, ids: Iterable[str], target: Self, operation: Operation | None = None
+    ) -> dict[str, HTTPStatus]:
+        return await self.batches.move(ids, source=self.collection, target=target.collection, operation=operation)
+
+    @override
+    @timed("firestore_operation", operation="users.delete_many")
+    async def delete_many(self, ids: Iterable[str], operation: Operation | None = None) -> dict[str, HTTPStatus]:
+        return await self.batches.delete(ids, collection=self.collection, operation=operation)
+
+    @override
+    @timed("firestore_operation", operation="users.patch_many")
+    async def patch_many(self, payloads: dict[str, dict], operation: Operation | None = None) -> dict[str, HTTPStatus]:
+        return await self.batches.patch(payloads, collection=self.collection, operation=operation)
+
+
+class AsyncRouteCollection(RouteRepository):
+    """Asynchronous access to the collection of event routes, with one document per route."""
+
+    def __init__(self, client: AsyncClient, name: str) -> None:
+        self.client = client
+        self.collection: AsyncCollectionReference = client.collection(name)
+
+    @override
+    @timed("firestore_operation", operation="routes.sync")
+    async def sync(self, id_user: str, routes: Iterable[EventRoute], id_channels: Iterable[str] | None = None) -> None:
+        channels = set(id_channels) if id_channels is not None else None
+        query = self.collection.where(filter=FieldFilter("id_user", "==", id_user)).select(["id_channel"])
+        existing = {
+            snapshot.id
+            async for snapshot in query.stream()
+            if channels is None or snapshot.get("id_channel") in channels
+        }
+
+        # NOTE: Routes are immutable, so only the new ones are written and the stale ones deleted
+        desired = {route.key: route for route in routes}
+        writes: dict[str, dict | None] = {
+            key: desired[key].model_dump(mode="json") for key in desired.keys() - existing
+        }
+        writes.update(dict.fromkeys(existing - desired.keys()))
+        if not writes:
+            return
+
+        logger.info(f"Syncing {len(writes)} event routes of user {id_user} in Firestore")
+        for chunk in batched(writes.items(), FIRESTORE_BATCH_LIMIT):
+            batch = self.client.batch()
+            for key, document in chunk:
+                reference = self.collection.document(key)
+                if document:
+                    batch.set(reference, document)
+                else:
+                    batch.delete(reference)
+            await batch.commit()
+
+    @override
+    @timed("firestore_operation", operation="routes.page")
+    async def page(self, event: PublicEvent, limit: int, start_after: str | None = None) -> list[EventRoute]:
+        query = self.collection.where(filter=FieldFilter("event", "==", event)).order_by(FieldPath.document_id())
+        if start_after:
+            query = query.start_after({FieldPath.document_id(): self.collection.document(start_after)})
+
+        return [EventRoute.model_validate(snapshot.to_dict()) async for snapshot in query.limit(limit).stream()]
+
+    @override
+    @timed("firestore_operation", operation="routes.users")
+    async def users(self) -> set[str]:
+        logger.info("Getting the users having event routes from Firestore")
+        return {snapshot.get("id_user") async for snapshot in self.collection.select(["id_user"]).stream()}
+
+
+class AsyncOutboxCollection(OutboxRepository):
+    """Asynchronous access to the outbox collection, with one document per change event."""
+
+    def __init__(self, client: AsyncClient, name: str) -> None:
+        self.client = client
+        self.collection: AsyncCollectionReference = client.collection(name)
+        self.lease_document: AsyncDocumentReference = client.collection(OUTBOX_LEASES_COLLECTION).document(name)
+
+    @override
+    @timed("firestore_operation", operation="outbox.pending")
+    async def pending(self, limit: int) -> list[ChangeEvent]:
+        query = self.collection.order_by("version").limit(limit)
+        return [
+            ChangeEvent.model_validate({**(snapshot.to_dict() or {}), "id": snapshot.id})
+            async for snapshot in query.stream()
+        ]
+
+    @override
+    @timed("firestore_operation", operation="outbox.ack")
+    async def ack(self, ids: Iterable[str]) -> None:
+        for chunk in batched(ids, FIRESTORE_BATCH_LIMIT):
+            batch = self.client.batch()
+            for id_event in chunk:
+                batch.delete(self.collection.document(id_event))
+            await batch.commit()
+
+    @override
+    @timed("firestore_operation", operation="outbox.lease")
+    async def lease(self, owner: str, duration: float) -> bool:
+        return await _lease(self.client.transaction(), self.lease_document, owner, duration)
+
+
+class AsyncFirestoreClient:
+    """
+    Asynchronous Firestore client exposing the same user collections as the `cumplo_common` client.
+
+    The underlying client is created on first use, so it is bound to the event loop serving the requests.
+    """
+
+    @cached_property
+    def client(self) -> AsyncClient:
+        """The asynchronous Firestore client."""
+        return AsyncClient(project=PROJECT_ID or None)
+
+    @cached_property
+    def users(self) -> AsyncUserCollection:
+        """The collection of active users."""
+        return AsyncUserCollection(self.client, firestore.client.users.collection.id)
+
+    @cached_property
+    def disabled(self) -> AsyncUserCollection:
+        """The collection of disabled users."""
+        return AsyncUserCollection(self.client, firestore.client.disabled.collection.id)
+
+    @cached_property
+    def routes(self) -> AsyncRouteCollection:
+        """The collection of event routes."""
+        return AsyncRouteCollection(self.client, EVENT_ROUTES_COLLECTION)
+
+    @cached_property
+    def outbox(self) -> AsyncOutboxCollection:
+        """The outbox of change events."""
+        return AsyncOutboxCollection(self.client, OUTBOX_COLLECTION)
+
+
+client = AsyncFirestoreClient()
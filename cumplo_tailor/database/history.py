@@ -0,0 +1,44 @@
+from logging import getLogger
+from typing import TYPE_CHECKING
+
+from cumplo_tailor.database.common import async_firestore_client
+from cumplo_tailor.utils.constants import SUBSCRIPTIONS_STATE_COLLECTION
+from cumplo_tailor.utils.metrics import timed
+
+if TYPE_CHECKING:
+    from google.cloud.firestore_v1 import AsyncDocumentReference, AsyncTransaction
+
+logger = getLogger(__name__)
+
+
+async def _advance(transaction: "AsyncTransaction", document: "AsyncDocumentReference", history_id: int) -> None:
+    """Store the history ID within the transaction unless a newer one is already stored."""
+    snapshot = await document.get(transaction=transaction)
+    if snapshot.exists and (snapshot.get("history_id") or 0) >= history_id:
+        return
+    transaction.set(document, {"history_id": history_id}, merge=True)
+
+
+class GmailHistoryState:
+    """The last Gmail history ID processed by the subscriptions."""
+
+    @staticmethod
+    def _document() -> "AsyncDocumentReference":
+        """Get the document holding the state."""
+        return async_firestore_client().collection(SUBSCRIPTIONS_STATE_COLLECTION).document("gmail")
+
+    @classmethod
+    @timed("firestore_operation", operation="subscriptions_state.get")
+    async def get(cls) -> int | None:
+        """Get the last processed history ID, if any."""
+        snapshot = await cls._document().get()
+        return int(history_id) if snapshot.exists and (history_id := snapshot.get("history_id")) else None
+
+    @classmethod
+    @timed("firestore_operation", operation="subscriptions_state.advance")
+    async def advance(cls, history_id: int) -> None:
+        """Store the history ID as processed, never moving the state backwards."""
+        from google.cloud.firestore import async_transactional  # noqa: PLC0415
+
+        logger.info(f"Advancing Gmail history to {history_id}")
+        await async_transactional(_advance)(async_firestore_client().transaction(), cls._document(), history_id)
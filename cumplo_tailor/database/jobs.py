@@ -0,0 +1,62 @@
+from datetime import datetime
+from enum import StrEnum
+from logging import getLogger
+
+import arrow
+from pydantic import BaseModel, Field
+
+from cumplo_tailor.database.common import async_firestore_client
+from cumplo_tailor.utils.constants import ONBOARDING_JOBS_COLLECTION
+from cumplo_tailor.utils.metrics import timed
+
+logger = getLogger(__name__)
+
+
+class JobStatus(StrEnum):
+    """Status of an onboarding job."""
+
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    DONE = "DONE"
+    FAILED = "FAILED"
+
+
+class OnboardingJob(BaseModel):
+    """A user creation that fell back to live API key provisioning."""
+
+    id: str = Field(...)
+    status: JobStatus = Field(JobStatus.PENDING)
+    id_user: str | None = Field(None)
+    error: str | None = Field(None)
+    created_at: datetime = Field(default_factory=lambda: arrow.utcnow().datetime)
+    updated_at: datetime = Field(default_factory=lambda: arrow.utcnow().datetime)
+
+
+class OnboardingJobs:
+    """Storage of the onboarding jobs."""
+
+    @staticmethod
+    @timed("firestore_operation", operation="onboarding_jobs.get")
+    async def get(id_job: str) -> OnboardingJob:
+        """
+        Get an onboarding job.
+
+        Raises:
+            KeyError: If the job does not exist.
+
+        """
+        snapshot = await async_firestore_client().collection(ONBOARDING_JOBS_COLLECTION).document(id_job).get()
+        if not snapshot.exists:
+            message = f"Onboarding job with ID {id_job} does not exist"
+            raise KeyError(message)
+
+        return OnboardingJob.model_validate({**(snapshot.to_dict() or {}), "id": snapshot.id})
+
+    @staticmethod
+    @timed("firestore_operation", operation="onboarding_jobs.put")
+    async def put(job: OnboardingJob) -> None:
+        """Create or update an onboarding job."""
+        logger.info(f"Upserting onboarding job {job.id} with status {job.status}")
+        job.updated_at = arrow.utcnow().datetime
+        document = async_firestore_client().collection(ONBOARDING_JOBS_COLLECTION).document(job.id)
+        await document.set(job.model_dump(exclude={"id"}))
@@ -0,0 +1,66 @@
+from logging import getLogger
+from typing import TYPE_CHECKING, NamedTuple
+
+import arrow
+
+from cumplo_tailor.database.common import async_firestore_client
+from cumplo_tailor.utils.constants import API_KEYS_COLLECTION
+from cumplo_tailor.utils.metrics import timed
+
+if TYPE_CHECKING:
+    from google.cloud.firestore_v1 import AsyncQuery, AsyncTransaction
+
+logger = getLogger(__name__)
+
+
+class PooledKey(NamedTuple):
+    """A key of the pool along with its name."""
+
+    name: str
+    key: str
+
+
+async def _claim(transaction: "AsyncTransaction", query: "AsyncQuery") -> PooledKey | None:
+    """Delete the oldest key of the pool within the transaction and return it."""
+    async for snapshot in query.stream(transaction=transaction):
+        transaction.delete(snapshot.reference)
+        return PooledKey(snapshot.id, snapshot.get("key"))
+    return None
+
+
+class ApiKeyPool:
+    """Pool of pre-provisioned API keys not yet assigned to any user."""
+
+    @staticmethod
+    @timed("firestore_operation", operation="api_keys.claim")
+    async def claim() -> PooledKey | None:
+        """
+        Atomically take a key out of the pool.
+
+        Returns:
+            PooledKey | None: The claimed key or None if the pool is empty.
+
+        """
+        from google.cloud.firestore import async_transactional  # noqa: PLC0415
+
+        client = async_firestore_client()
+        query = client.collection(API_KEYS_COLLECTION).order_by("created_at").limit(1)
+        if key := await async_transactional(_claim)(client.transaction(), query):
+            logger.info("Claimed a pre-provisioned API key")
+        return key
+
+    @staticmethod
+    @timed("firestore_operation", operation="api_keys.add")
+    async def add(key: str, name: str) -> None:
+        """Add a new unassigned key to the pool."""
+        logger.info(f"Adding API key {name} to the pool")
+        collection = async_firestore_client().collection(API_KEYS_COLLECTION)
+        await collection.document(name).set({"key": key, "created_at": arrow.utcnow().datetime})
+
+    @staticmethod
+    @timed("firestore_operation", operation="api_keys.count")
+    async def count() -> int:
+        """Count the unassigned keys of the pool."""
+        collection = async_firestore_client().collection(API_KEYS_COLLECTION)
+        [[result]] = await collection.count().get()
+        return int(result.value)
@@ -0,0 +1,46 @@
+from datetime import timedelta
+from hashlib import sha256
+from logging import getLogger
+
+import arrow
+from google.api_core.exceptions import AlreadyExists
+
+from cumplo_tailor.database.common import async_firestore_client
+from cumplo_tailor.utils.constants import SUBSCRIPTION_MARKERS_COLLECTION, SUBSCRIPTION_MARKERS_TTL
+from cumplo_tailor.utils.metrics import timed
+
+logger = getLogger(__name__)
+
+
+class SubscriptionMarkers:
+    """Persistent markers of processed subscription notifications shared across workers."""
+
+    @staticmethod
+    @timed("firestore_operation", operation="subscription_markers.claim")
+    async def claim(key: str) -> bool:
+        """
+        Atomically create the marker of the key.
+
+        Returns:
+            bool: Whether the marker was created, i.e. no other worker claimed the key before.
+
+        """
+        now = arrow.utcnow().datetime
+        document = async_firestore_client().collection(SUBSCRIPTION_MARKERS_COLLECTION).document(_hash(key))
+        try:
+            await document.create({"created_at": now, "expires_at": now + timedelta(seconds=SUBSCRIPTION_MARKERS_TTL)})
+        except AlreadyExists:
+            return False
+        return True
+
+    @staticmethod
+    @timed("firestore_operation", operation="subscription_markers.release")
+    async def release(key: str) -> None:
+        """Delete the marker of the key so it can be claimed again."""
+        logger.info("Releasing subscription marker")
+        await async_firestore_client().collection(SUBSCRIPTION_MARKERS_COLLECTION).document(_hash(key)).delete()
+
+
+def _hash(key: str) -> str:
+    """Hash the key into a document ID that doesn't expose the email addresses it contains."""
+    return sha256(key.encode()).hexdigest()
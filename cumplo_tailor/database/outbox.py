@@ -0,0 +1,83 @@
+from datetime import datetime
+from enum import StrEnum
+from typing import Self
+
+import arrow
+import ulid
+from pydantic import BaseModel, Field
+
+from cumplo_tailor.database.changes import UserChanges
+
+
+class Operation(StrEnum):
+    """Operation that changed a user."""
+
+    CREATED = "CREATED"
+    UPDATED = "UPDATED"
+    DELETED = "DELETED"
+    DISABLED = "DISABLED"
+    ENABLED = "ENABLED"
+
+
+class Resource(StrEnum):
+    """Part of a user that changed."""
+
+    USER = "user"
+    FILTERS = "filters"
+    CHANNELS = "channels"
+    CREDENTIALS = "credentials"
+
+
+class ChangeEvent(BaseModel):
+    """
+    A change of a user, appended to the outbox in the same write as the change itself.
+
+    The version is the update time of the user after the change, set by the storage when the write is committed.
+    Events are delivered at least once and, barring a relay failover, in order for each user. Consumers must
+    deduplicate them by their version, skipping the ones whose version is not newer than the one they hold.
+    """
+
+    id: str = Field(default_factory=lambda: str(ulid.new()))
+    id_user: str = Field(...)
+    resource: Resource = Field(...)
+    operation: Operation = Field(...)
+    fields: list[str] = Field(default_factory=list)
+    version: datetime | None = Field(None)
+    created_at: datetime = Field(default_factory=lambda: arrow.utcnow().datetime)
+
+    @classmethod
+    def build(cls, id_user: str, operation: Operation, changes: UserChanges | None = None) -> Self:
+        """
+        Build the event of a change of the user.
+
+        Args:
+            id_user (str): The ID of the changed user.
+            operation (Operation): The operation that changed it.
+            changes (UserChanges | None): The touched paths. When missing the whole user may have changed, which is
+                sent as an event of the user without fields.
+
+        Returns:
+            Self: The change event.
+
+        """
+        if not changes:
+            return cls(id_user=id_user, resource=Resource.USER, operation=operation)
+
+        fields = [
+            *(f"filters.{id_filter}" for id_filter in changes.filters),
+            *(f"channels.{id_channel}" for id_channel in changes.channels),
+            *(["credentials"] if changes.credentials else []),
+            *changes.attributes,
+        ]
+        resources = {
+            resource
+            for resource, touched in (
+                (Resource.FILTERS, changes.filters),
+                (Resource.CHANNELS, changes.channels),
+                (Resource.CREDENTIALS, changes.credentials),
+                (Resource.USER, changes.attributes),
+            )
+            if touched
+        }
+        resource = resources.pop() if len(resources) == 1 else Resource.USER
+        return cls(id_user=id_user, resource=resource, operation=operation, fields=sorted(fields))
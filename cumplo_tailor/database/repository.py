@@ -0,0 +1,350 @@
+import builtins
+from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator, Iterable
+from datetime import datetime
+from functools import cached_property
+from http import HTTPStatus
+from typing import NamedTuple, Self
+
+from cumplo_common.models.channel import ChannelType, PublicEvent
+from cumplo_common.models.user import User
+from pydantic import BaseModel, ConfigDict
+
+from cumplo_tailor.database.changes import UserChanges
+from cumplo_tailor.database.outbox import ChangeEvent, Operation
+from cumplo_tailor.utils.constants import (
+    API_KEY_POOL_WATERMARK,
+    DATABASE_BACKEND,
+    EVENT_ROUTES_COLLECTION,
+    OUTBOX_COLLECTION,
+    SQLITE_PATH,
+    SUBSCRIPTION_MARKERS,
+    SUBSCRIPTION_SYNC_MODE,
+)
+
+
+class VersionedUser(NamedTuple):
+    """A user along with the update time of its document."""
+
+    user: User
+    version: datetime
+
+
+class EventRoute(BaseModel):
+    """A channel of a user subscribed to an event."""
+
+    model_config = ConfigDict(frozen=True)
+
+    event: PublicEvent
+    id_user: str
+    id_channel: str
+    channel_type: ChannelType
+
+    @property
+    def key(self) -> str:
+        """The unique key of the route, ordered so the routes of a user are contiguous."""
+        return f"{self.id_user}:{self.id_channel}:{self.event.value}"
+
+
+class UserRepository(ABC):
+    """
+    Storage of a collection of users.
+
+    Missing users raise `KeyError` on reads and `NotFound` on updates, and writes conditioned on an outdated version
+    raise `FailedPrecondition`, whatever the backend.
+
+    Writes optionally append a change event to the outbox, which is committed along with the write or not at all.
+    """
+
+    @abstractmethod
+    async def get(self, id_user: str | None = None, api_key: str | None = None, email: str | None = None) -> User:
+        """
+        Get a user by its ID, API key or email.
+
+        Raises:
+            KeyError: When the user does not exist.
+            ValueError: When no identifier is given or the user data is empty.
+
+        """
+
+    @abstractmethod
+    def list(self) -> AsyncIterator[User]:
+        """Yield every user of the collection."""
+
+    @abstractmethod
+    async def put(self, user: User, event: ChangeEvent | None = None) -> None:
+        """Create or overwrite the user, appending the change event to the outbox if given."""
+
+    @abstractmethod
+    async def create(self, user: User, event: ChangeEvent | None = None) -> None:
+        """
+        Create the user, appending the change event to the outbox if given.
+
+        Raises:
+            AlreadyExists: When the user already exists.
+
+        """
+
+    @abstractmethod
+    async def delete(self, user: User, event: ChangeEvent | None = None) -> None:
+        """Delete the user, appending the change event to the outbox if given."""
+
+    @abstractmethod
+    async def get_versioned(self, id_user: str) -> VersionedUser:
+        """
+        Get a user along with its version.
+
+        Raises:
+            KeyError: If the user does not exist.
+
+        """
+
+    @abstractmethod
+    async def update(
+        self, user: User, changes: UserChanges, version: datetime | None = None, event: ChangeEvent | None = None
+    ) -> datetime:
+        """
+        Update only the touched paths of the user.
+
+        Args:
+            user (User): The user holding the new values of the touched paths.
+            changes (UserChanges): The touched paths.
+            version (datetime | None): When given, the write only succeeds if the user was not updated since.
+            event (ChangeEvent | None): The change event to append to the outbox along with the update.
+
+        Raises:
+            NotFound: If the user does not exist.
+            FailedPrecondition: If the user was updated after the given version.
+
+        Returns:
+            datetime: The new version of the user.
+
+        """
+
+    # NOTE: The builtin is qualified since the `list` method shadows it within the class
+    @abstractmethod
+    async def page(self, limit: int, start_after: str | None = None) -> builtins.list[User]:
+        """
+        Get a page of users ordered by their ID.
+
+        Args:
+            limit (int): The maximum amount of users in the page.
+            start_after (str | None): The ID of the last user of the previous page.
+
+        Returns:
+            list[User]: The users of the page.
+
+        """
+
+    async def stream(self, page_size: int, start_after: str | None = None) -> AsyncIterator[User]:
+        """
+        Read the collection one page at a time.
+
+        Args:
+            page_size (int): The amount of users read per page.
+            start_after (str | None): The ID of the user to start after. Defaults to the first one.
+
+        Yields:
+            User: Every user after the given one, ordered by their ID.
+
+        """
+        while users := await self.page(page_size, start_after):
+            for user in users:
+                yield user
+            start_after = str(users[-1].id)
+
+    @abstractmethod
+    async def move_many(
+        self, ids: Iterable[str], target: Self, operation: Operation | None = None
+    ) -> dict[str, HTTPStatus]:
+        """
+        Atomically move each user to the target collection.
+
+        Args:
+            ids (Iterable[str]): The IDs of the users to move.
+            target (Self): The collection to move them to.
+            operation (Operation | None): When given, a change event with it is appended for each moved user.
+
+        Returns:
+            dict[str, HTTPStatus]: The result of each user.
+
+        """
+
+    @abstractmethod
+    async def delete_many(self, ids: Iterable[str], operation: Operation | None = None) -> dict[str, HTTPStatus]:
+        """
+        Delete each user.
+
+        Args:
+            ids (Iterable[str]): The IDs of the users to delete.
+            operation (Operation | None): When given, a change event with it is appended for each deleted user.
+
+        Returns:
+            dict[str, HTTPStatus]: The result of each user.
+
+        """
+
+    @abstractmethod
+    async def patch_many(self, payloads: dict[str, dict], operation: Operation | None = None) -> dict[str, HTTPStatus]:
+        """
+        Merge patch each user with its payload.
+
+        Args:
+            payloads (dict[str, dict]): The merge patch of each user, by their ID.
+            operation (Operation | None): When given, a change event with it and the patched paths is appended for
+                each changed user.
+
+        Returns:
+            dict[str, HTTPStatus]: The result of each user.
+
+        """
+
+
+class RouteRepository(ABC):
+    """Storage of the event routes, the inverted index of the channels subscribed to each event."""
+
+    @abstractmethod
+    async def sync(self, id_user: str, routes: Iterable[EventRoute], id_channels: Iterable[str] | None = None) -> None:
+        """
+        Replace the routes of the given channels of the user, writing only the ones that changed.
+
+        Args:
+            id_user (str): The ID of the user owning the channels.
+            routes (Iterable[EventRoute]): The current routes of the channels.
+            id_channels (Iterable[str] | None): The channels to replace the routes of, which may no longer exist.
+                Defaults to every channel of the user.
+
+        """
+
+    @abstractmethod
+    async def page(self, event: PublicEvent, limit: int, start_after: str | None = None) -> list[EventRoute]:
+        """
+        Get a page of the routes of an event ordered by their key.
+
+        Args:
+            event (PublicEvent): The event to get the routes of.
+            limit (int): The maximum amount of routes in the page.
+            start_after (str | None): The key of the last route of the previous page.
+
+        Returns:
+            list[EventRoute]: The routes of the page.
+
+        """
+
+    @abstractmethod
+    async def users(self) -> set[str]:
+        """Get the IDs of the users having routes."""
+
+
+class OutboxRepository(ABC):
+    """Storage of the change events pending delivery, appended along with the user writes."""
+
+    @abstractmethod
+    async def pending(self, limit: int) -> list[ChangeEvent]:
+        """
+        Get the oldest pending events.
+
+        Args:
+            limit (int): The maximum amount of events.
+
+        Returns:
+            list[ChangeEvent]: The events ordered by their version, so the ones of each user are in order.
+
+        """
+
+    @abstractmethod
+    async def ack(self, ids: Iterable[str]) -> None:
+        """Remove the delivered events."""
+
+    @abstractmethod
+    async def lease(self, owner: str, duration: float) -> bool:
+        """
+        Atomically acquire or renew the lease of the relay, held by a single instance at a time.
+
+        Args:
+            owner (str): The ID of the instance taking the lease.
+            duration (float): The seconds until the lease expires unless it is renewed.
+
+        Returns:
+            bool: Whether the instance holds the lease.
+
+        """
+
+
+class RepositoryClient:
+    """
+    The collections of the storage backend selected with `DATABASE_BACKEND`.
+
+    Besides `firestore`, the `sqlite` backend stores the users in the `SQLITE_PATH` database, which by default lives
+    in memory, so the service can be benchmarked and profiled offline.
+
+    The `sqlite` backend only covers the users, the event routes and the outbox. The API key pool, the onboarding jobs,
+    the subscription markers and the Gmail history state are only stored in Firestore, so the features using them must
+    be disabled with it.
+    """
+
+    @cached_property
+    def _collections(self) -> tuple[UserRepository, UserRepository, RouteRepository, OutboxRepository]:
+        """
+        The collections of the active users, the disabled users, the routes and the outbox of the backend.
+
+        They are imported lazily, so only the selected backend is loaded.
+
+        Raises:
+            ValueError: When the backend is unknown, or features it doesn't support are enabled.
+
+        """
+        match DATABASE_BACKEND:
+            case "firestore":
+                from cumplo_tailor.database import firestore  # noqa: PLC0415
+
+                client = firestore.client
+                return client.users, client.disabled, client.routes, client.outbox
+
+            case "sqlite":
+                from cumplo_tailor.database.sqlite import SQLiteDatabase  # noqa: PLC0415
+
+                if features := _firestore_features():
+                    message = f"The sqlite backend does not support {', '.join(features)}, which need Firestore"
+                    raise ValueError(message)
+
+                database = SQLiteDatabase(SQLITE_PATH)
+                users, disabled = database.collection("users"), database.collection("disabled_users")
+                return users, disabled, database.routes(EVENT_ROUTES_COLLECTION), database.outbox(OUTBOX_COLLECTION)
+
+            case _:
+                message = f"Unknown database backend {DATABASE_BACKEND}"
+                raise ValueError(message)
+
+    @property
+    def users(self) -> UserRepository:
+        """The collection of active users."""
+        return self._collections[0]
+
+    @property
+    def disabled(self) -> UserRepository:
+        """The collection of disabled users."""
+        return self._collections[1]
+
+    @property
+    def routes(self) -> RouteRepository:
+        """The collection of event routes."""
+        return self._collections[2]
+
+    @property
+    def outbox(self) -> OutboxRepository:
+        """The outbox of change events."""
+        return self._collections[3]
+
+
+def _firestore_features() -> builtins.list[str]:
+    """List the enabled features whose stores are only available in Firestore."""
+    enabled = {
+        "API_KEY_POOL_WATERMARK": API_KEY_POOL_WATERMARK > 0,
+        "SUBSCRIPTION_MARKERS": SUBSCRIPTION_MARKERS,
+        "SUBSCRIPTION_SYNC_MODE=history": SUBSCRIPTION_SYNC_MODE == "history",
+    }
+    return [feature for feature, on in enabled.items() if on]
+
+
+client = RepositoryClient()
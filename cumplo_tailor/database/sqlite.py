@@ -0,0 +1,410 @@
+import builtins
+import json
+import sqlite3
+from collections.abc import AsyncIterator, Iterable
+from datetime import UTC, datetime, timedelta
+from http import HTTPStatus
+from logging import getLogger
+from threading import Lock
+from typing import Self, override
+
+from cumplo_common.models.channel import PublicEvent
+from cumplo_common.models.user import User
+from google.api_core.exceptions import AlreadyExists, FailedPrecondition, NotFound
+from pydantic import ValidationError
+
+from cumplo_tailor.database.changes import UserChanges
+from cumplo_tailor.database.outbox import ChangeEvent, Operation
+from cumplo_tailor.database.repository import (
+    EventRoute,
+    OutboxRepository,
+    RouteRepository,
+    UserRepository,
+    VersionedUser,
+)
+from cumplo_tailor.utils.constants import OUTBOX_COLLECTION, OUTBOX_LEASES_COLLECTION
+from cumplo_tailor.utils.patch import merge_patch
+
+logger = getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS {table} (
+    id TEXT PRIMARY KEY,
+    api_key TEXT,
+    email TEXT,
+    document TEXT NOT NULL,
+    version TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS {table}_api_key ON {table} (api_key);
+CREATE INDEX IF NOT EXISTS {table}_email ON {table} (email);
+"""
+
+ROUTES_SCHEMA = """
+CREATE TABLE IF NOT EXISTS {table} (
+    key TEXT PRIMARY KEY,
+    event TEXT NOT NULL,
+    id_user TEXT NOT NULL,
+    id_channel TEXT NOT NULL,
+    channel_type TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS {table}_event ON {table} (event, key);
+CREATE INDEX IF NOT EXISTS {table}_id_user ON {table} (id_user, id_channel);
+"""
+
+OUTBOX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS {table} (
+    id TEXT PRIMARY KEY,
+    version TEXT NOT NULL,
+    document TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS {table}_version ON {table} (version);
+"""
+
+LEASES_SCHEMA = """
+CREATE TABLE IF NOT EXISTS {table} (
+    name TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at TEXT NOT NULL
+);
+"""
+
+
+class SQLiteDatabase:
+    """
+    Embedded SQLite database holding one table per collection.
+
+    A single connection is shared by the whole process and serialized with a lock. The statements are fast enough
+    to run on the event loop, which is fine for local benchmarking and profiling.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.lock = Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._version = datetime.now(UTC)
+        logger.info(f"Opened SQLite database at {path}")
+
+    def collection(self, table: str) -> "SQLiteUserCollection":
+        """Get the user collection stored in the table, creating it and the outbox if needed."""
+        with self.lock:
+            self.connection.executescript(SCHEMA.format(table=table))
+            self.connection.executescript(OUTBOX_SCHEMA.format(table=OUTBOX_COLLECTION))
+        return SQLiteUserCollection(self, table)
+
+    def routes(self, table: str) -> "SQLiteRouteCollection":
+        """Get the route collection stored in the table, creating it if needed."""
+        with self.lock:
+            self.connection.executescript(ROUTES_SCHEMA.format(table=table))
+        return SQLiteRouteCollection(self, table)
+
+    def outbox(self, table: str) -> "SQLiteOutbox":
+        """Get the outbox stored in the table, creating it and its leases if needed."""
+        with self.lock:
+            self.connection.executescript(OUTBOX_SCHEMA.format(table=table))
+            self.connection.executescript(LEASES_SCHEMA.format(table=OUTBOX_LEASES_COLLECTION))
+        return SQLiteOutbox(self, table)
+
+    def version(self) -> datetime:
+        """Get a new version, strictly greater than every previous one. Must be called holding the lock."""
+        self._version = max(datetime.now(UTC), self._version + timedelta(microseconds=1))
+        return self._version
+
+
+class SQLiteUserCollection(UserRepository):
+    """Collection of users stored as JSON documents in a SQLite table."""
+
+    def __init__(self, database: SQLiteDatabase, table: str) -> None:
+        self.database = database
+        self.table = table
+
+    @override
+    async def get(self, id_user: str | None = None, api_key: str | None = None, email: str | None = None) -> User:
+        if id_user:
+            field, value = "id", id_user
+        elif api_key or email:
+            field, value = ("api_key", api_key) if api_key else ("email", email)
+        else:
+            message = "Either ID, API key or email must be provided"
+            raise ValueError(message)
+
+        with self.database.lock:
+            query = f"SELECT id, document FROM {self.table} WHERE {field} = ? LIMIT 1"  # noqa: S608
+            row = self.database.connection.execute(query, (value,)).fetchone()
+
+        if not row:
+            message = f"User with ID {id_user} does not exist" if id_user else "User does not exist"
+            raise KeyError(message)
+
+        return self._to_user(row)
+
+    @override
+    async def list(self) -> AsyncIterator[User]:
+        with self.database.lock:
+            query = f"SELECT id, document FROM {self.table} ORDER BY id"  # noqa: S608
+            rows = self.database.connection.execute(query).fetchall()
+
+        for row in rows:
+            yield self._to_user(row)
+
+    @override
+    async def put(self, user: User, event: ChangeEvent | None = None) -> None:
+        with self.database.lock, self.database.connection:
+            self.database.connection.execute("BEGIN")
+            self._append(event, self._write(user))
+
+    @override
+    async def create(self, user: User, event: ChangeEvent | None = None) -> None:
+        with self.database.lock:
+            try:
+                with self.database.connection:
+                    self.database.connection.execute("BEGIN")
+                    self._append(event, self._write(user, replace=False))
+            except sqlite3.IntegrityError:
+                message = f"User with ID {user.id} already exists"
+                raise AlreadyExists(message)  # noqa: B904
+
+    @override
+    async def delete(self, user: User, event: ChangeEvent | None = None) -> None:
+        with self.database.lock, self.database.connection:
+            self.database.connection.execute("BEGIN")
+            self._delete(str(user.id), event)
+
+    @override
+    async def get_versioned(self, id_user: str) -> VersionedUser:
+        with self.database.lock:
+            query = f"SELECT id, document, version FROM {self.table} WHERE id = ?"  # noqa: S608
+            row = self.database.connection.execute(query, (id_user,)).fetchone()
+
+        if not row:
+            message = f"User with ID {id_user} does not exist"
+            raise KeyError(message)
+
+        return VersionedUser(self._to_user(row), datetime.fromisoformat(row[2]))
+
+    @override
+    async def update(
+        self, user: User, changes: UserChanges, version: datetime | None = None, event: ChangeEvent | None = None
+    ) -> datetime:
+        # NOTE: Documents are local, so the whole user is written instead of the touched paths only
+        with self.database.lock, self.database.connection:
+            self.database.connection.execute("BEGIN")
+            query = f"SELECT version FROM {self.table} WHERE id = ?"  # noqa: S608
+            if not (row := self.database.connection.execute(query, (str(user.id),)).fetchone()):
+                message = f"User with ID {user.id} does not exist"
+                raise NotFound(message)
+
+            if version and datetime.fromisoformat(row[0]) != version:
+                message = f"User with ID {user.id} was updated after {version}"
+                raise FailedPrecondition(message)
+
+            new_version = self._write(user)
+            self._append(event, new_version)
+            return new_version
+
+    @override
+    async def page(self, limit: int, start_after: str | None = None) -> builtins.list[User]:
+        # NOTE: The builtin is qualified since the `list` method shadows it within the class
+        with self.database.lock:
+            query = f"SELECT id, document FROM {self.table} WHERE id > ? ORDER BY id LIMIT ?"  # noqa: S608
+            rows = self.database.connection.execute(query, (start_after or "", limit)).fetchall()
+
+        return [self._to_user(row) for row in rows]
+
+    @override
+    async def move_many(
+        self, ids: Iterable[str], target: Self, operation: Operation | None = None
+    ) -> dict[str, HTTPStatus]:
+        results: dict[str, HTTPStatus] = {}
+        with self.database.lock:
+            for id_user in dict.fromkeys(ids):
+                query = f"SELECT * FROM {self.table} WHERE id = ?"  # noqa: S608
+                if not (row := self.database.connection.execute(query, (id_user,)).fetchone()):
+                    results[id_user] = HTTPStatus.NOT_FOUND
+                    continue
+
+                insert = f"INSERT OR REPLACE INTO {target.table} VALUES (?, ?, ?, ?, ?)"  # noqa: S608
+                with self.database.connection:
+                    self.database.connection.execute("BEGIN")
+                    self.database.connection.execute(insert, row)
+                    self._delete(id_user, ChangeEvent.build(id_user, operation) if operation else None)
+
+                results[id_user] = HTTPStatus.OK
+        return results
+
+    @override
+    async def delete_many(self, ids: Iterable[str], operation: Operation | None = None) -> dict[str, HTTPStatus]:
+        results: dict[str, HTTPStatus] = {}
+        with self.database.lock:
+            for id_user in dict.fromkeys(ids):
+                with self.database.connection:
+                    self.database.connection.execute("BEGIN")
+                    deleted = self._delete(id_user, ChangeEvent.build(id_user, operation) if operation else None)
+                results[id_user] = HTTPStatus.OK if deleted else HTTPStatus.NOT_FOUND
+        return results
+
+    @override
+    async def patch_many(self, payloads: dict[str, dict], operation: Operation | None = None) -> dict[str, HTTPStatus]:
+        results: dict[str, HTTPStatus] = {}
+        with self.database.lock:
+            for id_user, payload in payloads.items():
+                try:
+                    with self.database.connection:
+                        # NOTE: Take the write lock before reading, so no other process can change the user meanwhile
+                        self.database.connection.execute("BEGIN IMMEDIATE")
+                        results[id_user] = self._patch(id_user, payload, operation)
+                except sqlite3.OperationalError:
+                    logger.warning(f"Couldn't lock the database to patch user {id_user}")
+                    results[id_user] = HTTPStatus.CONFLICT
+        return results
+
+    def _patch(self, id_user: str, payload: dict, operation: Operation | None) -> HTTPStatus:
+        """
+        Merge patch the user, writing it only if it changed. Must be called holding the lock, in a transaction.
+
+        Returns:
+            HTTPStatus: The result of the user.
+
+        """
+        query = f"SELECT id, document FROM {self.table} WHERE id = ?"  # noqa: S608
+        if not (row := self.database.connection.execute(query, (id_user,)).fetchone()):
+            return HTTPStatus.NOT_FOUND
+
+        try:
+            new_user, paths = merge_patch(self._to_user(row), payload, exclude={"id", "api_key"})
+        except ValidationError:
+            return HTTPStatus.UNPROCESSABLE_ENTITY
+
+        if paths:
+            changes = UserChanges.from_paths(paths)
+            self._append(ChangeEvent.build(id_user, operation, changes) if operation else None, self._write(new_user))
+        return HTTPStatus.OK
+
+    def _write(self, user: User, *, replace: bool = True) -> datetime:
+        """Write the whole user document, returning its new version. Must be called holding the lock."""
+        document = user.json(exclude={"id"})
+        version = self.database.version()
+        statement = "INSERT OR REPLACE" if replace else "INSERT"
+        self.database.connection.execute(
+            f"{statement} INTO {self.table} VALUES (?, ?, ?, ?, ?)",
+            (str(user.id), document.get("api_key"), document.get("email"), json.dumps(document), version.isoformat()),
+        )
+        return version
+
+    def _delete(self, id_user: str, event: ChangeEvent | None) -> bool:
+        """
+        Delete the user, appending the change event if it existed. Must be called holding the lock, in a transaction.
+
+        Returns:
+            bool: Whether the user existed.
+
+        """
+        cursor = self.database.connection.execute(f"DELETE FROM {self.table} WHERE id = ?", (id_user,))  # noqa: S608
+        if cursor.rowcount:
+            self._append(event, self.database.version())
+        return bool(cursor.rowcount)
+
+    def _append(self, event: ChangeEvent | None, version: datetime) -> None:
+        """Append the change event with the version of the write to the outbox. Must be called in its transaction."""
+        if event:
+            document = event.model_copy(update={"version": version}).model_dump_json()
+            insert = f"INSERT INTO {OUTBOX_COLLECTION} VALUES (?, ?, ?)"  # noqa: S608
+            self.database.connection.execute(insert, (event.id, version.isoformat(), document))
+
+    @staticmethod
+    def _to_user(row: tuple) -> User:
+        """Build a user from its table row."""
+        return User.model_validate({**json.loads(row[1]), "id": row[0]})
+
+
+class SQLiteRouteCollection(RouteRepository):
+    """Collection of event routes stored as rows of a SQLite table."""
+
+    def __init__(self, database: SQLiteDatabase, table: str) -> None:
+        self.database = database
+        self.table = table
+
+    @override
+    async def sync(self, id_user: str, routes: Iterable[EventRoute], id_channels: Iterable[str] | None = None) -> None:
+        channels = set(id_channels) if id_channels is not None else None
+        desired = {route.key: route for route in routes}
+        with self.database.lock, self.database.connection:
+            self.database.connection.execute("BEGIN")
+            query = f"SELECT key, id_channel FROM {self.table} WHERE id_user = ?"  # noqa: S608
+            existing = {
+                key
+                for key, id_channel in self.database.connection.execute(query, (id_user,)).fetchall()
+                if channels is None or id_channel in channels
+            }
+
+            # NOTE: Routes are immutable, so only the new ones are written and the stale ones deleted
+            delete = f"DELETE FROM {self.table} WHERE key = ?"  # noqa: S608
+            self.database.connection.executemany(delete, [(key,) for key in existing - desired.keys()])
+
+            insert = f"INSERT OR REPLACE INTO {self.table} VALUES (?, ?, ?, ?, ?)"  # noqa: S608
+            self.database.connection.executemany(
+                insert,
+                [
+                    (route.key, route.event, route.id_user, route.id_channel, route.channel_type)
+                    for key, route in desired.items()
+                    if key not in existing
+                ],
+            )
+
+    @override
+    async def page(self, event: PublicEvent, limit: int, start_after: str | None = None) -> list[EventRoute]:
+        with self.database.lock:
+            query = (
+                f"SELECT event, id_user, id_channel, channel_type FROM {self.table} "  # noqa: S608
+                "WHERE event = ? AND key > ? ORDER BY key LIMIT ?"
+            )
+            rows = self.database.connection.execute(query, (event, start_after or "", limit)).fetchall()
+
+        return [
+            EventRoute(event=event, id_user=id_user, id_channel=id_channel, channel_type=channel_type)
+            for event, id_user, id_channel, channel_type in rows
+        ]
+
+    @override
+    async def users(self) -> set[str]:
+        with self.database.lock:
+            query = f"SELECT DISTINCT id_user FROM {self.table}"  # noqa: S608
+            rows = self.database.connection.execute(query).fetchall()
+
+        return {id_user for (id_user,) in rows}
+
+
+class SQLiteOutbox(OutboxRepository):
+    """Outbox of change events stored as JSON documents in a SQLite table."""
+
+    def __init__(self, database: SQLiteDatabase, table: str) -> None:
+        self.database = database
+        self.table = table
+
+    @override
+    async def pending(self, limit: int) -> list[ChangeEvent]:
+        with self.database.lock:
+            query = f"SELECT document FROM {self.table} ORDER BY version, id LIMIT ?"  # noqa: S608
+            rows = self.database.connection.execute(query, (limit,)).fetchall()
+
+        return [ChangeEvent.model_validate_json(row[0]) for row in rows]
+
+    @override
+    async def ack(self, ids: Iterable[str]) -> None:
+        with self.database.lock:
+            query = f"DELETE FROM {self.table} WHERE id = ?"  # noqa: S608
+            self.database.connection.executemany(query, [(id_event,) for id_event in ids])
+
+    @override
+    async def lease(self, owner: str, duration: float) -> bool:
+        now = datetime.now(UTC)
+        with self.database.lock, self.database.connection:
+            # NOTE: Take the write lock before reading, so no other process can take the lease meanwhile
+            self.database.connection.execute("BEGIN IMMEDIATE")
+            query = f"SELECT owner, expires_at FROM {OUTBOX_LEASES_COLLECTION} WHERE name = ?"  # noqa: S608
+            row = self.database.connection.execute(query, (self.table,)).fetchone()
+            if row and row[0] != owner and datetime.fromisoformat(row[1]) > now:
+                return False
+
+            upsert = f"INSERT OR REPLACE INTO {OUTBOX_LEASES_COLLECTION} VALUES (?, ?, ?)"  # noqa: S608
+            expires_at = now + timedelta(seconds=duration)
+            self.database.connection.execute(upsert, (self.table, owner, expires_at.isoformat()))
+            return True
@@ -0,0 +1,2 @@
+from .authentication import authenticate
+from .authorization import is_admin
@@ -0,0 +1,47 @@
+from http import HTTPStatus
+from logging import getLogger
+from typing import Annotated
+
+from fastapi import Header
+from fastapi.exceptions import HTTPException
+from fastapi.requests import Request
+
+from cumplo_tailor.controllers import UsersController
+
+logger = getLogger(__name__)
+
+
+async def authenticate(request: Request, x_api_key: Annotated[str | None, Header()] = None) -> None:
+    """
+    Authenticate a request using either the X-API-KEY header or the user's ID in the Pub/Sub event attributes.
+
+    The user is stored in the request state along with its cache version, if any.
+
+    Mirrors `cumplo_common.dependencies.authenticate`, which can't be wrapped: it reads the user synchronously from the
+    `cumplo_common` Firestore client with no way to serve it from the cache or to get its version, so wrapping it would
+    still block on a Firestore read per request. Changes to the shared dependency must be ported here.
+
+    Raises:
+        HTTPException: When the API key is not present or invalid (401)
+
+    """
+    if x_api_key:
+        try:
+            user, version = await UsersController.lookup(api_key=x_api_key)
+        except (KeyError, ValueError):
+            logger.debug("Received invalid API key")
+            raise HTTPException(HTTPStatus.UNAUTHORIZED)  # noqa: B904
+
+    elif (event := getattr(request.state, "event", None)) and event.id_user:
+        try:
+            user, version = await UsersController.lookup(id_user=event.id_user)
+        except (KeyError, ValueError):
+            logger.debug("Received invalid user ID")
+            raise HTTPException(HTTPStatus.UNAUTHORIZED)  # noqa: B904
+
+    else:
+        logger.debug("No authentication method provided")
+        raise HTTPException(HTTPStatus.UNAUTHORIZED)
+
+    request.state.user = user
+    request.state.version = version
@@ -0,0 +1,18 @@
+from http import HTTPStatus
+
+from fastapi.exceptions import HTTPException
+from fastapi.requests import Request
+
+
+async def is_admin(request: Request) -> None:  # noqa: RUF029
+    """
+    Authorize only the admin users, once the request is authenticated.
+
+    Mirrors the `cumplo_common` dependency, whose package builds the Firestore client as soon as it is imported.
+
+    Raises:
+        HTTPException: When the user is not an admin (403)
+
+    """
+    if not request.state.user.is_admin:
+        raise HTTPException(HTTPStatus.FORBIDDEN)
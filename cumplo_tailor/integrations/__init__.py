@@ -1 +1,5 @@
 from .cloud_credentials import CloudCredentials
+from .gmail_history import GmailHistory
+from .operations import OperationPoller
+from .publishers import Publisher, build_publisher
+from .services import GoogleService
@@ -1,57 +1,74 @@
 import asyncio
-from enum import StrEnum
 from http import HTTPStatus
+from logging import getLogger
 
 from fastapi import HTTPException
-from google import auth
-from googleapiclient.discovery import build
 
-from cumplo_tailor.utils.constants import CLOUD_CREDENTIALS_SCOPES, CUMPLO_API_SERVICE
+from cumplo_tailor.integrations.operations import OperationPoller
+from cumplo_tailor.integrations.services import GoogleService
+from cumplo_tailor.utils.constants import (
+    API_KEY_TIMEOUT,
+    API_KEYS_MAX_CONCURRENCY,
+    API_KEYS_MAX_WORKERS,
+    CLOUD_CREDENTIALS_SCOPES,
+    CUMPLO_API_SERVICE,
+)
+from cumplo_tailor.utils.metrics import timed
+
+logger = getLogger(__name__)
 
 
 class CloudCredentials:
     """Google Cloud credentials integration."""
 
-    class OperationKeys(StrEnum):
-        """Keys for the operation response."""
+    apikeys = GoogleService("apikeys", version="v2", scopes=CLOUD_CREDENTIALS_SCOPES, max_workers=API_KEYS_MAX_WORKERS)
+    poller = OperationPoller(apikeys, metric="api_key_operation")
+    semaphore = asyncio.Semaphore(API_KEYS_MAX_CONCURRENCY)
+
+    @classmethod
+    @timed("api_key_creation")
+    async def create_api_key(cls, name: str, deadline: float | None = None) -> str:
+        """
+        Create an API key for the given project ID, limiting how many creations run concurrently.
+
+        Args:
+            name (str): The display name of the API key.
+            deadline (float | None): The event loop time by which the key must be created, including the wait for a
+                free slot and the creation request. Defaults to the configured API key timeout from now.
+
+        Raises:
+            HTTPException: If the deadline is exceeded (504)
 
-        DONE = "done"
-        ERROR = "error"
-        RESPONSE = "response"
+        """
+        deadline = deadline or asyncio.get_running_loop().time() + API_KEY_TIMEOUT
+        try:
+            async with asyncio.timeout_at(deadline), cls.semaphore:
+                return await cls._create_api_key(name, deadline)
+        except TimeoutError:
+            logger.warning(f"API key {name} not created before the deadline")
+            raise HTTPException(HTTPStatus.GATEWAY_TIMEOUT, detail="The API key creation timed out")  # noqa: B904
 
     @classmethod
-    async def create_api_key(cls, name: str, delay: int = 1) -> str:
-        """Create an API key for the given project ID."""
-        credentials, project_id = auth.default(scopes=CLOUD_CREDENTIALS_SCOPES)
-        apikeys_service = build("apikeys", version="v2", credentials=credentials)
+    async def _create_api_key(cls, name: str, deadline: float) -> str:
+        """
+        Create an API key for the given project ID.
+
+        Raises:
+            HTTPException: If the operation response has no key (502)
+
+        """
+        apikeys_service = cls.apikeys.service
 
         body = {
             "displayName": name,
             "restrictions": {"apiTargets": [{"service": CUMPLO_API_SERVICE}]},
         }
 
-        parent = f"projects/{project_id}/locations/global"
-        operation = apikeys_service.projects().locations().keys().create(parent=parent, body=body).execute()
-
-        async def poll() -> dict:
-            """
-            Poll asynchronously for the operation to complete.
-
-            Raises:
-                HTTPException: If the API key creation fails.
-
-            """
-            operation_service = apikeys_service.operations()
-            while True:
-                result = operation_service.get(name=operation["name"]).execute()
-                if cls.OperationKeys.DONE in result:
-                    if cls.OperationKeys.RESPONSE in result:
-                        return result[cls.OperationKeys.RESPONSE]
-                    if cls.OperationKeys.ERROR in result:
-                        error = result[cls.OperationKeys.ERROR]
-                        raise HTTPException(HTTPStatus.BAD_GATEWAY, detail=error["message"])
-
-                await asyncio.sleep(delay)
+        parent = f"projects/{cls.apikeys.project_id}/locations/global"
+        request = apikeys_service.projects().locations().keys().create(parent=parent, body=body)
+        operation = await cls.apikeys.run(request)
 
-        response = await asyncio.wait_for(poll(), timeout=30)
-        return response["keyString"]
+        response = await cls.poller.wait(apikeys_service.operations(), operation["name"], deadline)
+        if not (key := response.get("keyString")):
+            raise HTTPException(HTTPStatus.BAD_GATEWAY, detail="The API key was created without a key string")
+        return key
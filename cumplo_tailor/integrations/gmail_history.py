@@ -0,0 +1,106 @@
+from email.utils import parseaddr
+from http import HTTPStatus
+from logging import getLogger
+from typing import TYPE_CHECKING, Any
+
+from cumplo_tailor.integrations.services import GoogleService
+from cumplo_tailor.utils.constants import GMAIL_BATCH_SIZE, GMAIL_DELEGATED_USER, GMAIL_LABEL, GMAIL_MAX_WORKERS
+from cumplo_tailor.utils.metrics import metrics
+
+if TYPE_CHECKING:
+    from googleapiclient.errors import HttpError
+
+logger = getLogger(__name__)
+
+GMAIL_SCOPES = ["https://www.googleapis.com/auth/gmail.readonly"]
+
+
+class GmailHistory:
+    """Incremental access to the Gmail mailbox through its history."""
+
+    gmail = GoogleService(
+        "gmail", version="v1", scopes=GMAIL_SCOPES, max_workers=GMAIL_MAX_WORKERS, subject=GMAIL_DELEGATED_USER
+    )
+
+    @classmethod
+    async def list_messages(cls, start_history_id: int) -> tuple[list[str], int] | None:
+        """
+        List the IDs of the messages added to the label since the given history ID.
+
+        Gmail only keeps the history for a limited time, answering with a 404 when the given history ID is too old.
+
+        Raises:
+            HttpError: When Gmail fails with anything but an expired history.
+
+        Returns:
+            tuple[list[str], int] | None: The IDs of the added messages and the latest history ID of the mailbox, or
+                None when the history ID has expired.
+
+        """
+        from googleapiclient.errors import HttpError  # noqa: PLC0415
+
+        history = cls.gmail.service.users().history()
+        ids: dict[str, None] = {}
+        latest, page_token = start_history_id, None
+
+        while True:
+            request = history.list(
+                userId="me",
+                startHistoryId=start_history_id,
+                historyTypes="messageAdded",
+                labelId=GMAIL_LABEL or None,
+                pageToken=page_token,
+            )
+            try:
+                response = await cls.gmail.run(request)
+            except HttpError as error:
+                if error.resp.status != HTTPStatus.NOT_FOUND:
+                    raise
+                metrics.increment("gmail_history_expirations")
+                logger.warning(f"Gmail history {start_history_id} has expired")
+                return None
+
+            latest = max(latest, int(response.get("historyId", latest)))
+
+            for record in response.get("history", []):
+                for added in record.get("messagesAdded", []):
+                    ids[added["message"]["id"]] = None
+
+            if not (page_token := response.get("nextPageToken")):
+                break
+
+        logger.info(f"Found {len(ids)} messages added since history {start_history_id}")
+        return list(ids), latest
+
+    @classmethod
+    async def get_messages(cls, ids: list[str]) -> list[dict]:
+        """
+        Get the sender and snippet of the given messages, fetching them in batched requests.
+
+        Returns:
+            list[dict]: The messages with their `id`, `sender` and `snippet`.
+
+        """
+        messages: list[dict] = []
+
+        def callback(request_id: str, response: dict[str, Any] | None, error: "HttpError | None") -> None:
+            if error or not response:
+                logger.warning(f"Failed to get message {request_id}: {error}")
+                return
+
+            headers = {header["name"].casefold(): header["value"] for header in response["payload"]["headers"]}
+            messages.append({
+                "id": response["id"],
+                "sender": parseaddr(headers.get("from", ""))[1],
+                "snippet": response.get("snippet", ""),
+            })
+
+        resource = cls.gmail.service.users().messages()
+        for start in range(0, len(ids), GMAIL_BATCH_SIZE):
+            batch = cls.gmail.service.new_batch_http_request(callback=callback)
+            for id_message in ids[start : start + GMAIL_BATCH_SIZE]:
+                request = resource.get(userId="me", id=id_message, format="metadata", metadataHeaders=["From"])
+                batch.add(request, request_id=id_message)
+            await cls.gmail.run(batch)
+
+        return messages
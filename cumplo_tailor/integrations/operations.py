@@ -0,0 +1,105 @@
+import asyncio
+import random
+from collections.abc import Iterator
+from enum import StrEnum
+from http import HTTPStatus
+from logging import getLogger
+from typing import TYPE_CHECKING
+
+from fastapi import HTTPException
+
+from cumplo_tailor.integrations.services import GoogleService
+from cumplo_tailor.utils.constants import (
+    OPERATION_FAST_POLL_DELAY,
+    OPERATION_FAST_POLLS,
+    OPERATION_INITIAL_POLL_DELAY,
+    OPERATION_MAX_POLL_DELAY,
+)
+from cumplo_tailor.utils.metrics import COUNT_BUCKETS, metrics
+
+if TYPE_CHECKING:
+    from googleapiclient.discovery import Resource
+
+logger = getLogger(__name__)
+
+
+class OperationPoller:
+    """
+    Poller for the long-running operations of a Google API.
+
+    Operations are first polled a few times with a short delay, since most of them finish quickly, and then with an
+    exponentially growing delay with jitter so slow operations don't burn quota.
+    """
+
+    class OperationKeys(StrEnum):
+        """Keys for the operation response."""
+
+        DONE = "done"
+        ERROR = "error"
+        RESPONSE = "response"
+
+    def __init__(self, service: GoogleService, metric: str) -> None:
+        self.service = service
+        self.metric = metric
+
+    @staticmethod
+    def delays() -> Iterator[float]:
+        """
+        Get the delays between polls: a fast phase followed by an exponential backoff with jitter.
+
+        Yields:
+            float: The delay before the next poll, in seconds.
+
+        """
+        for _ in range(OPERATION_FAST_POLLS):
+            yield OPERATION_FAST_POLL_DELAY
+
+        delay = OPERATION_INITIAL_POLL_DELAY
+        while True:
+            yield random.uniform(delay / 2, delay)  # noqa: S311
+            delay = min(delay * 2, OPERATION_MAX_POLL_DELAY)
+
+    async def wait(self, operations: "Resource", name: str, deadline: float) -> dict:
+        """
+        Wait for the operation to complete.
+
+        Args:
+            operations (Resource): The operations resource of the service.
+            name (str): The name of the operation.
+            deadline (float): The event loop time by which the operation must be done.
+
+        Raises:
+            HTTPException: If the operation fails or is done without a response (502)
+            HTTPException: If the deadline is exceeded (504)
+
+        Returns:
+            dict: The response of the operation.
+
+        """
+        loop = asyncio.get_running_loop()
+        start, polls = loop.time(), 0
+        try:
+            async with asyncio.timeout_at(deadline):
+                for delay in self.delays():
+                    polls += 1
+                    result = await self.service.run(operations.get(name=name))
+                    if self.OperationKeys.DONE in result:
+                        break
+                    await asyncio.sleep(delay)
+
+        except TimeoutError:
+            metrics.increment(f"{self.metric}_timeouts")
+            logger.warning(f"Operation {name} not done after {polls} polls")
+            raise HTTPException(HTTPStatus.GATEWAY_TIMEOUT, detail="The operation timed out")  # noqa: B904
+
+        metrics.observe(f"{self.metric}_seconds", loop.time() - start)
+        metrics.observe(f"{self.metric}_polls", polls, buckets=COUNT_BUCKETS)
+
+        if self.OperationKeys.ERROR in result:
+            error = result[self.OperationKeys.ERROR]
+            raise HTTPException(HTTPStatus.BAD_GATEWAY, detail=error["message"])
+
+        if not (response := result.get(self.OperationKeys.RESPONSE)):
+            raise HTTPException(HTTPStatus.BAD_GATEWAY, detail="The operation is done without a response")
+
+        return response
@@ -0,0 +1,140 @@
+import asyncio
+from abc import ABC, abstractmethod
+from functools import cached_property
+from logging import getLogger
+from typing import TYPE_CHECKING, override
+
+from cumplo_tailor.database.outbox import ChangeEvent
+from cumplo_tailor.utils.constants import OUTBOX_FILE, OUTBOX_PUBLISHER, OUTBOX_TOPIC, PROJECT_ID
+
+if TYPE_CHECKING:
+    from google.cloud.pubsub import PublisherClient
+
+logger = getLogger(__name__)
+
+
+class Publisher(ABC):
+    """Destination of the change events relayed from the outbox."""
+
+    @abstractmethod
+    async def publish(self, events: list[ChangeEvent]) -> set[str]:
+        """
+        Publish the events, keeping the order of the ones of each user.
+
+        Args:
+            events (list[ChangeEvent]): The events, ordered by their version.
+
+        Returns:
+            set[str]: The IDs of the delivered events. The events of a user are only delivered up to its first failure.
+
+        """
+
+
+class PubSubPublisher(Publisher):
+    """Publisher sending each event as a Pub/Sub message, ordered by the ID of its user."""
+
+    def __init__(self, topic: str) -> None:
+        self.topic_name = topic
+
+    @cached_property
+    def client(self) -> "PublisherClient":
+        """The Pub/Sub publisher client, with message ordering enabled and built on the first publication."""
+        from google.cloud.pubsub import PublisherClient  # noqa: PLC0415
+        from google.cloud.pubsub_v1.types import PublisherOptions  # noqa: PLC0415
+
+        return PublisherClient(publisher_options=PublisherOptions(enable_message_ordering=True))
+
+    @cached_property
+    def topic(self) -> str:
+        """The full path of the topic."""
+        return self.client.topic_path(PROJECT_ID, self.topic_name)
+
+    @override
+    async def publish(self, events: list[ChangeEvent]) -> set[str]:
+        futures = [
+            self.client.publish(
+                self.topic,
+                event.model_dump_json().encode(),
+                ordering_key=event.id_user,
+                id_user=event.id_user,
+                resource=event.resource,
+                operation=event.operation,
+            )
+            for event in events
+        ]
+        results = await asyncio.gather(*(asyncio.wrap_future(future) for future in futures), return_exceptions=True)
+
+        delivered: set[str] = set()
+        failed: set[str] = set()
+        for event, result in zip(events, results, strict=True):
+            if isinstance(result, BaseException) or event.id_user in failed:
+                failed.add(event.id_user)
+                continue
+            delivered.add(event.id)
+
+        # NOTE: A failed publication pauses its ordering key, which must be resumed before the events are retried
+        for id_user in failed:
+            logger.warning(f"Failed to publish the change events of user {id_user}")
+            self.client.resume_publish(self.topic, id_user)
+
+        return delivered
+
+
+class FilePublisher(Publisher):
+    """Local stand-in for Pub/Sub appending each event to a file as a JSON line."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    @override
+    async def publish(self, events: list[ChangeEvent]) -> set[str]:
+        with open(self.path, "a", encoding="utf-8") as file:  # noqa: ASYNC230, PTH123
+            file.writelines(f"{event.model_dump_json()}\n" for event in events)
+        return {event.id for event in events}
+
+
+class LogPublisher(Publisher):
+    """Publisher logging each event, so the outbox can be drained before a real destination is set up."""
+
+    @override
+    async def publish(self, events: list[ChangeEvent]) -> set[str]:
+        for event in events:
+            logger.info(f"Change event {event.id}: {event.operation} {event.resource} of user {event.id_user}")
+        return {event.id for event in events}
+
+
+class MemoryPublisher(Publisher):
+    """In-process stand-in for Pub/Sub keeping the published events in a list."""
+
+    def __init__(self) -> None:
+        self.events: list[ChangeEvent] = []
+
+    @override
+    async def publish(self, events: list[ChangeEvent]) -> set[str]:
+        self.events.extend(events)
+        return {event.id for event in events}
+
+
+def build_publisher() -> Publisher:
+    """
+    Build the publisher set in `OUTBOX_PUBLISHER`.
+
+    Raises:
+        ValueError: When the publisher is unknown.
+
+    Returns:
+        Publisher: The publisher of the change events.
+
+    """
+    match OUTBOX_PUBLISHER:
+        case "log":
+            return LogPublisher()
+        case "pubsub":
+            return PubSubPublisher(OUTBOX_TOPIC)
+        case "file":
+            return FilePublisher(OUTBOX_FILE)
+        case "memory":
+            return MemoryPublisher()
+        case _:
+            message = f"Unknown outbox publisher {OUTBOX_PUBLISHER}"
+            raise ValueError(message)
@@ -0,0 +1,121 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from logging import getLogger
+from threading import Lock, local
+from typing import TYPE_CHECKING, overload
+
+from cumplo_tailor.utils.metrics import Timer
+
+if TYPE_CHECKING:
+    from google.auth.credentials import Credentials
+    from googleapiclient.discovery import Resource
+    from googleapiclient.http import BatchHttpRequest, HttpRequest
+
+logger = getLogger(__name__)
+
+
+class GoogleService:
+    """
+    Process-wide Google API discovery client built lazily on first use.
+
+    The discovery document and the default credentials are resolved once and shared across threads, while each thread
+    executes its requests on its own authorized HTTP client since `httplib2` is not thread-safe. Blocking requests are
+    run on a dedicated, bounded executor so they never stall the event loop. The Google API client libraries are only
+    imported along with the client, keeping them out of the cold start.
+    """
+
+    def __init__(
+        self, name: str, version: str, scopes: list[str], max_workers: int, subject: str | None = None
+    ) -> None:
+        self.name = name
+        self.version = version
+        self.scopes = scopes
+        self.max_workers = max_workers
+        self.subject = subject
+        self._lock = Lock()
+        self._executor: ThreadPoolExecutor | None = None
+        self._local = local()
+        self._service: Resource | None = None
+        self._credentials: Credentials | None = None
+        self._project_id: str | None = None
+
+    @property
+    def service(self) -> "Resource":
+        """The discovery client of the service."""
+        if self._service is None:
+            self._initialize()
+        return self._service
+
+    @property
+    def project_id(self) -> str:
+        """The project ID of the default credentials."""
+        if self._service is None:
+            self._initialize()
+        return self._project_id or ""
+
+    def execute(self, request: "HttpRequest | BatchHttpRequest") -> dict | None:
+        """
+        Execute a request of the service on the thread's HTTP client, refreshing the credentials if needed.
+
+        Each request is timed by the API method it calls, or as a batch. Batches return nothing since their responses
+        are handed to their callback.
+        """
+        import httplib2  # noqa: PLC0415
+        from google_auth_httplib2 import AuthorizedHttp  # noqa: PLC0415
+
+        method = getattr(request, "methodId", None) or "batch"
+        with Timer("google_api_request", service=self.name, method=method):
+            self._refresh()
+            if not (http := getattr(self._local, "http", None)):
+                http = self._local.http = AuthorizedHttp(self._credentials, http=httplib2.Http())
+            return request.execute(http=http)
+
+    @overload
+    async def run(self, request: "HttpRequest") -> dict: ...
+
+    @overload
+    async def run(self, request: "BatchHttpRequest") -> None: ...
+
+    async def run(self, request: "HttpRequest | BatchHttpRequest") -> dict | None:
+        """Execute a request of the service on the dedicated executor without blocking the event loop."""
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    prefix = f"{self.name}-{self.version}"
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=prefix)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.execute, request)
+
+    def _initialize(self) -> None:
+        """Resolve the default credentials and build the discovery client once."""
+        from google import auth  # noqa: PLC0415
+        from googleapiclient.discovery import build  # noqa: PLC0415
+
+        with self._lock:
+            if self._service is not None:
+                return
+
+            logger.info(f"Building {self.name} {self.version} Google API client")
+            credentials, project_id = auth.default(scopes=self.scopes)
+            if self.subject:
+                # NOTE: Impersonate the user through the service account's domain-wide delegation
+                credentials = credentials.with_subject(self.subject)
+
+            self._credentials, self._project_id = credentials, project_id
+            self._service = build(self.name, version=self.version, credentials=credentials, cache_discovery=False)
+
+    def _refresh(self) -> None:
+        """Refresh the shared credentials when they are expired, making sure only one thread does it."""
+        if self._service is None:
+            self._initialize()
+
+        if self._credentials is None or self._credentials.valid:
+            return
+
+        from google.auth.transport.requests import Request  # noqa: PLC0415
+
+        with self._lock:
+            if not self._credentials.valid:
+                logger.debug(f"Refreshing {self.name} Google API credentials")
+                self._credentials.refresh(Request())
@@ -1,9 +1,10 @@
+import asyncio
 import json
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 from http import HTTPStatus
-from logging import DEBUG, ERROR, basicConfig, getLogger
+from logging import ERROR, getLogger
 
-import google.cloud.logging
-from cumplo_common.dependencies import authenticate, is_admin
 from cumplo_common.middlewares import PubSubMiddleware
 from fastapi import Depends, FastAPI
 from fastapi.encoders import jsonable_encoder
@@ -11,24 +12,61 @@ from fastapi.requests import Request
 from fastapi.responses import JSONResponse
 from pydantic import ValidationError
 
-from cumplo_tailor.routers import channels, credentials, filters, subscriptions, users
-from cumplo_tailor.utils.constants import IS_TESTING, LOG_FORMAT
+from cumplo_tailor.controllers import OutboxController
+from cumplo_tailor.dependencies import authenticate, is_admin
+from cumplo_tailor.middlewares import MetricsMiddleware
+from cumplo_tailor.routers import (
+    channels,
+    credentials,
+    filters,
+    limits,
+    metrics,
+    onboarding,
+    outbox,
+    routes,
+    subscriptions,
+    users,
+)
+from cumplo_tailor.startup import warm_up
+from cumplo_tailor.utils import logs
+from cumplo_tailor.utils.constants import DISABLE_METRICS, ENABLE_OUTBOX_RELAY, LAZY_STARTUP, LOG_LEVEL
 
 # NOTE: Mute noisy third-party loggers
 for module in ("google", "urllib3", "werkzeug", "googleapiclient"):
     getLogger(module).setLevel(ERROR)
 
-getLogger("cumplo_common").setLevel(DEBUG)
+getLogger("cumplo_common").setLevel(LOG_LEVEL)
 
-if IS_TESTING:
-    basicConfig(level=DEBUG, format=LOG_FORMAT)
-else:
-    client = google.cloud.logging.Client()
-    client.setup_logging(log_level=DEBUG)
+logs.setup()
 
-app = FastAPI()
+
+@asynccontextmanager
+async def _lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    """
+    Warm up the clients before serving, or in the background when starting lazily so the server listens at once.
+
+    The outbox relay runs in the background while serving when enabled.
+    """
+    tasks = []
+    if LAZY_STARTUP:
+        tasks.append(asyncio.create_task(warm_up()))
+    else:
+        await warm_up()
+
+    if ENABLE_OUTBOX_RELAY:
+        tasks.append(asyncio.create_task(OutboxController.run()))
+
+    yield
+    for task in tasks:
+        task.cancel()
+
+
+app = FastAPI(lifespan=_lifespan)
 app.add_middleware(PubSubMiddleware)
 
+if not DISABLE_METRICS:
+    app.add_middleware(MetricsMiddleware)
+
 
 @app.exception_handler(ValidationError)
 async def _validation_error_handler(_request: Request, error: ValidationError) -> JSONResponse:  # noqa: RUF029
@@ -39,6 +77,11 @@ async def _validation_error_handler(_request: Request, error: ValidationError) -
 
 # Admin routes
 app.include_router(users.private.router, dependencies=[Depends(authenticate), Depends(is_admin)])
+app.include_router(metrics.router, dependencies=[Depends(authenticate), Depends(is_admin)])
+app.include_router(onboarding.router, dependencies=[Depends(authenticate), Depends(is_admin)])
+app.include_router(limits.router, dependencies=[Depends(authenticate), Depends(is_admin)])
+app.include_router(routes.router, dependencies=[Depends(authenticate), Depends(is_admin)])
+app.include_router(outbox.router, dependencies=[Depends(authenticate), Depends(is_admin)])
 
 # Public routes
 app.include_router(users.public.router, dependencies=[Depends(authenticate)])
@@ -0,0 +1,3 @@
+from .metrics import MetricsMiddleware
+
+__all__ = ["MetricsMiddleware"]
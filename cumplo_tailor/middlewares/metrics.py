@@ -0,0 +1,40 @@
+from http import HTTPStatus
+from time import perf_counter
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from cumplo_tailor.utils.metrics import metrics
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware timing every request into the `http_request_seconds` histogram.
+
+    Requests are labelled with the path template of the matched route instead of the requested path, so the amount of
+    series stays bounded whatever the IDs in the URLs.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Time the request, keeping track of the status code sent in the response."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = HTTPStatus.INTERNAL_SERVER_ERROR
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = getattr(scope.get("route"), "path", "unmatched")
+            labels = {"method": scope["method"], "route": route, "status": str(int(status))}
+            metrics.observe("http_request_seconds", perf_counter() - start, **labels)
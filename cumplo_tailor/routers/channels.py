@@ -1,11 +1,9 @@
 from http import HTTPStatus
 from logging import getLogger
-from typing import cast
+from typing import Annotated, cast
 
 import ulid
-from cumplo_common.database import firestore
 from cumplo_common.models.channel import (
-    ALL_EVENTS,
     CHANNEL_CONFIGURATION_BY_TYPE,
     ChannelType,
     IFTTTConfiguration,
@@ -13,26 +11,40 @@ from cumplo_common.models.channel import (
     WebhookConfiguration,
 )
 from cumplo_common.models.user import User
-from fastapi import APIRouter
+from fastapi import APIRouter, Body, Response
 from fastapi.exceptions import HTTPException
 from fastapi.requests import Request
+from pydantic import BaseModel, Field
 
-from cumplo_tailor.controllers import ChannelsController
+from cumplo_tailor.controllers import ChannelsController, LimitsController, UsersController
+from cumplo_tailor.controllers.limits import EVENTS
+from cumplo_tailor.database import UserChanges
+from cumplo_tailor.utils.constants import MAX_BATCH_OPERATIONS
+from cumplo_tailor.utils.fingerprints import UserIndex
+from cumplo_tailor.utils.representations import respond
+from cumplo_tailor.utils.serialization import channel_serializer, json_response
 
 logger = getLogger(__name__)
 
 router = APIRouter(prefix="/channels")
 
 
+class ChannelEvents(BaseModel):
+    """Model for the events to enable and disable on a channel."""
+
+    enable: set[PublicEvent] = Field(default_factory=set)
+    disable: set[PublicEvent] = Field(default_factory=set)
+
+
 @router.get("", status_code=HTTPStatus.OK)
-def _list_channels(request: Request) -> list[dict]:
+async def _list_channels(request: Request) -> Response:
     """List the existing channel configurations."""
     user = cast(User, request.state.user)
-    return [channel.json() for channel in user.channels.values()]
+    return respond(request, lambda: channel_serializer.many(user.channels.values()))
 
 
 @router.get("/{id_channel}", status_code=HTTPStatus.OK)
-def _retrieve_channel(request: Request, id_channel: str) -> dict:
+async def _retrieve_channel(request: Request, id_channel: str) -> Response:
     """
     Retrieve a single channel configuration.
 
@@ -44,215 +56,297 @@ def _retrieve_channel(request: Request, id_channel: str) -> dict:
     if not (configuration := user.channels.get(id_channel)):
         raise HTTPException(HTTPStatus.NOT_FOUND)
 
-    return configuration.json()
+    return respond(request, lambda: channel_serializer.one(configuration))
 
 
 @router.post("/{channel_type}", status_code=HTTPStatus.CREATED)
-def _create_channel(request: Request, channel_type: ChannelType, payload: dict) -> dict:
-    """
-    Create a new channel configuration.
+async def _create_channel(request: Request, channel_type: ChannelType, payload: dict) -> Response:
+    """Create a new channel configuration."""
+    id_channel = ulid.new()
 
-    Raises:
-        HTTPException: If the channel already exists (409)
+    def mutation(user: User) -> UserChanges:
+        """
+        Add the channel to the user.
 
-    """
-    user = cast(User, request.state.user)
+        Raises:
+            HTTPException: If the channel already exists (409)
+
+        """
+        channel = CHANNEL_CONFIGURATION_BY_TYPE[channel_type].model_validate({"id": id_channel, **payload})
+        index = UserIndex(user)
+        LimitsController.check(str(user.id), ChannelsController.usage(index, [channel]))
+        ChannelsController.validate(user, channel, index)
+
+        if index.find_channel(channel):
+            raise HTTPException(HTTPStatus.CONFLICT, detail="The Channel already exists")
+
+        user.channels[str(channel.id)] = channel
+        return UserChanges(channels={str(channel.id)})
+
+    user = await UsersController.mutate(cast(User, request.state.user), mutation)
+    return json_response(channel_serializer.one(user.channels[str(id_channel)]), HTTPStatus.CREATED)
+
+
+@router.post(":batch", status_code=HTTPStatus.CREATED)
+async def _create_channels(
+    request: Request, payload: Annotated[list[dict], Body(min_length=1, max_length=MAX_BATCH_OPERATIONS)]
+) -> Response:
+    """Create many channel configurations at once, each one with its `type`, validating and persisting them together."""
+    ids = [ulid.new() for _ in payload]
+
+    def mutation(user: User) -> UserChanges:
+        """
+        Add every channel to the user, validating them against the final state.
+
+        Raises:
+            HTTPException: If a channel has a missing or invalid type (400)
+            HTTPException: If a channel already exists (409)
+
+        """
+        index = UserIndex(user)
+        channels = []
+        for id_channel, item in zip(ids, payload, strict=True):
+            data = dict(item)
+            try:
+                channel_type = ChannelType(data.pop("type"))
+            except (KeyError, ValueError):
+                raise HTTPException(HTTPStatus.BAD_REQUEST, detail="Each channel must have a valid type")  # noqa: B904
 
-    channel = CHANNEL_CONFIGURATION_BY_TYPE[channel_type].model_validate({"id": ulid.new(), **payload})
-    ChannelsController.validate(user, channel)
+            channel = CHANNEL_CONFIGURATION_BY_TYPE[channel_type].model_validate({"id": id_channel, **data})
+            if index.find_channel(channel):
+                raise HTTPException(HTTPStatus.CONFLICT, detail="The Channel already exists")
 
-    if channel in user.channels.values():
-        raise HTTPException(HTTPStatus.CONFLICT, detail="The Channel already exists")
+            user.channels[str(channel.id)] = channel
+            index.add_channel(channel)
+            channels.append(channel)
 
-    user.channels[str(channel.id)] = channel
-    firestore.client.users.put(user)
+        # NOTE: Validate against the final state so the limits account for the whole batch, checked once for all of it
+        LimitsController.check(str(user.id), ChannelsController.usage(index, channels))
+        for channel in channels:
+            ChannelsController.validate(user, channel, index)
 
-    return channel.json()
+        return UserChanges(channels={str(channel.id) for channel in channels})
+
+    user = await UsersController.mutate(cast(User, request.state.user), mutation)
+    channels = (user.channels[str(id_channel)] for id_channel in ids)
+    return json_response(channel_serializer.many(channels), HTTPStatus.CREATED)
 
 
 @router.patch("/whatsapp", status_code=HTTPStatus.OK)
-def _update_whatsapp_channel(request: Request, payload: dict) -> dict:
-    """
-    Update the WhatsApp channel phone number.
+async def _update_whatsapp_channel(request: Request, payload: dict) -> Response:
+    """Update the WhatsApp channel phone number."""
 
-    Raises:
-        HTTPException: If no WhatsApp channel exists (404)
-        HTTPException: If phone number is missing from payload (400)
-        HTTPException: If phone number is unchanged (200)
+    def mutation(user: User) -> UserChanges:
+        """
+        Update the phone number of the WhatsApp channel of the user.
 
-    """
-    user = cast(User, request.state.user)
+        Raises:
+            HTTPException: If no WhatsApp channel exists (404)
+            HTTPException: If phone number is missing from payload (400)
+            HTTPException: If phone number is unchanged (200)
 
-    # Find the WhatsApp channel
-    channel = next((channel for channel in user.channels.values() if channel.type_ == ChannelType.WHATSAPP), None)
-    if not channel:
-        raise HTTPException(HTTPStatus.NOT_FOUND)
+        """
+        # Find the WhatsApp channel
+        channel = next((channel for channel in user.channels.values() if channel.type_ == ChannelType.WHATSAPP), None)
+        if not channel:
+            raise HTTPException(HTTPStatus.NOT_FOUND)
 
-    if not (phone_number := payload.get("phone_number")):
-        raise HTTPException(HTTPStatus.BAD_REQUEST)
+        if not (phone_number := payload.get("phone_number")):
+            raise HTTPException(HTTPStatus.BAD_REQUEST)
 
-    if phone_number == channel.phone_number:
-        raise HTTPException(HTTPStatus.OK, detail="Nothing to update")
+        if phone_number == channel.phone_number:
+            raise HTTPException(HTTPStatus.OK, detail="Nothing to update")
 
-    # Update only the phone number
-    channel.phone_number = str(phone_number)
+        # Update only the phone number
+        channel.phone_number = str(phone_number)
 
-    user.channels[str(channel.id)] = channel
-    firestore.client.users.put(user)
+        user.channels[str(channel.id)] = channel
+        return UserChanges(channels={str(channel.id)})
 
-    return channel.json()
+    user = await UsersController.mutate(cast(User, request.state.user), mutation)
+    channel = next(channel for channel in user.channels.values() if channel.type_ == ChannelType.WHATSAPP)
+    return json_response(channel_serializer.one(channel))
 
 
 @router.patch("/webhook/{id_channel}", status_code=HTTPStatus.OK)
-def _update_webhook_channel(request: Request, id_channel: str, payload: dict) -> dict:
-    """
-    Update the webhook channel URL.
+async def _update_webhook_channel(request: Request, id_channel: str, payload: dict) -> Response:
+    """Update the webhook channel URL."""
 
-    Raises:
-        HTTPException: If no webhook channel exists (404)
-        HTTPException: If URL is missing from payload (400)
-        HTTPException: If URL is unchanged (200)
+    def mutation(user: User) -> UserChanges:
+        """
+        Update the URL of the webhook channel of the user.
 
-    """
-    user = cast(User, request.state.user)
+        Raises:
+            HTTPException: If no webhook channel exists (404)
+            HTTPException: If URL is missing from payload (400)
+            HTTPException: If URL is unchanged (200)
 
-    # Find the webhook channel
-    if not (channel := user.channels.get(id_channel)):
-        raise HTTPException(HTTPStatus.NOT_FOUND)
+        """
+        # Find the webhook channel
+        if not (channel := user.channels.get(id_channel)):
+            raise HTTPException(HTTPStatus.NOT_FOUND)
 
-    if channel.type_ != ChannelType.WEBHOOK:
-        raise HTTPException(HTTPStatus.BAD_REQUEST)
+        if channel.type_ != ChannelType.WEBHOOK:
+            raise HTTPException(HTTPStatus.BAD_REQUEST)
 
-    channel = cast(WebhookConfiguration, channel)
+        channel = cast(WebhookConfiguration, channel)
 
-    if not (url := payload.get("url")):
-        raise HTTPException(HTTPStatus.BAD_REQUEST)
+        if not (url := payload.get("url")):
+            raise HTTPException(HTTPStatus.BAD_REQUEST)
 
-    if url == channel.url:
-        raise HTTPException(HTTPStatus.OK, detail="Nothing to update")
+        if url == channel.url:
+            raise HTTPException(HTTPStatus.OK, detail="Nothing to update")
 
-    # Update only the URL
-    channel.url = str(url)
+        # Update only the URL
+        channel.url = str(url)
 
-    user.channels[str(channel.id)] = channel
-    firestore.client.users.put(user)
+        user.channels[str(channel.id)] = channel
+        return UserChanges(channels={str(channel.id)})
 
-    return channel.json()
+    user = await UsersController.mutate(cast(User, request.state.user), mutation)
+    return json_response(channel_serializer.one(user.channels[id_channel]))
 
 
 @router.patch("/ifttt/{id_channel}", status_code=HTTPStatus.OK)
-def _update_ifttt_channel(request: Request, id_channel: str, payload: dict) -> dict:
-    """
-    Update the IFTTT channel event.
+async def _update_ifttt_channel(request: Request, id_channel: str, payload: dict) -> Response:
+    """Update the IFTTT channel event."""
 
-    Raises:
-        HTTPException: If no IFTTT channel exists (404)
-        HTTPException: If key is missing from payload (400)
-        HTTPException: If key is unchanged (200)
+    def mutation(user: User) -> UserChanges:
+        """
+        Update the event of the IFTTT channel of the user.
 
-    """
-    user = cast(User, request.state.user)
+        Raises:
+            HTTPException: If no IFTTT channel exists (404)
+            HTTPException: If key is missing from payload (400)
+            HTTPException: If key is unchanged (200)
 
-    # Find the IFTTT channel
-    if not (channel := user.channels.get(id_channel)):
-        raise HTTPException(HTTPStatus.NOT_FOUND)
+        """
+        # Find the IFTTT channel
+        if not (channel := user.channels.get(id_channel)):
+            raise HTTPException(HTTPStatus.NOT_FOUND)
 
-    if channel.type_ != ChannelType.IFTTT:
-        raise HTTPException(HTTPStatus.BAD_REQUEST)
+        if channel.type_ != ChannelType.IFTTT:
+            raise HTTPException(HTTPStatus.BAD_REQUEST)
 
-    channel = cast(IFTTTConfiguration, channel)
+        channel = cast(IFTTTConfiguration, channel)
 
-    if not (event := payload.get("event")):
-        raise HTTPException(HTTPStatus.BAD_REQUEST)
+        if not (event := payload.get("event")):
+            raise HTTPException(HTTPStatus.BAD_REQUEST)
 
-    if event == channel.event:
-        raise HTTPException(HTTPStatus.OK, detail="Nothing to update")
+        if event == channel.event:
+            raise HTTPException(HTTPStatus.OK, detail="Nothing to update")
 
-    # Update only the event
-    channel.event = str(event)
+        # Update only the event
+        channel.event = str(event)
 
-    user.channels[str(channel.id)] = channel
-    firestore.client.users.put(user)
+        user.channels[str(channel.id)] = channel
+        return UserChanges(channels={str(channel.id)})
 
-    return channel.json()
+    user = await UsersController.mutate(cast(User, request.state.user), mutation)
+    return json_response(channel_serializer.one(user.channels[id_channel]))
 
 
 @router.post("/{id_channel}/events/{event}", status_code=HTTPStatus.NO_CONTENT)
-def _enable_channel_event(request: Request, id_channel: str, event: PublicEvent) -> None:
-    """
-    Enable an event for a specific channel.
+async def _enable_channel_event(request: Request, id_channel: str, event: PublicEvent) -> None:
+    """Enable an event for a specific channel."""
 
-    Raises:
-        HTTPException: If the channel is not found (404)
-        HTTPException: If the event is already enabled (409)
+    def mutation(user: User) -> UserChanges:
+        """
+        Enable the event on the channel of the user.
 
-    """
-    user = cast(User, request.state.user)
-    if not (channel := user.channels.get(id_channel)):
-        raise HTTPException(HTTPStatus.NOT_FOUND)
+        Raises:
+            HTTPException: If the channel is not found (404)
+            HTTPException: If the event is already enabled or the max amount of events is reached (409)
+
+        """
+        if not (channel := user.channels.get(id_channel)):
+            raise HTTPException(HTTPStatus.NOT_FOUND)
 
-    if channel.enabled_events == ALL_EVENTS or event in channel.enabled_events:
-        raise HTTPException(HTTPStatus.CONFLICT, detail="Event is already enabled")
+        if not ChannelsController.enable_event(channel, event):
+            raise HTTPException(HTTPStatus.CONFLICT, detail="Event is already enabled")
 
-    if channel.enabled_events == ALL_EVENTS:
-        # NOTE: If all events are enabled, remove from disabled_events
-        channel.disabled_events.discard(event)
+        LimitsController.check(str(user.id), {EVENTS: LimitsController.enabled_events(channel)})
 
-    elif isinstance(channel.enabled_events, set):
-        # NOTE: Otherwise add to enabled_events
-        channel.enabled_events.add(event)
+        return UserChanges(channels={id_channel})
 
-    firestore.client.users.put(user)
+    await UsersController.mutate(cast(User, request.state.user), mutation)
 
 
 @router.delete("/{id_channel}/events/{event}", status_code=HTTPStatus.NO_CONTENT)
-def _disable_channel_event(request: Request, id_channel: str, event: PublicEvent) -> None:
+async def _disable_channel_event(request: Request, id_channel: str, event: PublicEvent) -> None:
+    """Disable an event for a specific channel."""
+
+    def mutation(user: User) -> UserChanges:
+        """
+        Disable the event on the channel of the user.
+
+        Raises:
+            HTTPException: If the channel is not found (404)
+            HTTPException: If the event is already disabled (409)
+
+        """
+        if not (channel := user.channels.get(id_channel)):
+            raise HTTPException(HTTPStatus.NOT_FOUND)
+
+        if not ChannelsController.disable_event(channel, event):
+            raise HTTPException(HTTPStatus.CONFLICT, detail="Event is already disabled")
+
+        return UserChanges(channels={id_channel})
+
+    await UsersController.mutate(cast(User, request.state.user), mutation)
+
+
+@router.patch("/{id_channel}/events", status_code=HTTPStatus.OK)
+async def _update_channel_events(request: Request, id_channel: str, payload: ChannelEvents) -> Response:
     """
-    Disable an event for a specific channel.
+    Enable and disable many events for a specific channel at once. Events already in the requested state are skipped.
 
     Raises:
-        HTTPException: If the channel is not found (404)
-        HTTPException: If the event is already disabled (409)
+        HTTPException: If an event is both enabled and disabled (400)
 
     """
-    user = cast(User, request.state.user)
-    if not (channel := user.channels.get(id_channel)):
-        raise HTTPException(HTTPStatus.NOT_FOUND)
+    if payload.enable & payload.disable:
+        raise HTTPException(HTTPStatus.BAD_REQUEST, detail="Events can't be both enabled and disabled")
 
-    if channel.enabled_events != ALL_EVENTS and event not in channel.enabled_events:
-        raise HTTPException(HTTPStatus.CONFLICT, detail="Event is already disabled")
+    def mutation(user: User) -> UserChanges:
+        """
+        Enable and disable the events on the channel of the user.
 
-    if channel.enabled_events == ALL_EVENTS:
-        # NOTE: If all events are enabled, add to disabled_events
-        if event in channel.disabled_events:
-            raise HTTPException(HTTPStatus.CONFLICT, detail="Event is already disabled")
-        channel.disabled_events.add(event)
+        Raises:
+            HTTPException: If the channel is not found (404)
+            HTTPException: If the max amount of events is reached (409)
 
-        # NOTE: If both enabled_events and disabled_events are empty, disable the channel
-        if len(channel.disabled_events) == len(PublicEvent):
-            channel.disabled_events = set()
-            channel.enabled_events = set()
-            channel.enabled = False
+        """
+        if not (channel := user.channels.get(id_channel)):
+            raise HTTPException(HTTPStatus.NOT_FOUND)
 
-    elif isinstance(channel.enabled_events, set):
-        # NOTE: Otherwise remove from enabled_events
-        channel.enabled_events.discard(event)
+        enabled = [ChannelsController.enable_event(channel, event) for event in payload.enable]
+        disabled = [ChannelsController.disable_event(channel, event) for event in payload.disable]
+        if any(enabled):
+            LimitsController.check(str(user.id), {EVENTS: LimitsController.enabled_events(channel)})
 
-    firestore.client.users.put(user)
+        return UserChanges(channels={id_channel}) if any(enabled + disabled) else UserChanges()
+
+    user = await UsersController.mutate(cast(User, request.state.user), mutation)
+    return json_response(channel_serializer.one(user.channels[id_channel]))
 
 
 @router.delete("/{id_channel}", status_code=HTTPStatus.NO_CONTENT)
-def _delete_channel(request: Request, id_channel: str) -> None:
-    """
-    Delete a channel configuration.
+async def _delete_channel(request: Request, id_channel: str) -> None:
+    """Delete a channel configuration."""
 
-    Raises:
-        HTTPException: If the channel is not found (404)
+    def mutation(user: User) -> UserChanges:
+        """
+        Delete the channel of the user.
 
-    """
-    user = cast(User, request.state.user)
-    if not user.channels.get(id_channel):
-        raise HTTPException(HTTPStatus.NOT_FOUND)
+        Raises:
+            HTTPException: If the channel is not found (404)
+
+        """
+        if not user.channels.get(id_channel):
+            raise HTTPException(HTTPStatus.NOT_FOUND)
+
+        del user.channels[id_channel]
+        return UserChanges(channels={id_channel})
 
-    del user.channels[id_channel]
-    firestore.client.users.put(user)
+    await UsersController.mutate(cast(User, request.state.user), mutation)
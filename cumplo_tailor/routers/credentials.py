@@ -2,30 +2,37 @@ from http import HTTPStatus
 from logging import getLogger
 from typing import cast
 
-from cumplo_common.database import firestore
 from cumplo_common.models.credentials import Credentials
 from cumplo_common.models.user import User
 from fastapi import APIRouter
 from fastapi.requests import Request
 
+from cumplo_tailor.controllers import UsersController
+from cumplo_tailor.database import UserChanges
+
 logger = getLogger(__name__)
 
 router = APIRouter(prefix="/credentials")
 
 
 @router.put("", status_code=HTTPStatus.NO_CONTENT)
-def _upsert_credentials(request: Request, payload: dict) -> None:
+async def _upsert_credentials(request: Request, payload: dict) -> None:
     """Update or insert user credentials."""
-    user = cast(User, request.state.user)
 
-    # HACK: This is temporary. Eventually we will use the credentials to get the user's Cumplo ID
-    user.credentials = Credentials.model_validate({**payload, "cumplo_id": "1"})
-    firestore.client.users.put(user)
+    def mutation(user: User) -> UserChanges:
+        # HACK: This is temporary. Eventually we will use the credentials to get the user's Cumplo ID
+        user.credentials = Credentials.model_validate({**payload, "cumplo_id": "1"})
+        return UserChanges(credentials=True)
+
+    await UsersController.mutate(cast(User, request.state.user), mutation)
 
 
 @router.delete("", status_code=HTTPStatus.NO_CONTENT)
-def _delete_credentials(request: Request) -> None:
+async def _delete_credentials(request: Request) -> None:
     """Delete user credentials."""
-    user = cast(User, request.state.user)
-    user.credentials = None
-    firestore.client.users.put(user)
+
+    def mutation(user: User) -> UserChanges:
+        user.credentials = None
+        return UserChanges(credentials=True)
+
+    await UsersController.mutate(cast(User, request.state.user), mutation)
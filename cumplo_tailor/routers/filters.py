@@ -1,17 +1,22 @@
 from http import HTTPStatus
 from logging import getLogger
-from typing import cast
+from typing import Annotated, cast
 
 import ulid
-from cumplo_common.database import firestore
 from cumplo_common.models.filter_configuration import FilterConfiguration
 from cumplo_common.models.user import User
-from fastapi import APIRouter
+from fastapi import APIRouter, Body, Response
 from fastapi.exceptions import HTTPException
 from fastapi.requests import Request
 
-from cumplo_tailor.utils.constants import MAX_FILTERS
-from cumplo_tailor.utils.dictionary import update_dictionary
+from cumplo_tailor.controllers import LimitsController, UsersController
+from cumplo_tailor.controllers.limits import FILTERS
+from cumplo_tailor.database import UserChanges
+from cumplo_tailor.utils.constants import MAX_BATCH_OPERATIONS
+from cumplo_tailor.utils.fingerprints import UserIndex
+from cumplo_tailor.utils.patch import merge_patch
+from cumplo_tailor.utils.representations import respond
+from cumplo_tailor.utils.serialization import filter_serializer, json_response
 
 logger = getLogger(__name__)
 
@@ -19,14 +24,14 @@ router = APIRouter(prefix="/filters")
 
 
 @router.get("", status_code=HTTPStatus.OK)
-def _list_filters(request: Request) -> list[dict]:
+async def _list_filters(request: Request) -> Response:
     """List the existing filters."""
     user = cast(User, request.state.user)
-    return [filter_.json() for filter_ in user.filters.values()]
+    return respond(request, lambda: filter_serializer.many(user.filters.values()))
 
 
 @router.get("/{id_filter}", status_code=HTTPStatus.OK)
-def _retrieve_filter(request: Request, id_filter: str) -> dict:
+async def _retrieve_filter(request: Request, id_filter: str) -> Response:
     """
     Retrieve a single filter configuration.
 
@@ -38,75 +43,117 @@ def _retrieve_filter(request: Request, id_filter: str) -> dict:
     if not (filter_ := user.filters.get(id_filter)):
         raise HTTPException(HTTPStatus.NOT_FOUND)
 
-    return filter_.json()
+    return respond(request, lambda: filter_serializer.one(filter_))
 
 
 @router.post("", status_code=HTTPStatus.CREATED)
-def _create_filter(request: Request, payload: dict) -> dict:
-    """
-    Create a new filter configuration.
+async def _create_filter(request: Request, payload: dict) -> Response:
+    """Create a new filter configuration."""
+    id_filter = ulid.new()
 
-    Raises:
-        HTTPException: If the max amount of filters is reached or the filter already exists (409)
+    def mutation(user: User) -> UserChanges:
+        """
+        Add the filter to the user.
 
-    """
-    user = cast(User, request.state.user)
-    if len(user.filters) >= MAX_FILTERS:
-        raise HTTPException(HTTPStatus.CONFLICT, detail="Max amount of filters reached")
+        Raises:
+            HTTPException: If the max amount of filters is reached or the filter already exists (409)
+
+        """
+        LimitsController.check(str(user.id), {FILTERS: len(user.filters) + 1})
+
+        filter_ = FilterConfiguration.model_validate({"id": id_filter, **payload})
+
+        if UserIndex(user).find_filter(filter_):
+            raise HTTPException(HTTPStatus.CONFLICT, detail="Filter already exists")
+
+        user.filters[str(filter_.id)] = filter_
+        return UserChanges(filters={str(filter_.id)})
 
-    filter_ = FilterConfiguration.model_validate({"id": ulid.new(), **payload})
+    user = await UsersController.mutate(cast(User, request.state.user), mutation)
+    return json_response(filter_serializer.one(user.filters[str(id_filter)]), HTTPStatus.CREATED)
 
-    if filter_ in user.filters.values():
-        raise HTTPException(HTTPStatus.CONFLICT, detail="Filter already exists")
 
-    user.filters[str(filter_.id)] = filter_
-    firestore.client.users.put(user)
-    return filter_.json()
+@router.post(":batch", status_code=HTTPStatus.CREATED)
+async def _create_filters(
+    request: Request, payload: Annotated[list[dict], Body(min_length=1, max_length=MAX_BATCH_OPERATIONS)]
+) -> Response:
+    """Create many filter configurations at once, validating and persisting them together."""
+    ids = [ulid.new() for _ in payload]
+
+    def mutation(user: User) -> UserChanges:
+        """
+        Add every filter to the user.
+
+        Raises:
+            HTTPException: If the max amount of filters is exceeded or a filter already exists (409)
+
+        """
+        LimitsController.check(str(user.id), {FILTERS: len(user.filters) + len(payload)})
+
+        index = UserIndex(user)
+        for id_filter, item in zip(ids, payload, strict=True):
+            filter_ = FilterConfiguration.model_validate({"id": id_filter, **item})
+            if index.find_filter(filter_):
+                raise HTTPException(HTTPStatus.CONFLICT, detail="Filter already exists")
+
+            user.filters[str(filter_.id)] = filter_
+            index.add_filter(filter_)
+
+        return UserChanges(filters={str(id_filter) for id_filter in ids})
+
+    user = await UsersController.mutate(cast(User, request.state.user), mutation)
+    filters = (user.filters[str(id_filter)] for id_filter in ids)
+    return json_response(filter_serializer.many(filters), HTTPStatus.CREATED)
 
 
 @router.patch("/{id_filter}", status_code=HTTPStatus.OK)
-def _update_filter(request: Request, payload: dict, id_filter: str) -> dict:
-    """
-    Update a filter configuration.
+async def _update_filter(request: Request, payload: dict, id_filter: str) -> Response:
+    """Update a filter configuration."""
 
-    Raises:
-        HTTPException: If the filter is not found (404)
-        HTTPException: If there are no changes to update (400)
-        HTTPException: If the updated filter already exists (409)
+    def mutation(user: User) -> UserChanges:
+        """
+        Merge patch the filter of the user.
 
-    """
-    user = cast(User, request.state.user)
-    if not (filter_ := user.filters.get(id_filter)):
-        raise HTTPException(HTTPStatus.NOT_FOUND)
+        Raises:
+            HTTPException: If the filter is not found (404)
+            HTTPException: If there are no changes to update (200)
+            HTTPException: If the updated filter already exists (409)
 
-    data = update_dictionary(filter_.model_dump(), payload)
-    new_filter = FilterConfiguration.model_validate(data)
+        """
+        if not (filter_ := user.filters.get(id_filter)):
+            raise HTTPException(HTTPStatus.NOT_FOUND)
 
-    # NOTE: If the only change is the name, then we don't need to check for conflicts
-    if not ("name" in payload and len(payload) == 1):
-        if new_filter == filter_:
+        new_filter, changes = merge_patch(filter_, payload, exclude={"id"})
+        if not changes:
             raise HTTPException(HTTPStatus.OK, detail="Nothing to update")
 
-        if new_filter in user.filters.values():
+        # NOTE: If the only change is the name, then we don't need to check for conflicts
+        if changes != {("name",)} and UserIndex(user).find_filter(new_filter, exclude=id_filter):
             raise HTTPException(HTTPStatus.CONFLICT, detail="The updated filter already exists")
 
-    user.filters[str(new_filter.id)] = new_filter
-    firestore.client.users.put(user)
-    return new_filter.json()
+        user.filters[str(new_filter.id)] = new_filter
+        return UserChanges(filters={str(new_filter.id)})
+
+    user = await UsersController.mutate(cast(User, request.state.user), mutation)
+    return json_response(filter_serializer.one(user.filters[id_filter]))
 
 
 @router.delete("/{id_filter}", status_code=HTTPStatus.NO_CONTENT)
-def _delete_filter(request: Request, id_filter: str) -> None:
-    """
-    Delete a filter configuration.
+async def _delete_filter(request: Request, id_filter: str) -> None:
+    """Delete a filter configuration."""
 
-    Raises:
-        HTTPException: If the filter is not found (404)
+    def mutation(user: User) -> UserChanges:
+        """
+        Delete the filter of the user.
 
-    """
-    user = cast(User, request.state.user)
-    if not (user.filters.get(id_filter)):
-        raise HTTPException(HTTPStatus.NOT_FOUND)
+        Raises:
+            HTTPException: If the filter is not found (404)
+
+        """
+        if not (user.filters.get(id_filter)):
+            raise HTTPException(HTTPStatus.NOT_FOUND)
+
+        del user.filters[id_filter]
+        return UserChanges(filters={id_filter})
 
-    del user.filters[id_filter]
-    firestore.client.users.put(user)
+    await UsersController.mutate(cast(User, request.state.user), mutation)
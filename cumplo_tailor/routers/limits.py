@@ -0,0 +1,28 @@
+from http import HTTPStatus
+from logging import getLogger
+
+from fastapi import APIRouter
+
+from cumplo_tailor.controllers import LimitsController
+
+logger = getLogger(__name__)
+
+router = APIRouter(prefix="/limits")
+
+
+@router.get("", status_code=HTTPStatus.OK)
+async def _retrieve_limits() -> dict:
+    """Retrieve the limits configuration in use."""
+    return LimitsController.configuration().model_dump(mode="json")
+
+
+@router.get("/users/{id_user}", status_code=HTTPStatus.OK)
+async def _retrieve_user_limits(id_user: str) -> dict:
+    """Retrieve the resolved limits of a user."""
+    return LimitsController.resolve(id_user)
+
+
+@router.post("/reload", status_code=HTTPStatus.OK)
+async def _reload_limits() -> dict:
+    """Reload the limits configuration on this worker, even if its file hasn't changed."""
+    return LimitsController.reload(force=True).model_dump(mode="json")
@@ -0,0 +1,23 @@
+from http import HTTPStatus
+from logging import getLogger
+
+from fastapi import APIRouter
+from fastapi.requests import Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+
+from cumplo_tailor.utils.metrics import metrics
+
+logger = getLogger(__name__)
+
+router = APIRouter(prefix="/metrics")
+
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("", status_code=HTTPStatus.OK)
+async def _retrieve_metrics(request: Request) -> Response:
+    """Retrieve the process-level counters and histograms in the Prometheus text format, or as JSON if accepted."""
+    if "application/json" in request.headers.get("accept", ""):
+        return JSONResponse(metrics.snapshot())
+
+    return PlainTextResponse(metrics.render(), media_type=PROMETHEUS_MEDIA_TYPE)
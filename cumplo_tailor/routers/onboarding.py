@@ -0,0 +1,36 @@
+from http import HTTPStatus
+from logging import getLogger
+
+from fastapi import APIRouter
+from fastapi.exceptions import HTTPException
+
+from cumplo_tailor.controllers import OnboardingController
+from cumplo_tailor.database import OnboardingJobs
+
+logger = getLogger(__name__)
+
+router = APIRouter(prefix="/onboarding")
+
+
+@router.get("/jobs/{id_job}", status_code=HTTPStatus.OK)
+async def _retrieve_job(id_job: str) -> dict:
+    """
+    Retrieve the status of an onboarding job.
+
+    Raises:
+        HTTPException: If the job is not found (404)
+
+    """
+    try:
+        job = await OnboardingJobs.get(id_job)
+    except KeyError:
+        raise HTTPException(HTTPStatus.NOT_FOUND)  # noqa: B904
+
+    return job.model_dump(mode="json")
+
+
+@router.post("/refill", status_code=HTTPStatus.OK)
+async def _refill() -> dict:
+    """Refill the pool of pre-provisioned API keys up to its watermark."""
+    added = await OnboardingController.refill()
+    return {"added": added}
@@ -0,0 +1,17 @@
+from http import HTTPStatus
+from logging import getLogger
+
+from fastapi import APIRouter
+
+from cumplo_tailor.controllers import OutboxController
+
+logger = getLogger(__name__)
+
+router = APIRouter(prefix="/outbox")
+
+
+@router.post(":relay", status_code=HTTPStatus.OK)
+async def _relay_outbox() -> dict:
+    """Relay a batch of pending change events, such as from a scheduler when the background relay is disabled."""
+    delivered = await OutboxController.relay()
+    return {"delivered": delivered}
@@ -0,0 +1,53 @@
+from http import HTTPStatus
+from logging import getLogger
+from typing import Annotated
+
+from cumplo_common.models.channel import PublicEvent
+from fastapi import APIRouter, BackgroundTasks, Query, Response
+from fastapi.exceptions import HTTPException
+
+from cumplo_tailor.controllers import RoutesController
+from cumplo_tailor.database import EventRoute, repository
+from cumplo_tailor.utils.constants import MAX_ROUTES_PAGE_SIZE, ROUTES_PAGE_SIZE
+from cumplo_tailor.utils.cursor import decode_cursor, encode_cursor
+from cumplo_tailor.utils.serialization import Serializer, json_response
+
+logger = getLogger(__name__)
+
+router = APIRouter(prefix="/routes")
+
+route_serializer = Serializer[EventRoute](EventRoute)
+
+
+@router.get("/{event}", status_code=HTTPStatus.OK)
+async def _list_routes(
+    event: PublicEvent,
+    limit: Annotated[int, Query(gt=0, le=MAX_ROUTES_PAGE_SIZE)] = ROUTES_PAGE_SIZE,
+    cursor: str | None = None,
+) -> Response:
+    """
+    List the channels subscribed to an event, ordered by their route key.
+
+    The continuation token of the next page is sent in the `X-Next-Cursor` header.
+
+    Raises:
+        HTTPException: If the cursor is malformed (400)
+
+    """
+    try:
+        start_after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(HTTPStatus.BAD_REQUEST, detail="Malformed cursor")  # noqa: B904
+
+    routes = await repository.client.routes.page(event, limit, start_after=start_after)
+    response = json_response(route_serializer.many(routes))
+    if len(routes) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(routes[-1].key)
+
+    return response
+
+
+@router.post(":rebuild", status_code=HTTPStatus.ACCEPTED)
+async def _rebuild_routes(background_tasks: BackgroundTasks) -> None:
+    """Rebuild the whole index of event routes from the active users, in the background."""
+    background_tasks.add_task(RoutesController.rebuild)
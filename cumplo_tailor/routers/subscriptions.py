@@ -1,14 +1,13 @@
-import re
+import asyncio
 from http import HTTPStatus
 from logging import getLogger
 
-from cumplo_common.database import firestore
-from cumplo_common.integrations.gmail import Gmail
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, BackgroundTasks
 from pydantic import BaseModel, Field
 
-from cumplo_tailor.controllers import UsersController
-from cumplo_tailor.utils.constants import PATTERN_BY_SENDER
+from cumplo_tailor.controllers import SubscriptionsController
+from cumplo_tailor.controllers.subscriptions import SyncMode
+from cumplo_tailor.utils.constants import SUBSCRIPTION_SYNC_MODE
 
 logger = getLogger(__name__)
 
@@ -25,47 +24,26 @@ class SubscriptionEvent(BaseModel):
 @router.post("/renew", status_code=HTTPStatus.OK)
 async def _renew() -> None:
     """Renew the subscription to the Gmail label."""
+    from cumplo_common.integrations.gmail import Gmail  # noqa: PLC0415
+
     logger.info("Renewing subscription to Gmail label")
-    Gmail.subscribe()
+    await asyncio.to_thread(Gmail.subscribe)
 
 
 @router.post("", status_code=HTTPStatus.OK)
-async def _create_subscription(payload: SubscriptionEvent) -> None:
+async def _create_subscription(payload: SubscriptionEvent, background_tasks: BackgroundTasks) -> None:
     """
     Create a new subscription.
 
-    Returns:
-        The response object.
-
-    Raises:
-        HTTPException: If the user is already subscribed.
+    In history mode every message added since the last processed history ID is processed at once, otherwise only the
+    latest message is. Duplicate notifications and emails already being onboarded are skipped.
 
     """
-    if not (message := Gmail.get_message()):
-        return logger.warning("Message not found")
-
-    if not (sender := message.get("sender")):
-        return logger.warning(f"Sender not found for message {message.get('id')}")
-
-    if not (pattern := PATTERN_BY_SENDER.get(sender)):
-        return logger.warning(f"Unknown sender for sender {sender}")
-
-    snippet = message.get("snippet", "")
-    if not (match := re.search(pattern, snippet)):
-        return logger.warning(f"Pattern not found for sender {sender}")
-
-    name = match.group(1)
-    email = match.group(2)
-    logger.info(f"Extracted {name=} and {email=} from subscription notification")
-
-    try:
-        user = firestore.client.users.get(email=email)
-    except KeyError:
-        pass
-    else:
-        logger.info(f"User {user.id} already subscribed with email {payload.email}")
-        raise HTTPException(status_code=HTTPStatus.OK)
-
-    user = await UsersController.create(payload={"email": email, "name": name})
-    logger.info(f"Created user {user.id} with {email=}")
-    return None
+    async with SubscriptionsController.claiming(f"notification:{payload.email}:{payload.history_id}") as claimed:
+        if not claimed:
+            return logger.info(f"Skipping duplicate notification {payload.history_id} for {payload.email}")
+
+        if SUBSCRIPTION_SYNC_MODE == SyncMode.HISTORY:
+            return await SubscriptionsController.sync(payload.history_id, background_tasks)
+
+        return await SubscriptionsController.process_latest(background_tasks)
@@ -1,70 +1,180 @@
 from http import HTTPStatus
 from logging import getLogger
+from typing import Annotated
 
-from cumplo_common.database import firestore
 from cumplo_common.models.user import User
-from fastapi import APIRouter
+from fastapi import APIRouter, BackgroundTasks, Query, Response
 from fastapi.exceptions import HTTPException
-
-from cumplo_tailor.controllers import UsersController
-from cumplo_tailor.utils.dictionary import update_dictionary
+from fastapi.requests import Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+from cumplo_tailor.controllers import OnboardingController, UsersController
+from cumplo_tailor.database import OnboardingJob, UserChanges, repository
+from cumplo_tailor.utils.constants import MAX_USERS_BATCH_SIZE, MAX_USERS_PAGE_SIZE, USERS_PAGE_SIZE
+from cumplo_tailor.utils.cursor import decode_cursor, encode_cursor
+from cumplo_tailor.utils.patch import merge_patch
+from cumplo_tailor.utils.representations import respond
+from cumplo_tailor.utils.serialization import json_response, user_serializer
 
 logger = getLogger(__name__)
 
 router = APIRouter(prefix="/users")
 
 
+class UsersBatch(BaseModel):
+    """Model for a batch of users."""
+
+    ids: list[str] = Field(..., min_length=1, max_length=MAX_USERS_BATCH_SIZE)
+
+
 @router.get("", status_code=HTTPStatus.OK)
-def _list_users() -> list[dict]:
-    """List the existing users."""
-    return [user.json() for user in firestore.client.users.list()]
+async def _list_users(
+    limit: Annotated[int, Query(gt=0, le=MAX_USERS_PAGE_SIZE)] = USERS_PAGE_SIZE,
+    cursor: str | None = None,
+    *,
+    stream: bool = False,
+) -> Response:
+    """
+    List the existing users ordered by their ID.
+
+    By default a single page is returned and the continuation token of the next one is sent in the `X-Next-Cursor`
+    header. When `stream` is set, every user after the cursor is streamed as newline-delimited JSON instead, reading
+    `limit` users at a time.
+
+    Raises:
+        HTTPException: If the cursor is malformed (400)
+
+    """
+    try:
+        start_after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(HTTPStatus.BAD_REQUEST, detail="Malformed cursor")  # noqa: B904
+
+    if stream:
+        users = repository.client.users.stream(limit, start_after=start_after)
+        lines = (user_serializer.one(user) + b"\n" async for user in users)
+        return StreamingResponse(lines, media_type="application/x-ndjson")
+
+    users = await repository.client.users.page(limit, start_after=start_after)
+    response = json_response(user_serializer.many(users))
+    if len(users) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(str(users[-1].id))
+
+    return response
+
+
+@router.patch(":disable", status_code=HTTPStatus.OK)
+async def _disable_users(payload: UsersBatch) -> list[dict]:
+    """Disable many users at once, returning the result of each one."""
+    return _format_results(await UsersController.disable_many(payload.ids))
+
+
+@router.patch(":enable", status_code=HTTPStatus.OK)
+async def _enable_users(payload: UsersBatch) -> list[dict]:
+    """Enable many users at once, returning the result of each one."""
+    return _format_results(await UsersController.enable_many(payload.ids))
+
+
+@router.post(":delete", status_code=HTTPStatus.OK)
+async def _delete_users(payload: UsersBatch) -> list[dict]:
+    """Delete many users at once, returning the result of each one."""
+    return _format_results(await UsersController.delete_many(payload.ids))
+
+
+@router.patch(":batch", status_code=HTTPStatus.OK)
+async def _update_users(payload: dict[str, dict]) -> list[dict]:
+    """
+    Update many users at once, each one with its own payload, returning the result of each one.
+
+    Raises:
+        HTTPException: If the batch is empty or too large (400)
+
+    """
+    if not 0 < len(payload) <= MAX_USERS_BATCH_SIZE:
+        detail = f"Batches must have between 1 and {MAX_USERS_BATCH_SIZE} users"
+        raise HTTPException(HTTPStatus.BAD_REQUEST, detail=detail)
+
+    return _format_results(await UsersController.update_many(payload))
+
+
+def _format_results(results: dict[str, HTTPStatus]) -> list[dict]:
+    """Format the result of each user of a batch."""
+    return [{"id": id_user, "status": status, "detail": status.phrase} for id_user, status in results.items()]
 
 
 @router.get("/{id_user}", status_code=HTTPStatus.OK)
-def _retrieve_user(id_user: str) -> dict:
+async def _retrieve_user(request: Request, id_user: str) -> Response:
     """
     Retrieve a single user.
 
+    The user is read from the database, bypassing the cache, so administrators always see its stored state and its
+    ETag is computed from it.
+
     Raises:
         HTTPException: If the user is not found (404)
 
     """
-    if not (user_ := firestore.client.users.get(id_user)):
-        raise HTTPException(HTTPStatus.NOT_FOUND)
+    try:
+        user_ = await repository.client.users.get(id_user)
+    except (KeyError, ValueError):
+        raise HTTPException(HTTPStatus.NOT_FOUND)  # noqa: B904
 
-    return user_.json()
+    return respond(request, lambda: user_serializer.one(user_), user=user_)
 
 
 @router.post("", status_code=HTTPStatus.CREATED)
-async def _create_user(payload: dict) -> dict:
-    """Create a new user."""
-    user = await UsersController.create(payload)
-    return user.json()
+async def _create_user(payload: dict, background_tasks: BackgroundTasks) -> Response:
+    """
+    Create a new user.
+
+    When no pre-provisioned API key is available, the creation continues in the background and the onboarding job to
+    follow is returned with a 202 status instead.
+
+    """
+    result = await OnboardingController.onboard(payload, background_tasks)
+    if isinstance(result, OnboardingJob):
+        return json_response(result.model_dump_json().encode(), HTTPStatus.ACCEPTED)
+
+    return json_response(user_serializer.one(result), HTTPStatus.CREATED)
 
 
 @router.patch("/{id_user}", status_code=HTTPStatus.OK)
-def _update_user(payload: dict, id_user: str) -> dict:
+async def _update_user(payload: dict, id_user: str) -> Response:
     """
-    Update a user.
+    Update a user with a JSON Merge Patch, writing only the changed fields.
 
     Raises:
         HTTPException: If the user is not found (404)
 
     """
     try:
-        user = firestore.client.users.get(id_user)
+        user = await repository.client.users.get(id_user)
     except KeyError:
         raise HTTPException(HTTPStatus.NOT_FOUND)  # noqa: B904
 
-    data = update_dictionary(user.model_dump(), payload)
-    new_user = User.model_validate(data)
+    def mutation(user: User) -> UserChanges:
+        """
+        Merge patch the user.
+
+        Raises:
+            HTTPException: If there are no changes to update (200)
 
-    firestore.client.users.put(new_user)
-    return new_user.json()
+        """
+        new_user, changes = merge_patch(user, payload, exclude={"id", "api_key"})
+        if not changes:
+            raise HTTPException(HTTPStatus.OK, detail="Nothing to update")
+
+        for field in {field for field, *_ in changes}:
+            setattr(user, field, getattr(new_user, field))
+        return UserChanges.from_paths(changes)
+
+    user = await UsersController.mutate(user, mutation)
+    return json_response(user_serializer.one(user))
 
 
 @router.delete("/{id_user}", status_code=HTTPStatus.NO_CONTENT)
-def _delete_user(id_user: str) -> None:
+async def _delete_user(id_user: str) -> None:
     """
     Delete a user.
 
@@ -73,15 +183,15 @@ def _delete_user(id_user: str) -> None:
 
     """
     try:
-        user = firestore.client.users.get(id_user)
+        user = await repository.client.users.get(id_user)
     except KeyError:
         raise HTTPException(HTTPStatus.NOT_FOUND)  # noqa: B904
 
-    firestore.client.users.delete(user)
+    await UsersController.delete(user)
 
 
 @router.patch("/{id_user}/disable", status_code=HTTPStatus.NO_CONTENT)
-def _disable_user(id_user: str) -> None:
+async def _disable_user(id_user: str) -> None:
     """
     Disable a user.
 
@@ -90,16 +200,15 @@ def _disable_user(id_user: str) -> None:
 
     """
     try:
-        user = firestore.client.users.get(id_user)
+        user = await repository.client.users.get(id_user)
     except KeyError:
         raise HTTPException(HTTPStatus.NOT_FOUND)  # noqa: B904
 
-    firestore.client.disabled.put(user)
-    firestore.client.users.delete(user)
+    await UsersController.disable(user)
 
 
 @router.patch("/{id_user}/enable", status_code=HTTPStatus.NO_CONTENT)
-def _enable_user(id_user: str) -> None:
+async def _enable_user(id_user: str) -> None:
     """
     Enable a user.
 
@@ -107,8 +216,9 @@ def _enable_user(id_user: str) -> None:
         HTTPException: If the user is not found (404)
 
     """
-    if not (user := firestore.client.disabled.get(id_user)):
-        raise HTTPException(HTTPStatus.NOT_FOUND)
+    try:
+        user = await repository.client.disabled.get(id_user)
+    except KeyError:
+        raise HTTPException(HTTPStatus.NOT_FOUND)  # noqa: B904
 
-    firestore.client.users.put(user)
-    firestore.client.disabled.delete(user)
+    await UsersController.enable(user)
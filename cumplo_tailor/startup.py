@@ -0,0 +1,42 @@
+import asyncio
+from logging import getLogger
+from typing import TYPE_CHECKING
+
+from cumplo_tailor.database import repository
+from cumplo_tailor.database.common import firestore_client
+from cumplo_tailor.integrations import CloudCredentials, GmailHistory
+from cumplo_tailor.utils.metrics import Timer
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+logger = getLogger(__name__)
+
+
+async def warm_up() -> None:
+    """
+    Import the client libraries and build the clients, so the first requests don't pay for them.
+
+    The blocking steps run in a thread, each one on its own so a failing step doesn't prevent the others, while the
+    asynchronous Firestore client is built on the event loop it will be bound to. Each step is timed into the
+    `startup_seconds` histogram.
+    """
+    steps: dict[str, Callable[[], object]] = {
+        "firestore": firestore_client,
+        "apikeys": lambda: CloudCredentials.apikeys.service,
+        "gmail": lambda: GmailHistory.gmail.service,
+    }
+
+    def run() -> None:
+        for step, build in steps.items():
+            try:
+                with Timer("startup", step=step):
+                    build()
+            except Exception as error:  # noqa: BLE001
+                logger.warning(f"Failed to warm up {step}, it will be built on first use: {error}")
+
+    await asyncio.to_thread(run)
+    with Timer("startup", step="repository"):
+        _ = repository.client.users
+
+    logger.info("Warm up done")
@@ -11,17 +11,99 @@ LOCATION = os.getenv("LOCATION", "us-central1")
 PROJECT_ID = os.getenv("PROJECT_ID", "")
 IS_TESTING = bool(os.getenv("IS_TESTING"))
 LOG_FORMAT = "\n%(levelname)s: %(message)s"
+LAZY_STARTUP = bool(os.getenv("LAZY_STARTUP"))
+
+# Logging
+LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG")
+LOG_NAME = os.getenv("LOG_NAME", "cumplo-tailor")
+LOG_SINK = os.getenv("LOG_SINK") or ("stdout" if IS_TESTING else "cloud")
+LOG_FILE = os.getenv("LOG_FILE", "cumplo-tailor.log")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "500"))
+LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", "1"))
+LOG_CLOSE_TIMEOUT = float(os.getenv("LOG_CLOSE_TIMEOUT", "5"))
+LOG_SAMPLING = json.loads(os.getenv("LOG_SAMPLING", "{}"))
 
 # Defaults
 MAX_FILTERS = int(os.getenv("MAX_FILTERS", "3"))
 MAX_WEBHOOKS = int(os.getenv("MAX_WEBHOOKS", "2"))
+MAX_BATCH_OPERATIONS = int(os.getenv("MAX_BATCH_OPERATIONS", "50"))
+USERS_PAGE_SIZE = int(os.getenv("USERS_PAGE_SIZE", "100"))
+MAX_USERS_PAGE_SIZE = int(os.getenv("MAX_USERS_PAGE_SIZE", "1000"))
+MAX_USERS_BATCH_SIZE = int(os.getenv("MAX_USERS_BATCH_SIZE", "5000"))
+ROUTES_PAGE_SIZE = int(os.getenv("ROUTES_PAGE_SIZE", "1000"))
+MAX_ROUTES_PAGE_SIZE = int(os.getenv("MAX_ROUTES_PAGE_SIZE", "10000"))
+
+# Limits
+LIMITS = os.getenv("LIMITS", "")
+LIMITS_FILE = os.getenv("LIMITS_FILE", "")
+LIMITS_RELOAD_INTERVAL = float(os.getenv("LIMITS_RELOAD_INTERVAL", "10"))
+LIMITS_CACHE_SIZE = int(os.getenv("LIMITS_CACHE_SIZE", "1024"))
+
+# Concurrency
+OPTIMISTIC_CONCURRENCY = bool(os.getenv("OPTIMISTIC_CONCURRENCY"))
+MAX_MUTATION_RETRIES = int(os.getenv("MAX_MUTATION_RETRIES", "3"))
+MUTATION_RETRY_DELAY = float(os.getenv("MUTATION_RETRY_DELAY", "0.05"))
+
+# Cache
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "0"))
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "30"))
+REPRESENTATION_CACHE_SIZE = int(os.getenv("REPRESENTATION_CACHE_SIZE", "1024"))
+
+# Metrics
+DISABLE_METRICS = bool(os.getenv("DISABLE_METRICS"))
+
+# Outbox
+OUTBOX_PUBLISHER = os.getenv("OUTBOX_PUBLISHER") or ("file" if IS_TESTING else "log")
+OUTBOX_TOPIC = os.getenv("OUTBOX_TOPIC", "user-changes")
+OUTBOX_FILE = os.getenv("OUTBOX_FILE", "cumplo-tailor-changes.jsonl")
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "30"))
+OUTBOX_LEASE_DURATION = float(os.getenv("OUTBOX_LEASE_DURATION", "90"))
+ENABLE_OUTBOX_RELAY = bool(os.getenv("ENABLE_OUTBOX_RELAY"))
+
+# Database
+DATABASE_BACKEND = os.getenv("DATABASE_BACKEND", "firestore")
+SQLITE_PATH = os.getenv("SQLITE_PATH", ":memory:")
+
+# Firestore
+FIRESTORE_BATCH_LIMIT = 500
 
 # Firestore Collections
 USERS_COLLECTION = os.getenv("USERS_COLLECTION", "users")
+EVENT_ROUTES_COLLECTION = os.getenv("EVENT_ROUTES_COLLECTION", "event_routes")
+OUTBOX_COLLECTION = os.getenv("OUTBOX_COLLECTION", "outbox")
+OUTBOX_LEASES_COLLECTION = os.getenv("OUTBOX_LEASES_COLLECTION", "outbox_leases")
+API_KEYS_COLLECTION = os.getenv("API_KEYS_COLLECTION", "api_keys")
+ONBOARDING_JOBS_COLLECTION = os.getenv("ONBOARDING_JOBS_COLLECTION", "onboarding_jobs")
+SUBSCRIPTION_MARKERS_COLLECTION = os.getenv("SUBSCRIPTION_MARKERS_COLLECTION", "subscription_markers")
+SUBSCRIPTIONS_STATE_COLLECTION = os.getenv("SUBSCRIPTIONS_STATE_COLLECTION", "subscriptions_state")
 
 # Cloud Credentials
 CLOUD_CREDENTIALS_SCOPES = ["https://www.googleapis.com/auth/cloud-platform"]
 CUMPLO_API_SERVICE = "cumplo-api-0l58eq7ymczsk.apigateway.cumplo-scraper.cloud.goog"
+API_KEYS_MAX_WORKERS = int(os.getenv("API_KEYS_MAX_WORKERS", "4"))
+API_KEYS_MAX_CONCURRENCY = int(os.getenv("API_KEYS_MAX_CONCURRENCY", "8"))
+API_KEY_TIMEOUT = float(os.getenv("API_KEY_TIMEOUT", "30"))
+
+# Long-running operations
+OPERATION_FAST_POLLS = int(os.getenv("OPERATION_FAST_POLLS", "3"))
+OPERATION_FAST_POLL_DELAY = float(os.getenv("OPERATION_FAST_POLL_DELAY", "0.2"))
+OPERATION_INITIAL_POLL_DELAY = float(os.getenv("OPERATION_INITIAL_POLL_DELAY", "0.5"))
+OPERATION_MAX_POLL_DELAY = float(os.getenv("OPERATION_MAX_POLL_DELAY", "5"))
+
+# Onboarding
+API_KEY_POOL_WATERMARK = int(os.getenv("API_KEY_POOL_WATERMARK", "0"))
 
 # Gmail
 PATTERN_BY_SENDER = json.loads(os.getenv("PATTERN_BY_SENDER", "{}"))
+SUBSCRIPTION_DEDUP_SIZE = int(os.getenv("SUBSCRIPTION_DEDUP_SIZE", "10000"))
+SUBSCRIPTION_DEDUP_TTL = float(os.getenv("SUBSCRIPTION_DEDUP_TTL", "3600"))
+SUBSCRIPTION_MARKERS = bool(os.getenv("SUBSCRIPTION_MARKERS"))
+SUBSCRIPTION_MARKERS_TTL = int(os.getenv("SUBSCRIPTION_MARKERS_TTL", "604800"))
+SUBSCRIPTION_SYNC_MODE = os.getenv("SUBSCRIPTION_SYNC_MODE", "message")
+SUBSCRIPTION_SYNC_CONCURRENCY = int(os.getenv("SUBSCRIPTION_SYNC_CONCURRENCY", "4"))
+GMAIL_LABEL = os.getenv("GMAIL_LABEL", "")
+GMAIL_DELEGATED_USER = os.getenv("GMAIL_DELEGATED_USER") or None
+GMAIL_BATCH_SIZE = int(os.getenv("GMAIL_BATCH_SIZE", "50"))
+GMAIL_MAX_WORKERS = int(os.getenv("GMAIL_MAX_WORKERS", "2"))
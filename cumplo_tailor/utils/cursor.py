@@ -0,0 +1,22 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+
+
+def encode_cursor(value: str) -> str:
+    """Encode a value as an opaque continuation token."""
+    return urlsafe_b64encode(value.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> str:
+    """
+    Decode an opaque continuation token back into its value.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+
+    """
+    try:
+        return urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    except (BinasciiError, UnicodeDecodeError) as error:
+        message = "Malformed cursor"
+        raise ValueError(message) from error
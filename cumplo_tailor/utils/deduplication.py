@@ -0,0 +1,39 @@
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+
+
+class DeduplicationWindow:
+    """Bounded, time-limited set of recently seen keys."""
+
+    def __init__(self, size: int, ttl: float) -> None:
+        self.size = size
+        self.ttl = ttl
+        self._lock = Lock()
+        self._keys: OrderedDict[str, float] = OrderedDict()
+
+    def add(self, key: str) -> bool:
+        """
+        Atomically add the key unless it was seen within the window.
+
+        Returns:
+            bool: Whether the key was added, i.e. it was not seen before.
+
+        """
+        now = monotonic()
+        with self._lock:
+            while self._keys and next(iter(self._keys.values())) <= now:
+                self._keys.popitem(last=False)
+
+            if key in self._keys:
+                return False
+
+            self._keys[key] = now + self.ttl
+            if len(self._keys) > self.size:
+                self._keys.popitem(last=False)
+            return True
+
+    def discard(self, key: str) -> None:
+        """Forget the key so it can be added again."""
+        with self._lock:
+            self._keys.pop(key, None)
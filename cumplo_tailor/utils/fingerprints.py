@@ -0,0 +1,108 @@
+import json
+from collections import defaultdict
+from hashlib import blake2b
+from typing import Any, cast
+
+from cumplo_common.models.channel import (
+    ChannelConfiguration,
+    ChannelType,
+    IFTTTConfiguration,
+    WebhookConfiguration,
+)
+from cumplo_common.models.filter_configuration import FilterConfiguration
+from cumplo_common.models.user import User
+from pydantic import BaseModel
+from pydantic_core import to_jsonable_python
+
+
+def _serialize(value: Any) -> str:
+    """Serialize a normalized value as compact JSON with sorted keys."""
+    return json.dumps(value, sort_keys=True, separators=(",", ":"))
+
+
+def _normalize(value: Any) -> Any:
+    """
+    Convert a Python value into JSON recursively, sorting its sets so they hash the same regardless of their order.
+
+    Lists and tuples keep their order, since it is meaningful for them.
+    """
+    if isinstance(value, dict):
+        return {to_jsonable_python(key): _normalize(item) for key, item in value.items()}
+    if isinstance(value, set | frozenset):
+        return sorted((_normalize(item) for item in value), key=_serialize)
+    if isinstance(value, list | tuple):
+        return [_normalize(item) for item in value]
+    return to_jsonable_python(value)
+
+
+def fingerprint(model: BaseModel) -> str:
+    """Hash the normalized content of a configuration, ignoring its ID and name."""
+    # NOTE: Dumped in Python mode, since the JSON mode turns sets into lists and their order would be lost for sorting
+    content = _normalize(model.model_dump(exclude={"id", "name"}, exclude_none=True))
+    return blake2b(_serialize(content).encode(), digest_size=16).hexdigest()
+
+
+class UserIndex:
+    """
+    Lookups derived from a user's filters and channels, built once per request.
+
+    Duplicates are found by content fingerprint and the channel validations by type, webhook URL and IFTTT key or
+    event, all in constant time. The index must be kept in sync through `add_*`/`remove_*` when the user is mutated.
+    """
+
+    def __init__(self, user: User) -> None:
+        self.filters: defaultdict[str, set[str]] = defaultdict(set)
+        self.channels: defaultdict[str, set[str]] = defaultdict(set)
+        self.by_type: defaultdict[ChannelType, set[str]] = defaultdict(set)
+        self.webhook_urls: defaultdict[str, set[str]] = defaultdict(set)
+        self.ifttt_keys: defaultdict[str, set[str]] = defaultdict(set)
+        self.ifttt_events: defaultdict[str, set[str]] = defaultdict(set)
+
+        for filter_ in user.filters.values():
+            self.add_filter(filter_)
+
+        for channel in user.channels.values():
+            self.add_channel(channel)
+
+    def add_filter(self, filter_: FilterConfiguration) -> None:
+        """Index a filter."""
+        self.filters[fingerprint(filter_)].add(str(filter_.id))
+
+    def remove_filter(self, filter_: FilterConfiguration) -> None:
+        """Remove a filter from the index."""
+        self.filters[fingerprint(filter_)].discard(str(filter_.id))
+
+    def find_filter(self, filter_: FilterConfiguration, exclude: str | None = None) -> str | None:
+        """Find the ID of another filter with the same content."""
+        return next(iter(self.filters.get(fingerprint(filter_), set()) - {exclude}), None)
+
+    def add_channel(self, channel: ChannelConfiguration) -> None:
+        """Index a channel."""
+        self._index_channel(channel, remove=False)
+
+    def remove_channel(self, channel: ChannelConfiguration) -> None:
+        """Remove a channel from the index."""
+        self._index_channel(channel, remove=True)
+
+    def find_channel(self, channel: ChannelConfiguration, exclude: str | None = None) -> str | None:
+        """Find the ID of another channel with the same content."""
+        return next(iter(self.channels.get(fingerprint(channel), set()) - {exclude}), None)
+
+    def _index_channel(self, channel: ChannelConfiguration, *, remove: bool) -> None:
+        """Add or remove the channel from every lookup it belongs to."""
+        id_channel = str(channel.id)
+        lookups = [self.channels[fingerprint(channel)], self.by_type[channel.type_]]
+
+        match channel.type_:
+            case ChannelType.WEBHOOK:
+                lookups.append(self.webhook_urls[cast(WebhookConfiguration, channel).url])
+
+            case ChannelType.IFTTT:
+                ifttt = cast(IFTTTConfiguration, channel)
+                lookups.extend((self.ifttt_keys[ifttt.key], self.ifttt_events[ifttt.event]))
+
+        for lookup in lookups:
+            if remove:
+                lookup.discard(id_channel)
+            else:
+                lookup.add(id_channel)
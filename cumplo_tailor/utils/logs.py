@@ -0,0 +1,274 @@
+import random
+import sys
+from abc import ABC, abstractmethod
+from copy import copy
+from functools import cached_property
+from logging import WARNING, Filter, Formatter, Handler, LogRecord, getLogger
+from queue import Empty, Full, Queue
+from threading import Thread, current_thread
+from time import monotonic
+from typing import TYPE_CHECKING, TextIO
+
+from cumplo_tailor.utils.constants import (
+    LOG_BATCH_SIZE,
+    LOG_CLOSE_TIMEOUT,
+    LOG_FILE,
+    LOG_FLUSH_INTERVAL,
+    LOG_FORMAT,
+    LOG_LEVEL,
+    LOG_NAME,
+    LOG_QUEUE_SIZE,
+    LOG_SAMPLING,
+    LOG_SINK,
+)
+from cumplo_tailor.utils.metrics import Timer, metrics
+
+if TYPE_CHECKING:
+    from google.cloud.logging import Client, Logger, Resource
+
+
+class Sink(ABC):
+    """Destination of the batches of log records."""
+
+    @abstractmethod
+    def write(self, records: list[LogRecord]) -> None:
+        """Write a batch of records."""
+
+    def close(self) -> None:  # noqa: B027
+        """Release the resources of the sink, if any."""
+
+
+class StreamSink(Sink):
+    """Sink writing the formatted records to a stream, such as the standard output."""
+
+    def __init__(self, stream: TextIO, formatter: Formatter) -> None:
+        self.stream = stream
+        self.formatter = formatter
+
+    def write(self, records: list[LogRecord]) -> None:
+        """Write the formatted records at once and flush the stream."""
+        self.stream.write("".join(f"{self.formatter.format(record)}\n" for record in records))
+        self.stream.flush()
+
+
+class FileSink(StreamSink):
+    """Sink appending the formatted records to a file."""
+
+    def __init__(self, path: str, formatter: Formatter) -> None:
+        super().__init__(open(path, "a", encoding="utf-8"), formatter)  # noqa: PTH123, SIM115
+
+    def close(self) -> None:
+        """Close the file."""
+        self.stream.close()
+
+
+class CloudLoggingSink(Sink):
+    """
+    Sink shipping each batch of records to Cloud Logging in a single request.
+
+    Entries are attributed to the detected monitored resource, such as the Cloud Run revision, and carry the `trace`,
+    `span_id`, `trace_sampled` and `labels` given as extras of the record, so they are correlated with the requests.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    @cached_property
+    def client(self) -> "Client":
+        """The Cloud Logging client, built on the first batch."""
+        import google.cloud.logging  # noqa: PLC0415
+
+        return google.cloud.logging.Client()
+
+    @cached_property
+    def logger(self) -> "Logger":
+        """The Cloud Logging logger of the sink."""
+        return self.client.logger(self.name, resource=self.resource)
+
+    @cached_property
+    def resource(self) -> "Resource":
+        """The monitored resource the records come from, detected from the environment on the first batch."""
+        # NOTE: The same detection the client library runs for its own handlers, which it doesn't expose publicly
+        from google.cloud.logging_v2.handlers._monitored_resources import (  # noqa: PLC0415
+            detect_resource,  # noqa: PLC2701
+        )
+
+        return detect_resource(self.client.project)
+
+    def write(self, records: list[LogRecord]) -> None:
+        """Write the records as structured entries of a single batch."""
+        batch = self.logger.batch()
+        for record in records:
+            payload = {"message": record.getMessage(), "logger": record.name}
+            if record.exc_text:
+                payload["exception"] = record.exc_text
+
+            location = {"file": record.pathname, "line": str(record.lineno), "function": record.funcName}
+            batch.log_struct(
+                payload,
+                severity=record.levelname,
+                source_location=location,
+                resource=self.resource,
+                labels=getattr(record, "labels", None) or None,
+                trace=self._trace(getattr(record, "trace", None)),
+                span_id=getattr(record, "span_id", None) or None,
+                trace_sampled=bool(getattr(record, "trace_sampled", False)),
+            )
+        batch.commit()
+
+    def _trace(self, trace: str | None) -> str | None:
+        """Qualify a bare trace ID with the project, as Cloud Logging expects to correlate the entry."""
+        if not trace or trace.startswith("projects/"):
+            return trace or None
+        return f"projects/{self.client.project}/traces/{trace}"
+
+
+class SamplingFilter(Filter):
+    """
+    Filter keeping only a fraction of the records of the hot loggers.
+
+    Rates are configured by logger name and also apply to their children, the most specific one winning. Warnings and
+    errors are always kept.
+    """
+
+    def __init__(self, rates: dict[str, float]) -> None:
+        super().__init__()
+        self.rates = rates
+        self._rate_by_logger: dict[str, float] = {}
+
+    def filter(self, record: LogRecord) -> bool:
+        """Whether to keep the record."""
+        if record.levelno >= WARNING or not self.rates:
+            return True
+
+        if (rate := self._rate_by_logger.get(record.name)) is None:
+            rate = self._rate_by_logger[record.name] = self._resolve(record.name)
+
+        if rate >= 1 or random.random() < rate:  # noqa: S311
+            return True
+
+        metrics.increment("log_records_sampled_out", logger=record.name)
+        return False
+
+    def _resolve(self, name: str) -> float:
+        """Get the rate of the most specific configured logger the given one descends from."""
+        parts = name.split(".")
+        for end in range(len(parts), 0, -1):
+            if (rate := self.rates.get(".".join(parts[:end]))) is not None:
+                return rate
+        return 1.0
+
+
+class BatchingHandler(Handler):
+    """
+    Handler placing the records on a bounded queue, from which a background thread ships them to the sink in batches.
+
+    Logging never blocks the caller: when the queue is full the record is dropped and counted instead. A batch is
+    written once it reaches the batch size or the flush interval has elapsed since its first record.
+    """
+
+    def __init__(self, sink: Sink, capacity: int, batch_size: int, flush_interval: float) -> None:
+        super().__init__()
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue: Queue[LogRecord | None] = Queue(maxsize=capacity)
+        self.worker = Thread(target=self._ship, name="log-shipper", daemon=True)
+        self.worker.start()
+
+    def emit(self, record: LogRecord) -> None:
+        """Queue the record, dropping it if the queue is full."""
+        if current_thread() is self.worker:
+            # NOTE: Records logged while shipping, such as the client library ones, would feed back into the queue
+            sys.stderr.write(f"{record.levelname}: {record.getMessage()}\n")
+            return
+
+        try:
+            self.queue.put_nowait(self.prepare(record))
+        except Full:
+            metrics.increment("log_records_dropped", level=record.levelname)
+        except Exception:  # noqa: BLE001
+            self.handleError(record)
+
+    @staticmethod
+    def prepare(record: LogRecord) -> LogRecord:
+        """Render the message and the exception of the record, so it can be formatted later in another thread."""
+        prepared = copy(record)
+        prepared.msg, prepared.args = record.getMessage(), None
+        if record.exc_info:
+            prepared.exc_text = prepared.exc_text or Formatter().formatException(record.exc_info)
+            prepared.exc_info = None
+        return prepared
+
+    def close(self) -> None:
+        """Ship the queued records and close the sink."""
+        if self.worker.is_alive():
+            try:
+                self.queue.put(None, timeout=LOG_CLOSE_TIMEOUT)
+                self.worker.join(LOG_CLOSE_TIMEOUT)
+            except Full:
+                sys.stderr.write("Timed out shipping the queued log records\n")
+
+        self.sink.close()
+        super().close()
+
+    def _ship(self) -> None:
+        """Collect the queued records into batches and write them, until the queue is closed."""
+        closing = False
+        while not closing and (record := self.queue.get()) is not None:
+            batch, deadline = [record], monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and (timeout := deadline - monotonic()) > 0:
+                try:
+                    record = self.queue.get(timeout=timeout)
+                except Empty:
+                    break
+
+                if record is None:
+                    closing = True
+                    break
+                batch.append(record)
+
+            self._write(batch)
+
+    def _write(self, batch: list[LogRecord]) -> None:
+        """Write the batch to the sink, reporting the failure on the standard error instead of raising."""
+        try:
+            with Timer("log_batch"):
+                self.sink.write(batch)
+        except Exception as error:  # noqa: BLE001
+            metrics.increment("log_records_failed", len(batch))
+            sys.stderr.write(f"Failed to ship {len(batch)} log records: {error}\n")
+        else:
+            metrics.increment("log_records_shipped", len(batch))
+
+
+def setup() -> BatchingHandler:
+    """
+    Replace the handlers of the root logger with a batching one, shipping the records to the sink set in `LOG_SINK`.
+
+    Raises:
+        ValueError: When the sink is unknown.
+
+    Returns:
+        BatchingHandler: The installed handler.
+
+    """
+    match LOG_SINK:
+        case "cloud":
+            sink: Sink = CloudLoggingSink(LOG_NAME)
+        case "stdout":
+            sink = StreamSink(sys.stdout, Formatter(LOG_FORMAT))
+        case "file":
+            sink = FileSink(LOG_FILE, Formatter(LOG_FORMAT))
+        case _:
+            message = f"Unknown log sink {LOG_SINK}"
+            raise ValueError(message)
+
+    handler = BatchingHandler(sink, LOG_QUEUE_SIZE, LOG_BATCH_SIZE, LOG_FLUSH_INTERVAL)
+    handler.addFilter(SamplingFilter(LOG_SAMPLING))
+
+    root = getLogger()
+    root.handlers.clear()
+    root.addHandler(handler)
+    root.setLevel(LOG_LEVEL)
+    return handler
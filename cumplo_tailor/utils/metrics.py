@@ -0,0 +1,194 @@
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from collections.abc import Callable
+from functools import wraps
+from inspect import iscoroutinefunction
+from threading import Lock
+from time import perf_counter
+from types import TracebackType
+from typing import Any
+
+from cumplo_tailor.utils.constants import DISABLE_METRICS
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+COUNT_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+# NOTE: Lookups of missing documents raise these, which are outcomes rather than failures of the operation
+MISSES = frozenset({"KeyError", "NotFound"})
+
+ESCAPES = str.maketrans({"\\": "\\\\", '"': '\\"', "\n": "\\n"})
+
+type Labels = tuple[tuple[str, str], ...]
+
+
+class Histogram:
+    """Histogram of observed values over fixed bucket upper bounds."""
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """Record a value in its bucket."""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return the bucket counts along with the sum and count of the observed values."""
+        bounds = [*map(str, self.buckets), "+Inf"]
+        return {"buckets": dict(zip(bounds, self.counts, strict=True)), "sum": self.sum, "count": self.count}
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        """Return the cumulative count of each bucket, as exposed by Prometheus."""
+        bounds = [*map(str, self.buckets), "+Inf"]
+        total, counts = 0, []
+        for bound, count in zip(bounds, self.counts, strict=True):
+            total += count
+            counts.append((bound, total))
+        return counts
+
+
+class Metrics:
+    """
+    Process-level counters and histograms of the service, optionally labelled.
+
+    When `DISABLE_METRICS` is set every recording call returns right away, so the instrumentation can stay in the hot
+    paths at a negligible cost.
+    """
+
+    def __init__(self, *, enabled: bool = not DISABLE_METRICS) -> None:
+        self.enabled = enabled
+        self._lock = Lock()
+        self._counters: defaultdict[str, Counter[Labels]] = defaultdict(Counter)
+        self._histograms: defaultdict[str, dict[Labels, Histogram]] = defaultdict(dict)
+
+    def increment(self, name: str, amount: int = 1, **labels: str) -> None:
+        """Increment the counter with the given name and labels."""
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._counters[name][tuple(sorted(labels.items()))] += amount
+
+    def observe(self, name: str, value: float, buckets: tuple[float, ...] = DEFAULT_BUCKETS, **labels: str) -> None:
+        """Record a value in the histogram with the given name and labels, created with the buckets on first use."""
+        if not self.enabled:
+            return
+
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            if not (histogram := self._histograms[name].get(key)):
+                histogram = self._histograms[name][key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return a copy of the current counters and histograms, keyed by their series."""
+        with self._lock:
+            counters = {
+                _series(name, labels): value
+                for name, series in self._counters.items()
+                for labels, value in series.items()
+            }
+            histograms = {
+                _series(name, labels): histogram.snapshot()
+                for name, series in self._histograms.items()
+                for labels, histogram in series.items()
+            }
+            return {**counters, **histograms}
+
+    def render(self) -> str:
+        """Render the current counters, suffixed with `_total`, and histograms in the Prometheus text format."""
+        lines: list[str] = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# TYPE {name}_total counter")
+                lines.extend(f"{_series(f'{name}_total', labels)} {value}" for labels, value in sorted(series.items()))
+
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                for labels, histogram in sorted(series.items()):
+                    lines.extend(
+                        f"{_series(f'{name}_bucket', (*labels, ('le', bound)))} {count}"
+                        for bound, count in histogram.cumulative()
+                    )
+                    lines.extend((
+                        f"{_series(f'{name}_sum', labels)} {histogram.sum}",
+                        f"{_series(f'{name}_count', labels)} {histogram.count}",
+                    ))
+
+        return "\n".join([*lines, ""])
+
+
+class Timer:
+    """
+    Context manager timing a block into the `{metric}_seconds` histogram.
+
+    Failures are also counted in the `{metric}_errors` counter, labelled with the type of the raised exception, except
+    for the lookups of missing documents, which are counted in the `{metric}_misses` counter instead.
+    """
+
+    def __init__(self, metric: str, **labels: str) -> None:
+        self.metric = metric
+        self.labels = labels
+        self.start = 0.0
+
+    def __enter__(self) -> "Timer":
+        self.start = perf_counter()
+        return self
+
+    def __exit__(
+        self, kind: type[BaseException] | None, _error: BaseException | None, _traceback: TracebackType | None
+    ) -> None:
+        metrics.observe(f"{self.metric}_seconds", perf_counter() - self.start, **self.labels)
+        if kind is None:
+            return
+
+        if kind.__name__ in MISSES:
+            metrics.increment(f"{self.metric}_misses", **self.labels)
+        else:
+            metrics.increment(f"{self.metric}_errors", **self.labels, error=kind.__name__)
+
+
+def timed[F: Callable[..., Any]](metric: str, **labels: str) -> Callable[[F], F]:
+    """
+    Time every call of the decorated function, either synchronous or asynchronous, with a `Timer`.
+
+    When metrics are disabled the function is returned untouched, so it runs without any overhead.
+    """
+
+    def decorator(function: F) -> F:
+        if not metrics.enabled:
+            return function
+
+        if iscoroutinefunction(function):
+
+            @wraps(function)
+            async def asynchronous(*args: Any, **kwargs: Any) -> Any:
+                with Timer(metric, **labels):
+                    return await function(*args, **kwargs)
+
+            return asynchronous  # type: ignore[return-value]
+
+        @wraps(function)
+        def synchronous(*args: Any, **kwargs: Any) -> Any:
+            with Timer(metric, **labels):
+                return function(*args, **kwargs)
+
+        return synchronous  # type: ignore[return-value]
+
+    return decorator
+
+
+def _series(name: str, labels: Labels) -> str:
+    """Format the name of a series along with its escaped labels."""
+    if not labels:
+        return name
+
+    pairs = ",".join(f'{key}="{value.translate(ESCAPES)}"' for key, value in labels)
+    return f"{name}{{{pairs}}}"
+
+
+metrics = Metrics()
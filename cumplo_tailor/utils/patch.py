@@ -0,0 +1,93 @@
+from collections.abc import Collection
+from typing import Any, NamedTuple
+
+from pydantic import BaseModel
+
+type Path = tuple[str, ...]
+
+
+class Patched[M: BaseModel](NamedTuple):
+    """The result of patching a model along with the paths whose value changed."""
+
+    model: M
+    changes: set[Path]
+
+
+def merge_patch[M: BaseModel](model: M, patch: dict[str, Any], exclude: Collection[str] = ()) -> Patched[M]:
+    """
+    Apply a JSON Merge Patch (RFC 7386) to a model without modifying it.
+
+    Only the patched fields are validated, through the model's assignment validation, and the untouched ones are
+    shared with the original model. Nested objects are merged into sub-models and dictionaries, and `null` values
+    remove the member, which resets the field to its default. A `ValidationError` is raised if a patched value is not
+    valid.
+
+    Args:
+        model (M): The model to patch.
+        patch (dict[str, Any]): The merge patch.
+        exclude (Collection[str]): Top-level fields that can't be patched. These, like unknown fields, are ignored.
+
+    Returns:
+        Patched[M]: The patched model, which is the original one when nothing changed, and the changed paths.
+
+    """
+    names = {field.alias or name: name for name, field in type(model).model_fields.items()}
+    patched, changes = model, set[Path]()
+    for key, value in patch.items():
+        if (name := names.get(key, key)) not in type(model).model_fields or name in exclude:
+            continue
+
+        current = getattr(model, name)
+        match value:
+            case None:
+                field = type(model).model_fields[name]
+                new = None if field.is_required() else field.get_default(call_default_factory=True)
+                nested = {(name,)} if new != current else set()
+
+            case dict() if isinstance(current, BaseModel):
+                new, changed = merge_patch(current, value)
+                nested = {(name, *path) for path in changed}
+
+            case dict() if isinstance(current, dict):
+                new, nested = _merge_dictionary(current, value, prefix=(name,))
+
+            case _:
+                new, nested = value, {(name,)}
+
+        if not nested:
+            continue
+
+        if patched is model:
+            patched = model.model_copy()
+
+        type(model).__pydantic_validator__.validate_assignment(patched, name, new)
+        if getattr(patched, name) != current:
+            changes |= nested
+
+    return Patched(patched, changes) if changes else Patched(model, changes)
+
+
+def _merge_dictionary(current: dict, patch: dict, prefix: Path) -> tuple[dict, set[Path]]:
+    """Merge a patch into a copy of a dictionary, returning it along with the changed paths."""
+    merged, changes = dict(current), set[Path]()
+    for key, value in patch.items():
+        if value is None:
+            if key in merged:
+                del merged[key]
+                changes.add((*prefix, key))
+            continue
+
+        match merged.get(key):
+            case BaseModel() as item if isinstance(value, dict):
+                merged[key], changed = merge_patch(item, value)
+                changes |= {(*prefix, key, *path) for path in changed}
+
+            case dict() as item if isinstance(value, dict):
+                merged[key], changed = _merge_dictionary(item, value, prefix=(*prefix, key))
+                changes |= changed
+
+            case item if item != value:
+                merged[key] = value
+                changes.add((*prefix, key))
+
+    return merged, changes
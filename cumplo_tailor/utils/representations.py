@@ -0,0 +1,109 @@
+from collections import OrderedDict
+from collections.abc import Callable
+from hashlib import blake2b
+from http import HTTPStatus
+from threading import Lock
+from typing import NamedTuple
+
+from cumplo_common.models.user import User
+from fastapi import Response
+from fastapi.requests import Request
+
+from cumplo_tailor.utils.constants import REPRESENTATION_CACHE_SIZE
+from cumplo_tailor.utils.metrics import metrics
+from cumplo_tailor.utils.serialization import JSON_MEDIA_TYPE
+
+CACHE_CONTROL = "private, no-cache"
+
+type RepresentationKey = tuple[str, int, str]
+
+
+class Representation(NamedTuple):
+    """A serialized response body along with its entity tag."""
+
+    etag: str
+    body: bytes
+
+
+class RepresentationCache:
+    """
+    Size-bounded LRU cache of serialized responses, keyed by user, user version and path.
+
+    A new user version never reuses the entries of the previous one, which are left to be evicted.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self._lock = Lock()
+        self._representations: OrderedDict[RepresentationKey, Representation] = OrderedDict()
+
+    def get(self, key: RepresentationKey) -> Representation | None:
+        """Get a cached representation."""
+        with self._lock:
+            if representation := self._representations.get(key):
+                self._representations.move_to_end(key)
+
+        metrics.increment("representation_cache_hits" if representation else "representation_cache_misses")
+        return representation
+
+    def put(self, key: RepresentationKey, representation: Representation) -> None:
+        """Store a representation, evicting the least recently used ones when full."""
+        with self._lock:
+            self._representations[key] = representation
+            while len(self._representations) > self.size:
+                self._representations.popitem(last=False)
+
+
+cache = RepresentationCache(size=REPRESENTATION_CACHE_SIZE)
+
+
+def _tag(body: bytes) -> Representation:
+    """Tag a serialized body with its hash."""
+    return Representation(etag=f'"{blake2b(body, digest_size=16).hexdigest()}"', body=body)
+
+
+def _matches(if_none_match: str | None, etag: str) -> bool:
+    """Check whether an If-None-Match header matches the entity tag, using the weak comparison."""
+    if not if_none_match:
+        return False
+
+    if if_none_match.strip() == "*":
+        return True
+
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def respond(
+    request: Request, render: Callable[[], bytes], user: User | None = None, version: int | None = None
+) -> Response:
+    """
+    Build a JSON response tagged with an ETag, answering with 304 when the client's copy is still current.
+
+    The ETag is the hash of the body, so it only changes along with the content. When the user has a version the
+    serialized body is cached and `render` is only called on the first request for that version.
+
+    Args:
+        request (Request): The incoming request.
+        render (Callable[[], bytes]): Serializes the JSON content of the response.
+        user (User | None): The user owning the resource. Defaults to the authenticated user.
+        version (int | None): The version of the user. Defaults to the authenticated user's version.
+
+    Returns:
+        Response: The serialized content or an empty 304 response.
+
+    """
+    if user is None:
+        user, version = request.state.user, getattr(request.state, "version", None)
+
+    key = (str(user.id), version, request.url.path) if version is not None else None
+    if not (key and (representation := cache.get(key))):
+        representation = _tag(render())
+        if key:
+            cache.put(key, representation)
+
+    headers = {"ETag": representation.etag, "Cache-Control": CACHE_CONTROL}
+    if _matches(request.headers.get("If-None-Match"), representation.etag):
+        metrics.increment("responses_not_modified")
+        return Response(status_code=HTTPStatus.NOT_MODIFIED, headers=headers)
+
+    return Response(content=representation.body, media_type=JSON_MEDIA_TYPE, headers=headers)
@@ -0,0 +1,104 @@
+import re
+from email.utils import parseaddr
+from typing import NamedTuple
+
+
+class SenderPattern(NamedTuple):
+    """A compiled subscription pattern along with the groups holding the subscriber's name and email."""
+
+    regex: re.Pattern[str]
+    name: str | int
+    email: str | int
+
+    def extract(self, snippet: str) -> tuple[str, str] | None:
+        """Extract the subscriber's name and email from the snippet, if it matches."""
+        if not (match := self.regex.search(snippet)):
+            return None
+        return match.group(self.name), match.group(self.email)
+
+
+class SenderMatcher:
+    """
+    Matcher of subscription messages built once from the configured patterns by sender.
+
+    Senders are normalized (display name, case and plus-addressing are ignored) and looked up first by exact address
+    and then by domain, walking up its parent domains. Patterns are keyed by address (`news@example.com`) or by domain
+    (`example.com` or `@example.com`).
+    """
+
+    def __init__(self, patterns: dict[str, str]) -> None:
+        self._by_address: dict[str, SenderPattern] = {}
+        self._by_domain: dict[str, SenderPattern] = {}
+
+        for sender, pattern in patterns.items():
+            compiled = self.compile(pattern)
+            key = sender.strip().casefold()
+            if "@" in key.lstrip("@"):
+                self._by_address[self.normalize(key)] = compiled
+            else:
+                self._by_domain[key.lstrip("@")] = compiled
+
+    @staticmethod
+    def compile(pattern: str) -> SenderPattern:
+        """
+        Compile and validate a pattern.
+
+        Patterns must expose `name` and `email` named groups, or at least two positional groups holding them in order.
+
+        Raises:
+            ValueError: If the pattern is invalid or doesn't expose the name and email groups.
+
+        """
+        try:
+            regex = re.compile(pattern)
+        except re.error as error:
+            message = f"Invalid subscription pattern {pattern!r}: {error}"
+            raise ValueError(message) from error
+
+        if {"name", "email"} <= regex.groupindex.keys():
+            return SenderPattern(regex, "name", "email")
+
+        if regex.groups >= 2:  # noqa: PLR2004
+            return SenderPattern(regex, 1, 2)
+
+        message = f"Subscription pattern {pattern!r} must expose the name and email groups"
+        raise ValueError(message)
+
+    @staticmethod
+    def normalize(sender: str) -> str:
+        """Normalize a sender into its lowercase address without display name nor plus-addressing tag."""
+        start, end = sender.rfind("<"), sender.rfind(">")
+        address = sender[start + 1 : end] if 0 <= start < end else sender
+        if "@" not in address:
+            address = parseaddr(sender)[1] or sender
+
+        address = address.strip().casefold()
+        local, at, domain = address.rpartition("@")
+        if not at:
+            return address
+        return f"{local.split('+', 1)[0]}@{domain}"
+
+    def find(self, sender: str) -> SenderPattern | None:
+        """Find the pattern of the sender by its address, falling back to its domain and parent domains."""
+        address = self.normalize(sender)
+        if pattern := self._by_address.get(address):
+            return pattern
+
+        domain = address.rpartition("@")[2]
+        while domain:
+            if pattern := self._by_domain.get(domain):
+                return pattern
+            domain = domain.partition(".")[2]
+        return None
+
+    def match(self, sender: str, snippet: str) -> tuple[str, str] | None:
+        """
+        Extract the subscriber's name and email from a message.
+
+        Returns:
+            tuple[str, str] | None: The name and email or None if the sender is unknown or the snippet doesn't match.
+
+        """
+        if not (pattern := self.find(sender)):
+            return None
+        return pattern.extract(snippet)
@@ -0,0 +1,61 @@
+import os
+
+# NOTE: Set before the package is imported, since the constants are read from the environment on import
+os.environ.setdefault("IS_TESTING", "1")
+os.environ.setdefault("DATABASE_BACKEND", "sqlite")
+os.environ.setdefault("SQLITE_PATH", ":memory:")
+os.environ.setdefault("OUTBOX_PUBLISHER", "memory")
+os.environ.setdefault("USER_CACHE_SIZE", "100")
+
+import pytest
+import ulid
+from cumplo_common.models.channel import CHANNEL_CONFIGURATION_BY_TYPE, ChannelType, PublicEvent
+from cumplo_common.models.user import User
+
+from cumplo_tailor.controllers import ChannelsController, OutboxController
+from cumplo_tailor.database import repository
+from cumplo_tailor.database.cache import cache
+from cumplo_tailor.integrations.publishers import MemoryPublisher
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    """Run the asynchronous tests on asyncio, the loop the service runs on."""
+    return "asyncio"
+
+
+@pytest.fixture(autouse=True)
+def database() -> repository.RepositoryClient:
+    """Give every test a new in-memory SQLite database and an empty user cache."""
+    repository.client.__dict__.pop("_collections", None)
+    with cache._lock:  # noqa: SLF001
+        cache._users.clear()  # noqa: SLF001
+        cache._ids_by_api_key.clear()  # noqa: SLF001
+
+    return repository.client
+
+
+@pytest.fixture
+def publisher(monkeypatch: pytest.MonkeyPatch) -> MemoryPublisher:
+    """Replace the outbox publisher with an in-process one."""
+    publisher = MemoryPublisher()
+    monkeypatch.setattr(OutboxController, "publisher", publisher)
+    return publisher
+
+
+@pytest.fixture
+def user() -> User:
+    """Build a user with a webhook channel subscribed to every event."""
+    id_channel = str(ulid.new())
+    channel = CHANNEL_CONFIGURATION_BY_TYPE[ChannelType.WEBHOOK].model_validate({
+        "id": id_channel,
+        "url": "https://example.com/hook",
+    })
+    for event in PublicEvent:
+        ChannelsController.enable_event(channel, event)
+    return User.model_validate({
+        "id": ulid.new(),
+        "api_key": f"key-{id_channel}",
+        "name": "Tailor",
+        "channels": {id_channel: channel.json()},
+    })
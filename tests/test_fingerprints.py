@@ -0,0 +1,40 @@
+from pydantic import BaseModel, Field
+
+from cumplo_tailor.utils.fingerprints import fingerprint
+
+
+class Configuration(BaseModel):
+    id: str = Field(...)
+    name: str | None = Field(None)
+    events: set[str] = Field(default_factory=set)
+    limits: dict[str, list[int]] = Field(default_factory=dict)
+    target: str | None = Field(None)
+
+
+class TestFingerprint:
+    def test_ignores_id_and_name(self) -> None:
+        """Configurations differing only in their ID and name share a fingerprint."""
+        first = Configuration(id="1", name="first", events={"a"})
+        second = Configuration(id="2", name="second", events={"a"})
+        assert fingerprint(first) == fingerprint(second)
+
+    def test_ignores_the_order_of_sets_and_keys(self) -> None:
+        """The order of sets and keys doesn't change the fingerprint."""
+        first = Configuration(id="1", events={"a", "b", "c"}, limits={"x": [1, 2], "y": [3]})
+        second = Configuration(id="1", events={"c", "a", "b"}, limits={"y": [3], "x": [1, 2]})
+        assert fingerprint(first) == fingerprint(second)
+
+    def test_keeps_the_order_of_lists(self) -> None:
+        """Lists with the same items in a different order have different fingerprints."""
+        first = Configuration(id="1", limits={"x": [1, 2]})
+        second = Configuration(id="1", limits={"x": [2, 1]})
+        assert fingerprint(first) != fingerprint(second)
+
+    def test_ignores_missing_values(self) -> None:
+        """Unset and null values hash the same."""
+        assert fingerprint(Configuration(id="1")) == fingerprint(Configuration(id="1", target=None))
+
+    def test_differs_on_content(self) -> None:
+        """Configurations with different content have different fingerprints."""
+        assert fingerprint(Configuration(id="1", events={"a"})) != fingerprint(Configuration(id="1", events={"b"}))
+        assert fingerprint(Configuration(id="1")) != fingerprint(Configuration(id="1", target="a"))
@@ -0,0 +1,86 @@
+import json
+from collections import OrderedDict
+from http import HTTPStatus
+from pathlib import Path
+
+import pytest
+import ulid
+from cumplo_common.models.channel import CHANNEL_CONFIGURATION_BY_TYPE, ChannelType
+from cumplo_common.models.user import User
+from fastapi.exceptions import HTTPException
+
+from cumplo_tailor.controllers import ChannelsController, LimitsController
+from cumplo_tailor.controllers import limits as controller
+from cumplo_tailor.controllers.limits import EVENTS, FILTERS, LimitsConfiguration
+from cumplo_tailor.utils.fingerprints import UserIndex
+
+CONFIGURATION = {
+    "default": {FILTERS: 1},
+    "plans": {"pro": {FILTERS: 10, ChannelType.WEBHOOK: 5}},
+    "users": {"pro-user": "pro", "custom-user": {FILTERS: 3}},
+}
+
+
+@pytest.fixture
+def limits_file(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Path:
+    """Load the limits from a file, starting from a pristine controller."""
+    path = tmp_path / "limits.json"
+    path.write_text(json.dumps(CONFIGURATION), encoding="utf-8")
+    monkeypatch.setattr(controller, "LIMITS_FILE", str(path))
+    monkeypatch.setattr(LimitsController, "_configuration", LimitsConfiguration())
+    monkeypatch.setattr(LimitsController, "_limits_by_user", OrderedDict())
+    monkeypatch.setattr(LimitsController, "_modified_at", None)
+    monkeypatch.setattr(LimitsController, "_checked_at", None)
+    return path
+
+
+@pytest.mark.usefixtures("limits_file")
+class TestLimits:
+    def test_layers_the_tiers(self) -> None:
+        """Users get their own limits over their plan ones, which are layered over the default ones."""
+        assert LimitsController.resolve("pro-user")[FILTERS] == CONFIGURATION["plans"]["pro"][FILTERS]
+        assert LimitsController.resolve("custom-user")[FILTERS] == CONFIGURATION["users"]["custom-user"][FILTERS]
+        assert LimitsController.resolve("other-user")[FILTERS] == CONFIGURATION["default"][FILTERS]
+        assert LimitsController.resolve("other-user")[ChannelType.WEBHOOK] == controller.MAX_WEBHOOKS
+
+    def test_checks_the_usage(self) -> None:
+        """Usage up to the limit is allowed and beyond it is rejected."""
+        LimitsController.check("pro-user", {FILTERS: 10, ChannelType.WEBHOOK: 5, EVENTS: 100})
+        with pytest.raises(HTTPException) as error:
+            LimitsController.check("pro-user", {FILTERS: 11})
+
+        assert error.value.status_code == HTTPStatus.CONFLICT
+
+    def test_reloads_the_file(self, limits_file: Path) -> None:
+        """Changes to the file replace the configuration and the resolved limits."""
+        LimitsController.resolve("other-user")
+        limits_file.write_text(json.dumps({"default": {FILTERS: 2}}), encoding="utf-8")
+
+        LimitsController.reload(force=True)
+        assert LimitsController.resolve("other-user")[FILTERS] == 2  # noqa: PLR2004
+
+    def test_keeps_the_configuration_on_errors(self, limits_file: Path) -> None:
+        """Invalid configurations are rejected, keeping the previous one."""
+        LimitsController.configuration()
+        limits_file.write_text(json.dumps({"users": {"user": "missing-plan"}}), encoding="utf-8")
+
+        LimitsController.reload(force=True)
+        assert LimitsController.resolve("pro-user")[FILTERS] == CONFIGURATION["plans"]["pro"][FILTERS]
+
+    def test_counts_the_channel_usage(self) -> None:
+        """The usage counts the channels of each type once, whether they are new or updated."""
+        channels = [
+            CHANNEL_CONFIGURATION_BY_TYPE[ChannelType.WEBHOOK].model_validate({
+                "id": ulid.new(),
+                "url": f"https://example.com/{index}",
+            })
+            for index in range(2)
+        ]
+        user = User.model_validate({
+            "id": ulid.new(),
+            "api_key": "key",
+            "channels": {str(channels[0].id): channels[0].json()},
+        })
+
+        usage = ChannelsController.usage(UserIndex(user), channels)
+        assert usage[ChannelType.WEBHOOK] == len(channels)
@@ -0,0 +1,72 @@
+from typing import override
+
+import pytest
+from cumplo_common.models.user import User
+
+from cumplo_tailor.controllers import OutboxController, UsersController
+from cumplo_tailor.database import ChangeEvent, Operation, UserChanges, repository
+from cumplo_tailor.integrations.publishers import MemoryPublisher
+
+pytestmark = pytest.mark.anyio
+
+
+class FailingPublisher(MemoryPublisher):
+    """Publisher failing to deliver the events of the given users."""
+
+    def __init__(self, failing: set[str]) -> None:
+        super().__init__()
+        self.failing = failing
+
+    @override
+    async def publish(self, events: list[ChangeEvent]) -> set[str]:
+        return await super().publish([event for event in events if event.id_user not in self.failing])
+
+
+@pytest.fixture
+async def stored(database: repository.RepositoryClient, user: User) -> User:
+    """Store the user, appending its creation to the outbox."""
+    await database.users.create(user, ChangeEvent.build(str(user.id), Operation.CREATED))
+    return user
+
+
+class TestOutbox:
+    async def test_relays_the_events_in_order(
+        self, database: repository.RepositoryClient, publisher: MemoryPublisher, stored: User
+    ) -> None:
+        """Every write appends its event, which is published in the order of the writes and removed once delivered."""
+        stored.name = "Renamed"
+        await UsersController.update(stored, UserChanges(attributes={"name"}))
+        await UsersController.disable(stored)
+
+        operations = [Operation.CREATED, Operation.UPDATED, Operation.DISABLED]
+        assert await OutboxController.relay() == len(operations)
+        assert [event.operation for event in publisher.events] == operations
+        versions = [event.version for event in publisher.events]
+        assert versions == sorted(versions)
+        assert not await database.outbox.pending(10)
+
+    async def test_keeps_undelivered_events(
+        self, monkeypatch: pytest.MonkeyPatch, database: repository.RepositoryClient, stored: User
+    ) -> None:
+        """Events that fail to be delivered stay in the outbox and are retried."""
+        publisher = FailingPublisher({str(stored.id)})
+        monkeypatch.setattr(OutboxController, "publisher", publisher)
+        assert await OutboxController.relay() == 0
+        assert len(await database.outbox.pending(10)) == 1
+
+        publisher.failing.clear()
+        assert await OutboxController.relay() == 1
+        assert not await database.outbox.pending(10)
+
+    async def test_relays_only_holding_the_lease(
+        self, database: repository.RepositoryClient, publisher: MemoryPublisher, stored: User
+    ) -> None:
+        """Another instance holding the lease keeps the events from being published until it expires."""
+        assert await database.outbox.lease("other", 60)
+        assert await OutboxController.relay() == 0
+        assert not publisher.events
+
+        assert await database.outbox.lease("other", -1)
+        assert await OutboxController.relay() == 1
+        assert [event.id_user for event in publisher.events] == [str(stored.id)]
+        assert not await database.outbox.lease("other", 60)
@@ -0,0 +1,55 @@
+import pytest
+from pydantic import BaseModel, Field, ValidationError
+
+from cumplo_tailor.utils.patch import merge_patch
+
+
+class Settings(BaseModel):
+    threshold: int = Field(0)
+    enabled: bool = Field(default=True)
+
+
+class Item(BaseModel):
+    id: str = Field(...)
+    count: int = Field(1)
+    settings: Settings = Field(default_factory=Settings)
+    labels: dict[str, str] = Field(default_factory=dict)
+
+
+@pytest.fixture
+def item() -> Item:
+    """Build an item with every kind of field set."""
+    return Item(id="1", count=3, settings=Settings(threshold=2), labels={"a": "1", "b": "2"})
+
+
+class TestMergePatch:
+    def test_merges_nested_objects(self, item: Item) -> None:
+        """Nested objects are merged into sub-models and dictionaries, reporting the changed paths."""
+        model, changes = merge_patch(item, {"settings": {"threshold": 5}, "labels": {"c": "3"}})
+        assert model.settings == Settings(threshold=5)
+        assert model.labels == {"a": "1", "b": "2", "c": "3"}
+        assert changes == {("settings", "threshold"), ("labels", "c")}
+        assert item.settings == Settings(threshold=2)
+        assert item.labels == {"a": "1", "b": "2"}
+
+    def test_deletes_null_members(self, item: Item) -> None:
+        """Null values remove dictionary members and reset fields to their default."""
+        model, changes = merge_patch(item, {"count": None, "labels": {"a": None, "missing": None}})
+        assert model.count == 1
+        assert model.labels == {"b": "2"}
+        assert changes == {("count",), ("labels", "a")}
+
+    def test_returns_the_same_model_when_nothing_changes(self, item: Item) -> None:
+        """A patch without changes, or only touching excluded and unknown fields, returns the original model."""
+        patch = {"id": "2", "unknown": 1, "count": 3, "settings": {"threshold": 2}, "labels": {"a": "1"}}
+        model, changes = merge_patch(item, patch, exclude={"id"})
+        assert model is item
+        assert not changes
+
+    def test_rejects_invalid_values(self, item: Item) -> None:
+        """Patched values are validated."""
+        with pytest.raises(ValidationError):
+            merge_patch(item, {"count": "many"})
+
+        with pytest.raises(ValidationError):
+            merge_patch(item, {"settings": {"threshold": "high"}})
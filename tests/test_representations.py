@@ -0,0 +1,47 @@
+from http import HTTPStatus
+
+from cumplo_common.models.user import User
+from fastapi.requests import Request
+
+from cumplo_tailor.utils.representations import respond
+
+
+def build_request(user: User, version: int | None = None, if_none_match: str | None = None) -> Request:
+    """Build an authenticated request for the user's filters."""
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    request = Request({"type": "http", "method": "GET", "path": "/filters", "query_string": b"", "headers": headers})
+    request.state.user, request.state.version = user, version
+    return request
+
+
+class TestRespond:
+    def test_answers_not_modified_for_current_copies(self, user: User) -> None:
+        """Requests matching the ETag get an empty 304, and the others the tagged content."""
+        response = respond(build_request(user), lambda: b"[]")
+        assert response.status_code == HTTPStatus.OK
+        assert response.body == b"[]"
+
+        etag = response.headers["ETag"]
+        not_modified = respond(build_request(user, if_none_match=f"W/{etag}"), lambda: b"[]")
+        assert not_modified.status_code == HTTPStatus.NOT_MODIFIED
+        assert not not_modified.body
+
+        changed = respond(build_request(user, if_none_match=etag), lambda: b"[{}]")
+        assert changed.status_code == HTTPStatus.OK
+        assert changed.headers["ETag"] != etag
+
+    def test_renders_once_per_user_version(self, user: User) -> None:
+        """The body of a user version is rendered on its first request and served from the cache afterwards."""
+        renders = []
+
+        def render() -> bytes:
+            """Render the body, counting the calls."""
+            renders.append(1)
+            return b"[]"
+
+        first = respond(build_request(user, version=1), render)
+        second = respond(build_request(user, version=1), render)
+        respond(build_request(user, version=2), render)
+
+        assert len(renders) == 2  # noqa: PLR2004
+        assert first.headers["ETag"] == second.headers["ETag"]
@@ -0,0 +1,73 @@
+from collections.abc import Callable
+
+import pytest
+from cumplo_common.models.channel import ChannelConfiguration, ChannelType, PublicEvent
+from cumplo_common.models.user import User
+
+from cumplo_tailor.controllers import ChannelsController, RoutesController, UsersController
+from cumplo_tailor.database import EventRoute, UserChanges, repository
+
+pytestmark = pytest.mark.anyio
+
+
+async def subscribers(database: repository.RepositoryClient, event: PublicEvent) -> set[tuple[str, str]]:
+    """Get the user and channel IDs routed for the event, reading the index one route at a time."""
+    routes, start_after = [], None
+    while page := await database.routes.page(event, limit=1, start_after=start_after):
+        routes.extend(page)
+        start_after = page[-1].key
+    return {(route.id_user, route.id_channel) for route in routes}
+
+
+@pytest.fixture
+async def stored(database: repository.RepositoryClient, user: User) -> User:
+    """Store the user and route its channels."""
+    await database.users.create(user)
+    await RoutesController.sync(str(user.id))
+    return user
+
+
+class TestRoutes:
+    async def test_routes_every_subscribed_event(self, database: repository.RepositoryClient, stored: User) -> None:
+        """Each event is routed to the channels subscribed to it."""
+        [id_channel] = stored.channels
+        for event in PublicEvent:
+            assert await subscribers(database, event) == {(str(stored.id), id_channel)}
+
+    async def test_follows_channel_changes(self, database: repository.RepositoryClient, stored: User) -> None:
+        """Disabling an event of a channel only removes its route for that event, and enabling it adds it back."""
+        [id_channel] = stored.channels
+        event, *others = PublicEvent
+
+        def toggle(change: Callable[[ChannelConfiguration, PublicEvent], bool]) -> Callable[[User], UserChanges]:
+            """Build a mutation enabling or disabling the event on the channel."""
+
+            def mutation(user: User) -> UserChanges:
+                """Toggle the event."""
+                change(user.channels[id_channel], event)
+                return UserChanges(channels={id_channel})
+
+            return mutation
+
+        await UsersController.mutate(stored, toggle(ChannelsController.disable_event))
+        assert not await subscribers(database, event)
+        for other in others:
+            assert await subscribers(database, other) == {(str(stored.id), id_channel)}
+
+        await UsersController.mutate(stored, toggle(ChannelsController.enable_event))
+        assert await subscribers(database, event) == {(str(stored.id), id_channel)}
+
+    async def test_removes_disabled_users(self, database: repository.RepositoryClient, stored: User) -> None:
+        """Disabled users are no longer routed."""
+        await UsersController.disable(stored)
+        assert not await database.routes.users()
+
+    async def test_rebuilds_the_index(self, database: repository.RepositoryClient, user: User) -> None:
+        """Rebuilding routes the stored users and drops the routes of the missing ones."""
+        await database.users.create(user)
+        event = next(iter(PublicEvent))
+        ghost = EventRoute(event=event, id_user="ghost", id_channel="channel", channel_type=ChannelType.WEBHOOK)
+        await database.routes.sync("ghost", [ghost])
+
+        assert await RoutesController.rebuild() == len(PublicEvent)
+        assert await database.routes.users() == {str(user.id)}
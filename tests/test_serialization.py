@@ -0,0 +1,58 @@
+import json
+
+import pytest
+import ulid
+from cumplo_common.models.channel import CHANNEL_CONFIGURATION_BY_TYPE, ChannelConfiguration, ChannelType
+from cumplo_common.models.filter_configuration import FilterConfiguration
+from cumplo_common.models.user import User
+
+from cumplo_tailor.utils.serialization import channel_serializer, filter_serializer, user_serializer
+
+
+@pytest.fixture
+def filter_() -> FilterConfiguration:
+    """Build a filter with set, unset and default values."""
+    return FilterConfiguration.model_validate({
+        "id": ulid.new(),
+        "name": "Short term",
+        "minimum_score": "0.8",
+        "debtor": {"ignore_dicom": False},
+    })
+
+
+@pytest.fixture
+def channel() -> ChannelConfiguration:
+    """Build a webhook channel, stored as its base class like the user's channels."""
+    return CHANNEL_CONFIGURATION_BY_TYPE[ChannelType.WEBHOOK].model_validate({
+        "id": ulid.new(),
+        "url": "https://example.com/hook",
+    })
+
+
+@pytest.fixture
+def user(filter_: FilterConfiguration, channel: ChannelConfiguration) -> User:
+    """Build a user with a filter and a channel."""
+    return User.model_validate({
+        "id": ulid.new(),
+        "api_key": "key",
+        "name": "Tailor",
+        "filters": {str(filter_.id): filter_.json()},
+        "channels": {str(channel.id): channel.json()},
+    })
+
+
+class TestSerializers:
+    def test_filters_match_their_json(self, filter_: FilterConfiguration) -> None:
+        """Filters are serialized with the same content as their `json()` method."""
+        assert json.loads(filter_serializer.one(filter_)) == filter_.json()
+        assert json.loads(filter_serializer.many([filter_, filter_])) == [filter_.json(), filter_.json()]
+
+    def test_channels_match_their_json(self, channel: ChannelConfiguration) -> None:
+        """Channels are serialized with the fields of their actual type, as their `json()` method does."""
+        assert json.loads(channel_serializer.one(channel)) == channel.json()
+        assert json.loads(channel_serializer.many([channel])) == [channel.json()]
+
+    def test_users_match_their_json(self, user: User) -> None:
+        """Users are serialized with the same content as their `json()` method, including filters and channels."""
+        assert json.loads(user_serializer.one(user)) == user.json()
+        assert json.loads(user_serializer.many([user])) == [user.json()]
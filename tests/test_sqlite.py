@@ -0,0 +1,96 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from cumplo_common.models.user import User
+from google.api_core.exceptions import AlreadyExists, FailedPrecondition, NotFound
+
+from cumplo_tailor.database import Operation, UserChanges, repository
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def stored(database: repository.RepositoryClient, user: User) -> User:
+    """Store the user with an email."""
+    user.email = "tailor@example.com"
+    await database.users.create(user)
+    return user
+
+
+class TestSQLiteUsers:
+    async def test_gets_users_by_any_identifier(self, database: repository.RepositoryClient, stored: User) -> None:
+        """Users are found by their ID, API key and email."""
+        assert await database.users.get(str(stored.id)) == stored
+        assert await database.users.get(api_key=stored.api_key) == stored
+        assert await database.users.get(email=stored.email) == stored
+
+        with pytest.raises(KeyError):
+            await database.users.get("missing")
+
+    async def test_creates_users_once(self, database: repository.RepositoryClient, stored: User) -> None:
+        """Creating an existing user fails."""
+        with pytest.raises(AlreadyExists):
+            await database.users.create(stored)
+
+    async def test_conditions_updates_on_the_version(self, database: repository.RepositoryClient, stored: User) -> None:
+        """Updates conditioned on an outdated version fail, and missing users are not recreated."""
+        _, version = await database.users.get_versioned(str(stored.id))
+        new_version = await database.users.update(stored, UserChanges(attributes={"name"}), version=version)
+        assert new_version > version
+
+        with pytest.raises(FailedPrecondition):
+            await database.users.update(stored, UserChanges(attributes={"name"}), version=version)
+
+        await database.users.delete(stored)
+        with pytest.raises(NotFound):
+            await database.users.update(stored, UserChanges(attributes={"name"}))
+
+    async def test_moves_users(self, database: repository.RepositoryClient, stored: User) -> None:
+        """Users are moved between collections along with their change event, reporting the missing ones."""
+        results = await database.users.move_many([str(stored.id), "missing"], database.disabled, Operation.DISABLED)
+
+        assert results == {str(stored.id): HTTPStatus.OK, "missing": HTTPStatus.NOT_FOUND}
+        assert await database.disabled.get(str(stored.id)) == stored
+        [event] = await database.outbox.pending(10)
+        assert (event.id_user, event.operation) == (str(stored.id), Operation.DISABLED)
+
+    async def test_patches_users(self, database: repository.RepositoryClient, stored: User) -> None:
+        """Users are merge patched, validating the payloads and appending the changed fields."""
+        payloads = {str(stored.id): {"name": "Patched"}, "missing": {"name": "Patched"}}
+        results = await database.users.patch_many(payloads, Operation.UPDATED)
+        assert results == {str(stored.id): HTTPStatus.OK, "missing": HTTPStatus.NOT_FOUND}
+        assert (await database.users.get(str(stored.id))).name == "Patched"
+
+        results = await database.users.patch_many({str(stored.id): {"name": ["invalid"]}}, Operation.UPDATED)
+        assert results == {str(stored.id): HTTPStatus.UNPROCESSABLE_ENTITY}
+
+        [event] = await database.outbox.pending(10)
+        assert event.fields == ["name"]
+
+    async def test_pages_users_by_id(self, database: repository.RepositoryClient, stored: User) -> None:
+        """Pages start after the given ID."""
+        assert await database.users.page(10) == [stored]
+        assert not await database.users.page(10, start_after=str(stored.id))
+
+
+class TestSQLiteOutbox:
+    async def test_leases_to_a_single_owner(self, database: repository.RepositoryClient) -> None:
+        """The lease is held by one owner at a time, who can renew it, until it expires."""
+        duration = timedelta(minutes=1).total_seconds()
+        assert await database.outbox.lease("first", duration)
+        assert await database.outbox.lease("first", duration)
+        assert not await database.outbox.lease("second", duration)
+
+        assert await database.outbox.lease("first", -1)
+        assert await database.outbox.lease("second", duration)
+
+
+class TestRepositoryClient:
+    def test_rejects_firestore_only_features(
+        self, monkeypatch: pytest.MonkeyPatch, database: repository.RepositoryClient
+    ) -> None:
+        """The SQLite backend refuses to start with features whose stores only exist in Firestore."""
+        monkeypatch.setattr(repository, "SUBSCRIPTION_MARKERS", True)
+        with pytest.raises(ValueError, match="SUBSCRIPTION_MARKERS"):
+            _ = database.users
@@ -0,0 +1,245 @@
+import json
+from collections.abc import Callable
+from http import HTTPStatus
+
+import pytest
+import ulid
+from cumplo_common.models.user import User
+from fastapi.exceptions import HTTPException
+from fastapi.responses import StreamingResponse
+
+from cumplo_tailor.controllers import UsersController
+from cumplo_tailor.controllers import users as controller
+from cumplo_tailor.database import UserChanges, repository
+from cumplo_tailor.database.cache import cache
+from cumplo_tailor.routers.users.private import _list_users  # noqa: PLC2701
+from cumplo_tailor.utils.metrics import metrics
+
+pytestmark = pytest.mark.anyio
+
+
+def rename(name: str) -> Callable[[User], UserChanges]:
+    """Build a mutation renaming the user."""
+
+    def mutation(user: User) -> UserChanges:
+        """Rename the user."""
+        user.name = name
+        return UserChanges(attributes={"name"})
+
+    return mutation
+
+
+def counter(name: str) -> int:
+    """Get the current value of an unlabelled counter."""
+    return metrics.snapshot().get(name, 0)
+
+
+@pytest.fixture
+def optimistic(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Enable optimistic concurrency, retrying conflicts right away."""
+    monkeypatch.setattr(controller, "OPTIMISTIC_CONCURRENCY", True)
+    monkeypatch.setattr(controller, "MUTATION_RETRY_DELAY", 0)
+
+
+@pytest.fixture
+def concurrent_writes(monkeypatch: pytest.MonkeyPatch, database: repository.RepositoryClient) -> Callable[[int], None]:
+    """Make the next conditional updates race with a write of another request, which changes the user's email."""
+
+    def race(times: int) -> None:
+        """Race with the given amount of conditional updates."""
+        update = database.users.update
+        pending = iter(range(times))
+
+        async def racing_update(user: User, changes: UserChanges, **kwargs: object) -> object:
+            """Write the stored user with a new email before the update, if still racing."""
+            if kwargs.get("version") and next(pending, None) is not None:
+                stored = await database.users.get(str(user.id))
+                stored.email = "racer@example.com"
+                await database.users.put(stored)
+            return await update(user, changes, **kwargs)
+
+        monkeypatch.setattr(database.users, "update", racing_update)
+
+    return race
+
+
+class TestUpdate:
+    async def test_writes_the_touched_paths(self, database: repository.RepositoryClient, user: User) -> None:
+        """The touched paths are written and the change event lists them."""
+        await database.users.create(user)
+        user.name = "Renamed"
+        await UsersController.update(user, UserChanges(attributes={"name"}))
+
+        assert (await database.users.get(str(user.id))).name == "Renamed"
+        [event] = await database.outbox.pending(10)
+        assert event.fields == ["name"]
+
+    async def test_does_not_recreate_missing_users(self, database: repository.RepositoryClient, user: User) -> None:
+        """Updating the touched paths of a user deleted meanwhile fails instead of writing it back."""
+        with pytest.raises(HTTPException) as error:
+            await UsersController.update(user, UserChanges(attributes={"name"}))
+
+        assert error.value.status_code == HTTPStatus.NOT_FOUND
+        with pytest.raises(KeyError):
+            await database.users.get(str(user.id))
+
+
+@pytest.mark.usefixtures("optimistic")
+class TestMutate:
+    async def test_retries_conflicts_on_a_fresh_copy(
+        self, database: repository.RepositoryClient, user: User, concurrent_writes: Callable[[int], None]
+    ) -> None:
+        """A conflicting write is retried on the latest user, so neither change is lost."""
+        await database.users.create(user)
+        conflicts, retries = counter("user_mutation_conflicts"), counter("user_mutation_retries")
+        concurrent_writes(1)
+
+        await UsersController.mutate(user, rename("Renamed"))
+
+        stored = await database.users.get(str(user.id))
+        assert (stored.name, stored.email) == ("Renamed", "racer@example.com")
+        assert counter("user_mutation_conflicts") == conflicts + 1
+        assert counter("user_mutation_retries") == retries + 1
+
+    async def test_gives_up_after_the_retries(
+        self, database: repository.RepositoryClient, user: User, concurrent_writes: Callable[[int], None]
+    ) -> None:
+        """Mutations conflicting on every attempt fail with a conflict, leaving the concurrent change in place."""
+        await database.users.create(user)
+        exhausted = counter("user_mutation_exhausted")
+        concurrent_writes(controller.MAX_MUTATION_RETRIES + 1)
+
+        with pytest.raises(HTTPException) as error:
+            await UsersController.mutate(user, rename("Renamed"))
+
+        assert error.value.status_code == HTTPStatus.CONFLICT
+        assert (await database.users.get(str(user.id))).name == user.name
+        assert counter("user_mutation_exhausted") == exhausted + 1
+
+    async def test_skips_the_write_without_changes(self, database: repository.RepositoryClient, user: User) -> None:
+        """Mutations touching nothing don't write the user."""
+        await database.users.create(user)
+        _, version = await database.users.get_versioned(str(user.id))
+
+        await UsersController.mutate(user, lambda _: UserChanges())
+
+        assert (await database.users.get_versioned(str(user.id))).version == version
+
+    async def test_fails_on_missing_users(self, user: User) -> None:
+        """Mutating a user that no longer exists fails."""
+        with pytest.raises(HTTPException) as error:
+            await UsersController.mutate(user, rename("Renamed"))
+
+        assert error.value.status_code == HTTPStatus.NOT_FOUND
+
+
+class TestBatchedWrites:
+    async def test_disables_and_enables(self, database: repository.RepositoryClient, user: User) -> None:
+        """Users are moved to the disabled collection and back."""
+        await database.users.create(user)
+
+        await UsersController.disable(user)
+        await database.disabled.get(str(user.id))
+        with pytest.raises(KeyError):
+            await database.users.get(str(user.id))
+
+        await UsersController.enable(user)
+        await database.users.get(str(user.id))
+
+    async def test_retries_conflicts(
+        self, monkeypatch: pytest.MonkeyPatch, database: repository.RepositoryClient, user: User
+    ) -> None:
+        """A conflicting batched write is retried until it goes through."""
+        monkeypatch.setattr(controller, "MUTATION_RETRY_DELAY", 0)
+        await database.users.create(user)
+        delete_many = database.users.delete_many
+        results = iter([{str(user.id): HTTPStatus.CONFLICT}])
+
+        async def conflicting_delete_many(ids: list[str], **kwargs: object) -> dict[str, HTTPStatus]:
+            """Conflict on the first attempt."""
+            return next(results, None) or await delete_many(ids, **kwargs)
+
+        monkeypatch.setattr(database.users, "delete_many", conflicting_delete_many)
+        await UsersController.delete(user)
+
+        with pytest.raises(KeyError):
+            await database.users.get(str(user.id))
+
+    async def test_fails_on_missing_users(self, user: User) -> None:
+        """Writing a user that no longer exists fails."""
+        with pytest.raises(HTTPException) as error:
+            await UsersController.disable(user)
+
+        assert error.value.status_code == HTTPStatus.NOT_FOUND
+
+
+class TestCache:
+    async def test_serves_users_from_the_cache(self, database: repository.RepositoryClient, user: User) -> None:
+        """Users read once are served from the cache by ID and API key, as copies."""
+        await database.users.create(user)
+        await UsersController.get(api_key=user.api_key)
+        await database.users.delete(user)
+
+        cached = await UsersController.get(id_user=str(user.id))
+        assert cached == await UsersController.get(api_key=user.api_key)
+        cached.name = "Changed"
+        assert (await UsersController.get(id_user=str(user.id))).name == user.name
+
+    async def test_writes_through(self, database: repository.RepositoryClient, user: User) -> None:
+        """Updates replace the cached user, bumping its version."""
+        await database.users.create(user)
+        _, version = await UsersController.lookup(id_user=str(user.id))
+
+        await UsersController.mutate(user, rename("Renamed"))
+
+        cached, new_version = await UsersController.lookup(id_user=str(user.id))
+        assert cached.name == "Renamed"
+        assert new_version != version
+
+    async def test_invalidates_removed_users(self, database: repository.RepositoryClient, user: User) -> None:
+        """Deleted and disabled users are dropped from the cache."""
+        await database.users.create(user)
+        await UsersController.get(id_user=str(user.id))
+
+        await UsersController.disable(user)
+
+        assert cache.get(id_user=str(user.id)) is None
+        assert cache.get(api_key=user.api_key) is None
+        with pytest.raises(KeyError):
+            await UsersController.get(api_key=user.api_key)
+
+
+class TestListUsers:
+    @pytest.fixture
+    async def ids(self, database: repository.RepositoryClient) -> list[str]:
+        """Store a few users, returning their IDs in order."""
+        users = [User.model_validate({"id": ulid.new(), "api_key": f"key-{index}"}) for index in range(5)]
+        for user in users:
+            await database.users.create(user)
+        return sorted(str(user.id) for user in users)
+
+    async def test_paginates_with_a_cursor(self, ids: list[str]) -> None:
+        """Pages follow each other through the cursor until the users run out."""
+        listed, cursor = [], None
+        while True:
+            response = await _list_users(limit=2, cursor=cursor)
+            listed.extend(user["id"] for user in json.loads(response.body))
+            if not (cursor := response.headers.get("X-Next-Cursor")):
+                break
+
+        assert listed == ids
+
+    async def test_streams_every_user(self, ids: list[str]) -> None:
+        """Streaming yields every user after the cursor as a JSON line."""
+        response = await _list_users(limit=2, stream=True)
+        assert isinstance(response, StreamingResponse)
+
+        lines = [line async for line in response.body_iterator]
+        assert [json.loads(line)["id"] for line in lines] == ids
+
+    async def test_rejects_malformed_cursors(self) -> None:
+        """Cursors that can't be decoded are rejected."""
+        with pytest.raises(HTTPException) as error:
+            await _list_users(cursor="A")
+
+        assert error.value.status_code == HTTPStatus.BAD_REQUEST